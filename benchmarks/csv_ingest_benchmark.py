@@ -0,0 +1,97 @@
+# benchmarks/csv_ingest_benchmark.py
+"""
+Compare DynamicFrame CSV ingestion with the schema-pinned reader
+
+Run inside the AWS Glue local development image, which provides awsglue:
+    spark-submit benchmarks/csv_ingest_benchmark.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'glue-scripts'))
+
+from awsglue.context import GlueContext
+from pyspark.context import SparkContext
+from pyspark.sql import functions as F
+
+from materialization import MaterializationPlanner
+from schema_registry import SALES_RAW_SCHEMA, read_typed_csv
+
+
+def generate_sales_csv(path, rows, customers, files):
+    """Write synthetic sales CSV files with the raw sales layout"""
+    start = date(2023, 1, 1)
+    rows_per_file = max(rows // files, 1)
+    sale_id = 0
+
+    for file_index in range(files):
+        with open(os.path.join(path, f"sales_{file_index:04d}.csv"), 'w') as f:
+            f.write("sale_id,customer_id,product_id,product_name,amount,sale_date\n")
+            for _ in range(rows_per_file):
+                sale_id += 1
+                f.write(
+                    f"{sale_id},{random.randint(1, customers)},{random.randint(100, 199)},"
+                    f"Product {random.randint(1, 50)},{random.uniform(1, 2000):.2f},"
+                    f"{start + timedelta(days=random.randint(0, 730))}\n"
+                )
+
+
+def time_action(label, action):
+    """Run action and print its wall time"""
+    started = time.perf_counter()
+    result = action()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {elapsed:.2f}s ({result} rows)")
+    return elapsed
+
+
+def dynamic_frame_path(glue_context, path):
+    """The previous ingestion path: inferred DynamicFrame, then implicit casts"""
+    frame = glue_context.create_dynamic_frame.from_options(
+        format_options={"quoteChar": "\"", "withHeader": True, "separator": ","},
+        connection_type="s3",
+        format="csv",
+        connection_options={"paths": [path], "recurse": True}
+    )
+    df = frame.toDF().withColumn("sale_date", F.to_date(F.col("sale_date"), "yyyy-MM-dd"))
+    return df.filter(F.col("amount") > 0).count()
+
+
+def typed_reader_path(spark, path):
+    """Schema-pinned single-pass parse"""
+    materialization = MaterializationPlanner()
+    try:
+        df, _ = read_typed_csv(spark, [path], SALES_RAW_SCHEMA, materialization, "benchmark_raw")
+        return df.filter(F.col("amount") > 0).count()
+    finally:
+        materialization.release_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--customers', type=int, default=50000)
+    parser.add_argument('--files', type=int, default=8)
+    options = parser.parse_args()
+
+    sc = SparkContext.getOrCreate()
+    glue_context = GlueContext(sc)
+    spark = glue_context.spark_session
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate_sales_csv(data_dir, options.rows, options.customers, options.files)
+        path = f"file://{data_dir}"
+
+        dynamic_seconds = time_action("DynamicFrame ingest", lambda: dynamic_frame_path(glue_context, path))
+        typed_seconds = time_action("Schema-pinned ingest", lambda: typed_reader_path(spark, path))
+
+    print(f"Speedup: {dynamic_seconds / typed_seconds:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,258 @@
+# benchmarks/etl_benchmark.py
+"""
+Run the customer and sales ETL jobs end to end on local-mode PySpark
+
+The jobs run through their run_* functions with the awsglue and boto3
+shims from glue_shims, against data from synthetic_data. Each stage of a
+job reports the StageMetrics the job events carry (wall time, shuffle
+read/write bytes, spill, GC time) plus its largest task's execution
+memory from the Spark monitoring API; each run also reports the peak JVM
+heap seen by its stages and the driver's peak Python RSS.
+
+Needs pyspark and a JDK, but no awsglue, boto3 or AWS credentials:
+    python benchmarks/etl_benchmark.py --customers 100000 --sales-rows 2000000 --skew 1.1
+    python benchmarks/etl_benchmark.py --jobs sales --mode incremental --runs 3 --output results.json
+"""
+import argparse
+import importlib
+import json
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from urllib.request import urlopen
+
+import glue_shims
+from job_stages import StageMetrics
+from synthetic_data import generate_customers, generate_sales
+
+RAW_BUCKET = 'benchmark-raw'
+PROCESSED_BUCKET = 'benchmark-processed'
+
+JOBS = {
+    'customer': ('customer_data_etl', 'run_customer_etl'),
+    'sales': ('sales_data_etl', 'run_sales_etl')
+}
+
+
+class MemoryPeaks:
+    """Peak task execution memory and JVM heap of job groups from the Spark monitoring REST API"""
+
+    def __init__(self, spark_context):
+        self.sc = spark_context
+        self.base_url = f"{spark_context.uiWebUrl}/api/v1/applications/{spark_context.applicationId}"
+
+    def _get(self, path):
+        with urlopen(f"{self.base_url}{path}") as response:
+            return json.loads(response.read())
+
+    def group_peaks(self, group):
+        peaks = {'peak_task_memory': 0, 'peak_jvm_heap': 0}
+        stage_ids = set()
+        for job_id in self.sc.statusTracker().getJobIdsForGroup(group):
+            stage_ids.update(self._get(f"/jobs/{job_id}")['stageIds'])
+
+        for stage_id in sorted(stage_ids):
+            for attempt in self._get(f"/stages/{stage_id}?details=false"):
+                if attempt.get('status') == 'SKIPPED':
+                    continue
+                # The stage's peakExecutionMemory sums its tasks; take the largest single task
+                summary = self._get(f"/stages/{stage_id}/{attempt['attemptId']}/taskSummary?quantiles=1.0")
+                task_peak = int((summary.get('peakExecutionMemory') or [0])[0])
+                heap = (attempt.get('peakExecutorMetrics') or {}).get('JVMHeapMemory', 0)
+                peaks['peak_task_memory'] = max(peaks['peak_task_memory'], task_peak)
+                peaks['peak_jvm_heap'] = max(peaks['peak_jvm_heap'], heap)
+
+        return peaks
+
+
+def job_args(job_module, job_name, mode, overrides):
+    """Resolved job arguments as the Glue entry point would pass them"""
+    args = dict(job_module.OPTIONAL_ARGS)
+    args.update({
+        'JOB_NAME': f"benchmark-{job_name}",
+        'raw_data_bucket': RAW_BUCKET,
+        'processed_data_bucket': PROCESSED_BUCKET,
+        'database_name': 'benchmark'
+    })
+    if 'processing_mode' in args:
+        args['processing_mode'] = mode
+    args.update(overrides)
+    return args
+
+
+def run_job(spark, job_name, mode, root, overrides, stages=None):
+    """Run one job with fresh local clients; returns its completion details"""
+    module_name, function_name = JOBS[job_name]
+    job_module = importlib.import_module(module_name)
+    clients = glue_shims.local_clients(root)
+    glue_context = glue_shims.GlueContext(spark.sparkContext)
+    job = glue_shims.Job(glue_context)
+    events = job_module.EventPublisher(clients['events'], 'custom.glue.etl', flush_on_exit=False)
+
+    run = getattr(job_module, function_name)
+    # Keep the jobs' progress prints out of the report
+    with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+        return run(job_args(job_module, job_name, mode, overrides), glue_context, job,
+                   clients['s3'], clients['glue'], events, stages)
+
+
+def format_bytes(value):
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(value) < 1024 or unit == 'GiB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024.0
+
+
+def print_run(result):
+    print(f"\n{result['job']} run {result['run']} ({result['mode']}): "
+          f"{result['records_processed']} records in {result['wall_seconds']:.2f}s")
+    print(f"  {'stage':<20}{'wall s':>9}{'jobs':>6}{'shuffle read':>14}{'shuffle write':>14}{'spilled':>12}"
+          f"{'gc s':>7}{'task peak mem':>15}")
+    for stage in result['stages']:
+        print(f"  {stage['stage']:<20}{stage['wall_seconds']:>9.2f}{stage.get('spark_jobs', 0):>6}"
+              f"{format_bytes(stage.get('shuffle_read_bytes', 0)):>14}"
+              f"{format_bytes(stage.get('shuffle_write_bytes', 0)):>14}"
+              f"{format_bytes(stage.get('memory_spilled_bytes', 0) + stage.get('disk_spilled_bytes', 0)):>12}"
+              f"{stage.get('jvm_gc_ms', 0) / 1000.0:>7.2f}{format_bytes(stage['peak_task_memory']):>15}")
+    print(f"  peak JVM heap {format_bytes(result['peak_jvm_heap'])}, "
+          f"driver Python peak RSS {format_bytes(result['driver_peak_rss'])}")
+
+
+def print_summary(results):
+    """Median stage wall times per job across runs"""
+    for job_name in dict.fromkeys(result['job'] for result in results):
+        runs = [result for result in results if result['job'] == job_name]
+        if len(runs) < 2:
+            continue
+        print(f"\n{job_name}: median of {len(runs)} runs, {statistics.median(r['wall_seconds'] for r in runs):.2f}s")
+        for name in dict.fromkeys(stage['stage'] for run in runs for stage in run['stages']):
+            walls = [stage['wall_seconds'] for run in runs for stage in run['stages'] if stage['stage'] == name]
+            print(f"  {name:<20}{statistics.median(walls):>9.2f}")
+
+
+def reset_processed(root):
+    shutil.rmtree(os.path.join(root, PROCESSED_BUCKET), ignore_errors=True)
+    os.makedirs(os.path.join(root, PROCESSED_BUCKET))
+
+
+def add_increment(root, options, run_index):
+    """New customer and sales files dated at the end of the generated range"""
+    increment_rows = max(1, int(options.sales_rows * options.increment_fraction))
+    increment_customers = max(1, int(options.customers * options.increment_fraction))
+    sales_start = date(2023, 1, 1) + timedelta(days=options.days - 30)
+
+    customer_paths = generate_customers(
+        os.path.join(root, RAW_BUCKET, 'customers'), increment_customers, files=1,
+        first_customer_id=options.customers + 1, seed=options.seed + run_index + 1, prefix="customers_increment"
+    )
+    sales_paths = generate_sales(
+        os.path.join(root, RAW_BUCKET, 'sales'), increment_rows, options.customers, files=1, skew=options.skew,
+        start=sales_start, days=30, first_sale_id=options.sales_rows + 1, seed=options.seed + run_index + 1,
+        prefix="sales_increment"
+    )
+    return customer_paths + sales_paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', default='customer,sales', help="comma-separated: customer, sales")
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--sales-rows', type=int, default=500000)
+    parser.add_argument('--customer-files', type=int, default=4)
+    parser.add_argument('--sales-files', type=int, default=8)
+    parser.add_argument('--days', type=int, default=730, help="days of sales history")
+    parser.add_argument('--skew', type=float, default=0.0, help="Zipf exponent of customer IDs in sales")
+    parser.add_argument('--bad-rate', type=float, default=0.0, help="fraction of malformed rows")
+    parser.add_argument('--mode', choices=['full', 'incremental'], default='full',
+                        help="incremental bootstraps from the generated data, then measures a run over new files")
+    parser.add_argument('--increment-fraction', type=float, default=0.05)
+    parser.add_argument('--runs', type=int, default=1)
+    parser.add_argument('--cores', type=int, default=4)
+    parser.add_argument('--driver-memory', default='2g')
+    parser.add_argument('--shuffle-partitions', type=int, default=16)
+    parser.add_argument('--arg', action='append', default=[], metavar='NAME=VALUE',
+                        help="job argument override, e.g. --arg cluster_sort_keys=customer_id")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--work-dir', help="keep generated data and output here instead of a temporary directory")
+    parser.add_argument('--output', help="write the results as JSON")
+    options = parser.parse_args()
+
+    job_names = [name.strip() for name in options.jobs.split(',') if name.strip()]
+    unknown = [name for name in job_names if name not in JOBS]
+    if unknown:
+        parser.error(f"unknown jobs: {unknown}")
+    overrides = dict(item.split('=', 1) for item in options.arg)
+
+    root = options.work_dir or tempfile.mkdtemp(prefix='etl-benchmark-')
+    glue_shims.install(root)
+    spark = glue_shims.local_spark_session(
+        root, [RAW_BUCKET, PROCESSED_BUCKET], options.cores, options.driver_memory, options.shuffle_partitions
+    )
+    spark.sparkContext.setLogLevel("ERROR")
+    memory_peaks = MemoryPeaks(spark.sparkContext)
+
+    started = time.perf_counter()
+    generate_customers(os.path.join(root, RAW_BUCKET, 'customers'), options.customers, options.customer_files,
+                       bad_rate=options.bad_rate, seed=options.seed)
+    generate_sales(os.path.join(root, RAW_BUCKET, 'sales'), options.sales_rows, options.customers,
+                   options.sales_files, skew=options.skew, days=options.days, bad_rate=options.bad_rate,
+                   seed=options.seed)
+    print(f"Generated {options.customers} customers and {options.sales_rows} sales (skew {options.skew}) "
+          f"under {root} in {time.perf_counter() - started:.1f}s")
+
+    results = []
+    try:
+        for run_index in range(options.runs):
+            reset_processed(root)
+            increment_paths = []
+            if options.mode == 'incremental':
+                for job_name in job_names:
+                    run_job(spark, job_name, 'full', root, overrides)
+                increment_paths = add_increment(root, options, run_index)
+
+            for job_name in job_names:
+                spark.catalog.clearCache()
+                label = f"{job_name}-{run_index + 1}"
+                stage_metrics = StageMetrics(spark.sparkContext, label)
+
+                run_started = time.perf_counter()
+                details = run_job(spark, job_name, options.mode, root, overrides, stage_metrics)
+                wall_seconds = time.perf_counter() - run_started
+
+                stages = [
+                    dict(stage, **memory_peaks.group_peaks(stage_metrics.job_groups[stage['stage']]))
+                    for stage in stage_metrics.stages
+                ]
+                result = {
+                    'job': job_name,
+                    'run': run_index + 1,
+                    'mode': options.mode,
+                    'records_processed': details['records_processed'],
+                    'wall_seconds': wall_seconds,
+                    'stages': stages,
+                    'peak_jvm_heap': max([stage['peak_jvm_heap'] for stage in stages] or [0]),
+                    'driver_peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+                }
+                results.append(result)
+                print_run(result)
+
+            for path in increment_paths:
+                os.remove(path)
+    finally:
+        spark.stop()
+        if not options.work_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print_summary(results)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump({'options': vars(options), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
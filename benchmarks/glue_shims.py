@@ -0,0 +1,217 @@
+# benchmarks/glue_shims.py
+"""
+Stand-ins for awsglue and boto3 so the ETL jobs run on local-mode PySpark
+
+install() registers the shim modules before the job scripts are
+imported. S3 paths are served from a local directory: Spark resolves
+s3://<bucket>/ through a viewfs mount table onto <root>/<bucket>, and the
+boto3 S3 client is a LocalS3 over the same directory, so the jobs run
+unchanged against generated data.
+"""
+import os
+import sys
+import types
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'lambda-functions'))
+sys.path.insert(0, os.path.join(ROOT, 'glue-scripts'))
+
+from local_s3 import LocalS3
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+
+
+def getResolvedOptions(argv, options):
+    """Parse --name value pairs like awsglue.utils.getResolvedOptions"""
+    resolved = {}
+    for name in options:
+        flag = f"--{name}"
+        if flag not in argv:
+            raise RuntimeError(f"argument {flag} is required")
+        resolved[name] = argv[argv.index(flag) + 1]
+    return resolved
+
+
+class DynamicFrame:
+    """DynamicFrame reduced to the DataFrame it wraps"""
+
+    def __init__(self, df, glue_ctx, name):
+        self._df = df
+        self.glue_ctx = glue_ctx
+        self.name = name
+
+    @classmethod
+    def fromDF(cls, dataframe, glue_ctx, name):
+        return cls(dataframe, glue_ctx, name)
+
+    def toDF(self):
+        return self._df
+
+
+class ApplyMapping:
+    @staticmethod
+    def apply(frame, mappings, transformation_ctx="", **kwargs):
+        """Select, cast and rename columns as (source, source type, target, target type) mappings"""
+        columns = [
+            F.col(f"`{source}`").cast(target_type).alias(target)
+            for source, _, target, target_type in mappings
+        ]
+        return DynamicFrame(frame.toDF().select(*columns), frame.glue_ctx, transformation_ctx or frame.name)
+
+
+class S3ParquetSink:
+    """Glue S3 sink writing parquet; catalog updates are recorded, not applied"""
+
+    def __init__(self, path, partition_keys=None, **options):
+        self.path = path
+        self.partition_keys = partition_keys or []
+        self.options = options
+        self.format_options = {}
+        self.catalog_info = None
+
+    def setFormat(self, format, **options):
+        self.format_options = options
+
+    def setCatalogInfo(self, catalogDatabase, catalogTableName):
+        self.catalog_info = (catalogDatabase, catalogTableName)
+
+    def writeFrame(self, frame):
+        writer = frame.toDF().write.mode("append")
+        if self.format_options.get('blockSize'):
+            writer = writer.option("parquet.block.size", self.format_options['blockSize'])
+        if self.partition_keys:
+            writer = writer.partitionBy(*self.partition_keys)
+        writer.parquet(self.path)
+
+
+class DynamicFrameWriter:
+    def __init__(self, glue_context):
+        self.glue_context = glue_context
+
+    def from_options(self, frame, connection_type, connection_options, format=None, transformation_ctx="", **kwargs):
+        S3ParquetSink(
+            connection_options['path'],
+            connection_options.get('partitionKeys')
+        ).writeFrame(frame)
+
+
+class GlueContext:
+    def __init__(self, spark_context):
+        self.spark_session = SparkSession(spark_context)
+        self.write_dynamic_frame = DynamicFrameWriter(self)
+
+    def getSink(self, connection_type, path, partitionKeys=None, **options):
+        return S3ParquetSink(path, partitionKeys, **options)
+
+
+class Job:
+    """Job bookmark stand-in that counts commits"""
+
+    def __init__(self, glue_context):
+        self.glue_context = glue_context
+        self.name = None
+        self.commits = 0
+
+    def init(self, job_name, args=None):
+        self.name = job_name
+
+    def commit(self):
+        self.commits += 1
+
+
+class EntityNotFoundException(Exception):
+    pass
+
+
+class LocalGlue:
+    """Glue client with an in-memory catalog; tables the jobs do not create explicitly stay unknown"""
+
+    class exceptions:
+        EntityNotFoundException = EntityNotFoundException
+
+    def __init__(self):
+        self.tables = {}
+        self.partitions = {}
+
+    def get_table(self, DatabaseName, Name):
+        if (DatabaseName, Name) not in self.tables:
+            raise EntityNotFoundException(f"{DatabaseName}.{Name}")
+        return {'Table': self.tables[(DatabaseName, Name)]}
+
+    def create_table(self, DatabaseName, TableInput):
+        self.tables[(DatabaseName, TableInput['Name'])] = TableInput
+
+    def batch_create_partition(self, DatabaseName, TableName, PartitionInputList):
+        partitions = self.partitions.setdefault((DatabaseName, TableName), {})
+        errors = []
+        for partition in PartitionInputList:
+            values = tuple(partition['Values'])
+            if values in partitions:
+                errors.append({'PartitionValues': list(values),
+                               'ErrorDetail': {'ErrorCode': 'AlreadyExistsException'}})
+            partitions[values] = partition
+        return {'Errors': errors}
+
+
+class LocalEvents:
+    """EventBridge client that keeps the entries it is sent"""
+
+    def __init__(self):
+        self.entries = []
+
+    def put_events(self, Entries):
+        self.entries.extend(Entries)
+        return {'FailedEntryCount': 0, 'Entries': [{'EventId': uuid.uuid4().hex} for _ in Entries]}
+
+
+def local_clients(root):
+    """s3, glue and events clients over the local directory root"""
+    return {'s3': LocalS3(root), 'glue': LocalGlue(), 'events': LocalEvents()}
+
+
+def install(root):
+    """Register the awsglue and boto3 shim modules; boto3.client returns the local clients"""
+    clients = local_clients(root)
+    modules = {
+        'awsglue': {},
+        'awsglue.transforms': {'ApplyMapping': ApplyMapping, '__all__': ['ApplyMapping']},
+        'awsglue.utils': {'getResolvedOptions': getResolvedOptions},
+        'awsglue.context': {'GlueContext': GlueContext},
+        'awsglue.job': {'Job': Job},
+        'awsglue.dynamicframe': {'DynamicFrame': DynamicFrame},
+        'boto3': {'client': lambda service_name, **kwargs: clients[service_name]}
+    }
+    for name, attributes in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+    for name in modules:
+        if '.' in name:
+            package, _, child = name.rpartition('.')
+            setattr(sys.modules[package], child, sys.modules[name])
+    return clients
+
+
+def local_spark_session(root, buckets, cores=4, driver_memory='2g', shuffle_partitions=None):
+    """Local-mode session whose s3://<bucket>/ paths resolve to <root>/<bucket>"""
+    builder = SparkSession.builder \
+        .master(f"local[{cores}]") \
+        .appName("etl-benchmark") \
+        .config("spark.driver.memory", driver_memory) \
+        .config("spark.ui.showConsoleProgress", "false") \
+        .config("spark.ui.retainedJobs", "100000") \
+        .config("spark.ui.retainedStages", "100000") \
+        .config("spark.executor.metrics.pollingInterval", "100ms") \
+        .config("spark.sql.adaptive.enabled", "true") \
+        .config("spark.hadoop.fs.s3.impl", "org.apache.hadoop.fs.viewfs.ViewFileSystemOverloadScheme") \
+        .config("spark.hadoop.fs.s3.impl.disable.cache", "true")
+    if shuffle_partitions:
+        builder = builder.config("spark.sql.shuffle.partitions", str(shuffle_partitions))
+
+    for bucket in buckets:
+        bucket_root = os.path.abspath(os.path.join(root, bucket))
+        os.makedirs(bucket_root, exist_ok=True)
+        builder = builder.config(f"spark.hadoop.fs.viewfs.mounttable.{bucket}.linkFallback", f"file://{bucket_root}")
+
+    return builder.getOrCreate()
@@ -0,0 +1,187 @@
+# benchmarks/orchestrator_benchmark.py
+"""
+Measure orchestrator import time and per-event handling latency with stubbed AWS clients
+
+Runs with plain Python, no AWS credentials or boto3 needed:
+    python benchmarks/orchestrator_benchmark.py --events 5000
+"""
+import argparse
+import io
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MODULE_PATHS = [os.path.join(ROOT, 'lambda-functions'), os.path.join(ROOT, 'glue-scripts')]
+
+BENCHMARK_ENV = {
+    'PROJECT_NAME': 'data-pipeline',
+    'ENVIRONMENT': 'dev',
+    'JOB_STATE_STORE': 'memory',
+    'LOG_LEVEL': 'WARNING'
+}
+
+
+class StubGlue:
+    def __init__(self, latency):
+        self.latency = latency
+        self.runs = 0
+
+    def start_job_run(self, JobName, Arguments=None, **run_options):
+        time.sleep(self.latency)
+        self.runs += 1
+        return {'JobRunId': f"jr_{self.runs}"}
+
+    def start_workflow_run(self, Name):
+        time.sleep(self.latency)
+        return {'RunId': 'wr_1'}
+
+    def get_job(self, JobName):
+        time.sleep(self.latency)
+        return {'Job': {'Name': JobName, 'Timeout': 60, 'ExecutionProperty': {'MaxConcurrentRuns': 1},
+                        'DefaultArguments': {'--processing_mode': 'incremental'}}}
+
+    def get_job_run(self, JobName, RunId):
+        time.sleep(self.latency)
+        return {'JobRun': {'Id': RunId, 'ExecutionTime': 120, 'WorkerType': 'G.1X', 'NumberOfWorkers': 2,
+                           'Arguments': {'--input_bytes': str(len(StubS3.SAMPLE))}}}
+
+
+class StubEvents:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put_events(self, Entries):
+        time.sleep(self.latency)
+        return {'FailedEntryCount': 0, 'Entries': [{'EventId': str(i)} for i in range(len(Entries))]}
+
+
+class StubS3:
+    SAMPLE = b"sale_id,customer_id,product_id,product_name,amount,sale_date\n" + b"1,2,3,Product 4,19.99,2024-06-01\n" * 500
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def put_object(self, **kwargs):
+        time.sleep(self.latency)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        return {'ContentLength': len(self.SAMPLE)}
+
+    def get_paginator(self, operation_name):
+        stub = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                time.sleep(stub.latency)
+                yield {'Contents': [{'Key': f"{Prefix}file_{index:06d}.csv", 'Size': len(stub.SAMPLE)}
+                                    for index in range(100)]}
+
+        return Paginator()
+
+    def get_object(self, Bucket, Key, Range=None):
+        time.sleep(self.latency)
+        start, _, end = Range[len('bytes='):].partition('-')
+        data = self.SAMPLE[int(start):int(end) + 1]
+        return {'Body': io.BytesIO(data), 'ContentRange': f"bytes {start}-{end}/{len(self.SAMPLE)}"}
+
+
+def measure_import(repeats):
+    """Wall time of importing the orchestrator in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(MODULE_PATHS), **BENCHMARK_ENV)
+    code = (
+        "import time; start = time.perf_counter(); import glue_job_orchestrator; "
+        "print(time.perf_counter() - start)"
+    )
+    timings = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True)
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def s3_event(index):
+    prefix = 'customers' if index % 2 else 'sales'
+    return {
+        'source': 'aws.s3',
+        'detail-type': 'Object Created',
+        'detail': {'bucket': {'name': 'raw-bucket'}, 'object': {'key': f"{prefix}/file_{index:06d}.csv"}}
+    }
+
+
+def job_state_event(index, job_name):
+    return {
+        'source': 'aws.glue',
+        'detail-type': 'Glue Job State Change',
+        'detail': {'jobName': job_name, 'jobRunId': f"jr_{index}", 'state': 'SUCCEEDED'}
+    }
+
+
+def measure_handler(orchestrator, make_event, count):
+    """Per-event latency of lambda_handler in microseconds"""
+    timings = []
+    for index in range(count):
+        event = make_event(index)
+        start = time.perf_counter()
+        orchestrator.lambda_handler(event, None)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of sorted values"""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(name, timings, unit):
+    ordered = sorted(timings)
+    p95 = percentile(ordered, 0.95)
+    p99 = percentile(ordered, 0.99)
+    print(f"{name:<24} n={len(ordered):<6} median={statistics.median(ordered):10.1f}{unit} "
+          f"p95={p95:10.1f}{unit} p99={p99:10.1f}{unit}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=2000)
+    parser.add_argument('--import-repeats', type=int, default=10)
+    parser.add_argument('--client-latency-ms', type=float, default=0.0,
+                        help="Simulated round-trip time of each stubbed AWS call")
+    options = parser.parse_args()
+
+    summarize("import", [t * 1000 for t in measure_import(options.import_repeats)], "ms")
+
+    os.environ.update(BENCHMARK_ENV)
+    sys.path[:0] = MODULE_PATHS
+    import glue_job_orchestrator as orchestrator
+    from aws_clients import LazyClient
+    from event_publisher import EventPublisher
+
+    latency = options.client_latency_ms / 1000
+    orchestrator.glue = LazyClient('glue', client=StubGlue(latency))
+    orchestrator.run_scheduler.glue = orchestrator.glue
+    orchestrator.s3 = LazyClient('s3', client=StubS3(latency))
+    orchestrator.events = EventPublisher(StubEvents(latency), 'custom.lambda.orchestrator', flush_on_exit=False)
+
+    customer_job = orchestrator.ROUTING['jobs']['customer-data-etl']
+    sales_job = orchestrator.ROUTING['jobs']['sales-data-etl']
+
+    summarize("s3 object created", measure_handler(orchestrator, s3_event, options.events), "us")
+    summarize(
+        "glue job succeeded",
+        measure_handler(
+            orchestrator,
+            lambda index: job_state_event(index, customer_job if index % 2 else sales_job),
+            options.events
+        ),
+        "us"
+    )
+
+
+if __name__ == '__main__':
+    main()
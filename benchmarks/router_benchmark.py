@@ -0,0 +1,88 @@
+# benchmarks/router_benchmark.py
+"""
+Compare compiled S3 key routing with a linear scan over the same rules
+
+    python benchmarks/router_benchmark.py --feeds 500 --lookups 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda-functions'))
+
+from event_router import EventRouter
+
+
+def generate_rules(feeds):
+    """A prefix rule per feed plus a handful of suffix and glob rules, as in a large onboarding"""
+    rules = [
+        {'name': f"feed_{index}", 'prefix': f"feeds/feed_{index:04d}/", 'jobs': [f"feed-{index:04d}-etl"]}
+        for index in range(feeds)
+    ]
+    rules.extend({'name': f"ext_{ext}", 'suffix': f".{ext}", 'jobs': [f"{ext}-ingest"]} for ext in ('json', 'avro', 'orc'))
+    rules.extend(
+        {'name': f"daily_{index}", 'glob': f"feeds/feed_{index:04d}/daily/*.csv", 'jobs': ['daily-rollup']}
+        for index in range(0, feeds, 10)
+    )
+    rules.append({'name': 'quarantine', 'glob': '*/quarantine/*', 'jobs': ['quarantine-alert']})
+    return rules
+
+
+def generate_keys(feeds, count):
+    keys = []
+    for index in range(count):
+        feed = random.randrange(feeds * 2)
+        folder = random.choice(['daily', 'hourly', 'quarantine'])
+        ext = random.choice(['csv', 'csv', 'csv', 'json', 'parquet'])
+        keys.append(f"feeds/feed_{feed:04d}/{folder}/2024/06/{index:08d}.{ext}")
+    return keys
+
+
+def linear_route(rules, key):
+    """Baseline: check every rule for every key"""
+    routes = {}
+    for rule in rules:
+        if rule.matches(key):
+            for job_name in rule.jobs:
+                routes.setdefault(job_name, rule.arguments)
+    return list(routes.items())
+
+
+def time_lookups(route, keys):
+    start = time.perf_counter()
+    for key in keys:
+        route(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--feeds', type=int, default=500)
+    parser.add_argument('--lookups', type=int, default=100000)
+    options = parser.parse_args()
+
+    random.seed(7)
+    config = {'rules': generate_rules(options.feeds)}
+
+    start = time.perf_counter()
+    router = EventRouter.from_config(config)
+    compile_ms = (time.perf_counter() - start) * 1000
+
+    keys = generate_keys(options.feeds, options.lookups)
+    mismatches = sum(1 for key in keys[:2000] if router.route(key) != linear_route(router.rules, key))
+    if mismatches:
+        raise SystemExit(f"Compiled router disagrees with the linear scan on {mismatches} keys")
+
+    compiled_ns = time_lookups(router.route, keys)
+    linear_ns = time_lookups(lambda key: linear_route(router.rules, key), keys)
+
+    print(f"rules: {len(router.rules)}  compile: {compile_ms:.1f}ms")
+    print(f"compiled router: {compiled_ns:10.0f} ns/lookup")
+    print(f"linear scan:     {linear_ns:10.0f} ns/lookup")
+    print(f"speedup:         {linear_ns / compiled_ns:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
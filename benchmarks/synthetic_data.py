@@ -0,0 +1,91 @@
+# benchmarks/synthetic_data.py
+"""
+Synthetic raw customer and sales CSV in the layouts the ETL jobs read
+
+Scale is set by row counts and file counts. skew is the exponent of a
+Zipf distribution over customer IDs in the sales data: 0 spreads sales
+evenly, around 1 gives a few customers a large share of all sales, the
+case the salted segment join is built for.
+"""
+import itertools
+import os
+import random
+from datetime import date, timedelta
+
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez']
+EMAIL_DOMAINS = ['example.com', 'mail.com', 'inbox.org', 'corp.net']
+CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('Chicago', 'IL'), ('Houston', 'TX'), ('Phoenix', 'AZ'),
+    ('Philadelphia', 'PA'), ('San Antonio', 'TX'), ('San Diego', 'CA'), ('Dallas', 'TX'), ('Seattle', 'WA')
+]
+
+CUSTOMER_HEADER = "customer_id,first_name,last_name,email,phone,age,city,state,registration_date\n"
+SALES_HEADER = "sale_id,customer_id,product_id,product_name,amount,sale_date\n"
+
+
+def _split(rows, files):
+    """Row counts of files that together hold rows"""
+    files = max(1, min(files, rows or 1))
+    return [rows // files + (1 if index < rows % files else 0) for index in range(files)]
+
+
+def customer_weights(customers, skew):
+    """Cumulative Zipf weights over customer IDs 1..customers"""
+    return list(itertools.accumulate(1.0 / (rank ** skew) for rank in range(1, customers + 1)))
+
+
+def generate_customers(path, customers, files=4, start=date(2020, 1, 1), days=1460, first_customer_id=1,
+                       bad_rate=0.0, seed=0, prefix="customers"):
+    """Write customers CSV files under path; returns the file paths"""
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    paths = []
+    customer_id = first_customer_id - 1
+
+    for file_index, rows in enumerate(_split(customers, files)):
+        file_path = os.path.join(path, f"{prefix}_{file_index:04d}.csv")
+        with open(file_path, 'w') as f:
+            f.write(CUSTOMER_HEADER)
+            for _ in range(rows):
+                customer_id += 1
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                city, state = rng.choice(CITIES)
+                age = 'unknown' if rng.random() < bad_rate else rng.randint(18, 85)
+                f.write(
+                    f"{customer_id},{first},{last},{first.lower()}.{last.lower()}{customer_id}@"
+                    f"{rng.choice(EMAIL_DOMAINS)},555-{rng.randint(1000000, 9999999)},{age},{city},{state},"
+                    f"{start + timedelta(days=rng.randint(0, days))}\n"
+                )
+        paths.append(file_path)
+
+    return paths
+
+
+def generate_sales(path, rows, customers, files=8, skew=0.0, start=date(2023, 1, 1), days=730,
+                   first_sale_id=1, bad_rate=0.0, seed=0, prefix="sales"):
+    """Write sales CSV files under path with Zipf-skewed customer IDs; returns the file paths"""
+    rng = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+    population = range(1, customers + 1)
+    cum_weights = customer_weights(customers, skew) if skew else None
+    paths = []
+    sale_id = first_sale_id
+
+    for file_index, file_rows in enumerate(_split(rows, files)):
+        file_path = os.path.join(path, f"{prefix}_{file_index:04d}.csv")
+        customer_ids = rng.choices(population, cum_weights=cum_weights, k=file_rows)
+        with open(file_path, 'w') as f:
+            f.write(SALES_HEADER)
+            for customer_id in customer_ids:
+                product = rng.randint(100, 199)
+                # Mostly small orders with a long tail, so every amount category is populated
+                amount = 'n/a' if rng.random() < bad_rate else f"{min(rng.lognormvariate(4.5, 1.2), 20000):.2f}"
+                f.write(
+                    f"{sale_id},{customer_id},{product},Product {product},{amount},"
+                    f"{start + timedelta(days=rng.randint(0, days - 1))}\n"
+                )
+                sale_id += 1
+        paths.append(file_path)
+
+    return paths
@@ -0,0 +1,71 @@
+# glue-scripts/action_scheduler.py
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+# Local properties a driver thread passes on to the actions it submits
+INHERITED_PROPERTIES = ("spark.jobGroup.id", "spark.job.description", "spark.job.interruptOnCancel")
+
+
+class ActionScheduler:
+    """
+    Run independent Spark actions of a job at the same time
+
+    Each submitted action runs in a driver thread under a FAIR scheduler
+    pool of its own, so concurrent writes share the executors instead of
+    each waiting for the previous one to finish; with
+    spark.scheduler.mode=FAIR unset, Spark still runs them concurrently
+    in FIFO order. The actions inherit the submitting thread's job group,
+    so stage metrics still attribute their Spark jobs. run_all() waits
+    for every action; on the first failure it cancels the job group's
+    remaining work and raises that failure. max_workers=1 runs the
+    actions one after another in submission order.
+    """
+
+    def __init__(self, spark_context, max_workers=4):
+        self.sc = spark_context
+        self.max_workers = max(1, max_workers)
+        self._actions = []
+
+    def submit(self, name, action, *args, **kwargs):
+        """Add an action; it starts when run_all() is called"""
+        self._actions.append((name, action, args, kwargs))
+
+    def _run(self, name, action, args, kwargs, properties):
+        for key, value in properties.items():
+            self.sc.setLocalProperty(key, value)
+        self.sc.setLocalProperty("spark.scheduler.pool", name)
+        try:
+            return action(*args, **kwargs)
+        finally:
+            for key in list(properties) + ["spark.scheduler.pool"]:
+                self.sc.setLocalProperty(key, None)
+
+    def run_all(self):
+        """Run the submitted actions and return their results by name"""
+        actions, self._actions = self._actions, []
+        if not actions:
+            return {}
+
+        if self.max_workers == 1 or len(actions) == 1:
+            return {name: action(*args, **kwargs) for name, action, args, kwargs in actions}
+
+        properties = {key: self.sc.getLocalProperty(key) for key in INHERITED_PROPERTIES}
+        properties = {key: value for key, value in properties.items() if value is not None}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(actions))) as executor:
+            futures = {
+                executor.submit(self._run, name, action, args, kwargs, properties): name
+                for name, action, args, kwargs in actions
+            }
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+
+            failed = [future for future in done if future.exception() is not None]
+            if failed:
+                print(f"Action {futures[failed[0]]} failed, cancelling the remaining actions")
+                for future in pending:
+                    future.cancel()
+                if properties.get("spark.jobGroup.id"):
+                    self.sc.cancelJobGroup(properties["spark.jobGroup.id"])
+                wait(futures)
+                raise failed[0].exception()
+
+        return {name: future.result() for future, name in futures.items()}
@@ -0,0 +1,119 @@
+# glue-scripts/catalog_sink.py
+import copy
+
+BATCH_CREATE_PARTITION_LIMIT = 100
+
+
+class CatalogParquetSink:
+    """
+    Partitioned parquet output that is written once and registered in the Data Catalog
+
+    Replaces writing a frame to S3 and then writing it again through
+    write_dynamic_frame.from_catalog: the table is created from the frame's
+    schema when missing, and each Spark write registers its partitions from
+    the written partition values. The Spark writer also applies the
+    records-per-file cap from file sizing, which the Glue sink cannot.
+    """
+
+    def __init__(self, glue_context, glue_client, database, table_name, path, partition_keys, row_group_bytes=None):
+        self.glue_context = glue_context
+        self.glue = glue_client
+        self.database = database
+        self.table_name = table_name
+        self.path = path if path.endswith('/') else f"{path}/"
+        self.partition_keys = partition_keys
+        self.row_group_bytes = row_group_bytes
+
+    def ensure_table(self, df):
+        """Create the catalog table from df's schema if it does not exist yet"""
+        try:
+            self.glue.get_table(DatabaseName=self.database, Name=self.table_name)
+            return False
+        except self.glue.exceptions.EntityNotFoundException:
+            pass
+
+        fields = {field.name: field.dataType.simpleString() for field in df.schema.fields}
+        self.glue.create_table(
+            DatabaseName=self.database,
+            TableInput={
+                'Name': self.table_name,
+                'TableType': 'EXTERNAL_TABLE',
+                'Parameters': {'classification': 'parquet'},
+                'PartitionKeys': [{'Name': key, 'Type': fields[key]} for key in self.partition_keys],
+                'StorageDescriptor': {
+                    'Columns': [
+                        {'Name': name, 'Type': data_type}
+                        for name, data_type in fields.items() if name not in self.partition_keys
+                    ],
+                    'Location': self.path,
+                    'InputFormat': 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat',
+                    'OutputFormat': 'org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat',
+                    'SerdeInfo': {
+                        'SerializationLibrary': 'org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe'
+                    }
+                }
+            }
+        )
+        print(f"Created catalog table {self.database}.{self.table_name}")
+        return True
+
+    def _write_partitions(self, df, mode, partitions, max_records_per_file):
+        if partitions is None:
+            partitions = [
+                tuple(row) for row in df.select(*self.partition_keys).distinct().collect()
+            ]
+
+        writer = df.write \
+            .mode(mode) \
+            .option("partitionOverwriteMode", "dynamic") \
+            .option("maxRecordsPerFile", max_records_per_file)
+        if self.row_group_bytes:
+            writer = writer.option("parquet.block.size", self.row_group_bytes)
+
+        writer.partitionBy(*self.partition_keys).parquet(self.path)
+
+        self.register_partitions(partitions)
+        return partitions
+
+    def overwrite_partitions(self, df, partitions=None, max_records_per_file=0):
+        """Replace the partitions present in df and register any the catalog does not know"""
+        return self._write_partitions(df, "overwrite", partitions, max_records_per_file)
+
+    def append_partitions(self, df, partitions=None, max_records_per_file=0):
+        """Add df's rows to their partitions and register any the catalog does not know"""
+        return self._write_partitions(df, "append", partitions, max_records_per_file)
+
+    def register_partitions(self, partitions):
+        """Create catalog partitions for the given partition value tuples"""
+        if not partitions:
+            return
+
+        try:
+            table = self.glue.get_table(DatabaseName=self.database, Name=self.table_name)['Table']
+        except self.glue.exceptions.EntityNotFoundException:
+            print(f"Catalog table {self.database}.{self.table_name} not found, skipping partition registration")
+            return
+
+        partition_inputs = []
+        for values in partitions:
+            storage_descriptor = copy.deepcopy(table['StorageDescriptor'])
+            storage_descriptor['Location'] = self.path + '/'.join(
+                f"{key}={value}" for key, value in zip(self.partition_keys, values)
+            ) + '/'
+            partition_inputs.append({
+                'Values': [str(value) for value in values],
+                'StorageDescriptor': storage_descriptor
+            })
+
+        for start in range(0, len(partition_inputs), BATCH_CREATE_PARTITION_LIMIT):
+            response = self.glue.batch_create_partition(
+                DatabaseName=self.database,
+                TableName=self.table_name,
+                PartitionInputList=partition_inputs[start:start + BATCH_CREATE_PARTITION_LIMIT]
+            )
+            # Partitions that already exist keep pointing at the rewritten location
+            for error in response.get('Errors', []):
+                if error['ErrorDetail'].get('ErrorCode') != 'AlreadyExistsException':
+                    print(f"Failed to register partition {error['PartitionValues']}: {error['ErrorDetail']}")
+
+        print(f"Registered {len(partition_inputs)} partitions for {self.database}.{self.table_name}")
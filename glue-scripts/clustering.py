@@ -0,0 +1,91 @@
+# glue-scripts/clustering.py
+from functools import reduce
+from pyspark.sql import functions as F
+
+ZORDER_COLUMN = "_zorder"
+ZORDER_BITS = 6
+DEFAULT_ROW_GROUP_BYTES = 32 * 1024 * 1024
+
+
+def parse_keys(value):
+    """Split a comma separated job argument into column names"""
+    return [key.strip() for key in (value or '').split(',') if key.strip()]
+
+
+def range_boundaries(df, column, levels, sample_rows=100000, total_rows=None):
+    """Pick up to levels - 1 ordered split points for column from a sample of df"""
+    fraction = 1.0
+    if total_rows:
+        fraction = min(1.0, sample_rows / float(total_rows))
+
+    values = [
+        row[column] for row in df.select(column)
+        .sample(withReplacement=False, fraction=fraction, seed=17)
+        .filter(F.col(column).isNotNull())
+        .distinct()
+        .orderBy(column)
+        .collect()
+    ]
+    if len(values) < levels:
+        return values[:-1]
+
+    step = len(values) / float(levels)
+    return [values[int(step * i)] for i in range(1, levels)]
+
+
+def range_index(column, boundaries):
+    """Order-preserving bucket index of column: how many boundaries it exceeds"""
+    if not boundaries:
+        return F.lit(0)
+    return reduce(
+        lambda total, comparison: total + comparison,
+        [F.when(F.col(column) > F.lit(boundary), 1).otherwise(0) for boundary in boundaries]
+    )
+
+
+def interleave_bits(x, y, bits=ZORDER_BITS):
+    """Z-order value of two small non-negative integer columns"""
+    terms = []
+    for bit in range(bits):
+        terms.append(F.shiftLeft(F.shiftRight(x, bit).bitwiseAND(1), 2 * bit))
+        terms.append(F.shiftLeft(F.shiftRight(y, bit).bitwiseAND(1), 2 * bit + 1))
+    return reduce(lambda total, term: total + term, terms)
+
+
+def cluster_within_partitions(df, partition_keys, sort_keys, zorder_keys=None, sample_df=None, total_rows=None):
+    """
+    Order rows inside each task so parquet min/max statistics become selective
+
+    Rows are sorted by the output partition keys first, which the writer
+    needs anyway, then by the Z-order of two keys when given, then by the
+    sort keys. sample_df (normally the cached source of df) is used to
+    choose the Z-order ranges.
+    """
+    zorder_keys = zorder_keys or []
+    if not sort_keys and not zorder_keys:
+        return df
+
+    order_columns = list(partition_keys)
+
+    if zorder_keys:
+        if len(zorder_keys) != 2:
+            raise ValueError(f"Z-ordering needs exactly two keys, got {zorder_keys}")
+
+        levels = 2 ** ZORDER_BITS
+        source_df = sample_df if sample_df is not None else df
+        x_bounds = range_boundaries(source_df, zorder_keys[0], levels, total_rows=total_rows)
+        y_bounds = range_boundaries(source_df, zorder_keys[1], levels, total_rows=total_rows)
+
+        df = df.withColumn(
+            ZORDER_COLUMN,
+            interleave_bits(range_index(zorder_keys[0], x_bounds), range_index(zorder_keys[1], y_bounds))
+        )
+        order_columns.append(ZORDER_COLUMN)
+
+    order_columns.extend(key for key in sort_keys if key not in order_columns)
+    print(f"Clustering output within partitions by {order_columns}")
+
+    clustered_df = df.sortWithinPartitions(*order_columns)
+    if zorder_keys:
+        clustered_df = clustered_df.drop(ZORDER_COLUMN)
+    return clustered_df
@@ -0,0 +1,125 @@
+# glue-scripts/compact_partitions.py
+import sys
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+from awsglue.context import GlueContext
+from awsglue.job import Job
+import boto3
+from datetime import datetime
+from file_sizing import files_for_bytes
+from job_options import get_optional_args
+from source_listing import list_objects
+
+# Get job parameters
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'processed_data_bucket'
+])
+
+args.update(get_optional_args(sys.argv, {
+    'datasets': 'customers,sales',
+    'target_file_size_mb': '128',
+    'small_file_size_mb': '32',
+    'min_small_files': '2'
+}))
+
+# Initialize contexts
+sc = SparkContext()
+glueContext = GlueContext(sc)
+spark = glueContext.spark_session
+job = Job(glueContext)
+job.init(args['JOB_NAME'], args)
+
+s3 = boto3.client('s3')
+
+DELETE_OBJECTS_LIMIT = 1000
+
+
+def group_small_files(objects, small_file_bytes):
+    """Group the small parquet files of a dataset by partition directory"""
+    partitions = {}
+    for obj in objects:
+        file_name = obj['key'].rsplit('/', 1)[-1]
+        if file_name.startswith(('_', '.')) or obj['size'] >= small_file_bytes:
+            continue
+        partition_dir = obj['key'].rsplit('/', 1)[0]
+        partitions.setdefault(partition_dir, []).append(obj)
+    return partitions
+
+
+def compact_partition(bucket, partition_dir, small_files, target_file_bytes, run_id):
+    """Merge the small files of one partition into target-sized files"""
+    total_bytes = sum(obj['size'] for obj in small_files)
+    file_count = files_for_bytes(total_bytes, target_file_bytes)
+    staging_prefix = f"_compaction_staging/{run_id}/{partition_dir}/"
+
+    # Files inside a partition directory carry no partition columns, and
+    # reading them by path keeps it that way for the rewritten files
+    spark.read \
+        .option("mergeSchema", "true") \
+        .parquet(*[f"s3://{bucket}/{obj['key']}" for obj in small_files]) \
+        .coalesce(file_count) \
+        .write \
+        .mode("overwrite") \
+        .parquet(f"s3://{bucket}/{staging_prefix}")
+
+    # Publish the compacted files before removing the originals so readers
+    # never see the partition empty
+    staged_files = [
+        obj for obj in list_objects(s3, bucket, staging_prefix)
+        if obj['key'].endswith('.parquet')
+    ]
+    for index, obj in enumerate(staged_files):
+        s3.copy_object(
+            Bucket=bucket,
+            Key=f"{partition_dir}/compacted-{run_id}-{index:05d}.parquet",
+            CopySource={'Bucket': bucket, 'Key': obj['key']}
+        )
+
+    delete_keys(bucket, [obj['key'] for obj in small_files])
+    delete_keys(bucket, [obj['key'] for obj in list_objects(s3, bucket, staging_prefix)])
+
+    return file_count
+
+
+def delete_keys(bucket, keys):
+    """Delete objects in batches of the S3 DeleteObjects limit"""
+    for start in range(0, len(keys), DELETE_OBJECTS_LIMIT):
+        s3.delete_objects(
+            Bucket=bucket,
+            Delete={'Objects': [{'Key': key} for key in keys[start:start + DELETE_OBJECTS_LIMIT]], 'Quiet': True}
+        )
+
+
+try:
+    print("Starting partition compaction job...")
+
+    bucket = args['processed_data_bucket']
+    target_file_bytes = int(float(args['target_file_size_mb']) * 1024 * 1024)
+    small_file_bytes = int(float(args['small_file_size_mb']) * 1024 * 1024)
+    min_small_files = int(args['min_small_files'])
+    run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+
+    for dataset in [name.strip() for name in args['datasets'].split(',') if name.strip()]:
+        objects = list_objects(s3, bucket, f"{dataset}/")
+        partitions = group_small_files(objects, small_file_bytes)
+
+        compacted = 0
+        for partition_dir, small_files in sorted(partitions.items()):
+            if len(small_files) < min_small_files:
+                continue
+
+            file_count = compact_partition(bucket, partition_dir, small_files, target_file_bytes, run_id)
+            compacted += 1
+            print(f"Compacted {len(small_files)} files in {partition_dir} into {file_count}")
+
+        print(f"Dataset {dataset}: compacted {compacted} of {len(partitions)} partitions with small files")
+
+    print("Partition compaction job completed successfully")
+
+except Exception as e:
+    print(f"Error in partition compaction job: {str(e)}")
+    raise e
+
+finally:
+    job.commit()
@@ -10,94 +10,71 @@ from pyspark.sql import functions as F
 from pyspark.sql.types import *
 import boto3
 from datetime import datetime
+from data_profiler import customer_quality_metrics
+from materialization import MaterializationPlanner
+from schema_registry import CUSTOMER_RAW_SCHEMA, read_typed_csv, source_read_options
+from source_listing import SourceWatermark, object_paths, resolve_source_objects
+from catalog_sink import CatalogParquetSink
+from file_sizing import size_output_files
+from clustering import cluster_within_partitions, parse_keys
+from incremental_state import collect_partitions
+from rollups import CUSTOMER_ROLLUPS, build_rollups, latest_customers, write_rollup
+from job_options import as_bool, get_optional_args
+from job_stages import StageMetrics
+from event_publisher import EventPublisher
 
-# Get job parameters
-args = getResolvedOptions(sys.argv, [
+# Required job parameters
+JOB_ARGS = [
     'JOB_NAME',
     'raw_data_bucket',
     'processed_data_bucket',
     'database_name'
-])
+]
 
-# Initialize Spark and Glue contexts
-sc = SparkContext()
-glueContext = GlueContext(sc)
-spark = glueContext.spark_session
-job = Job(glueContext)
-job.init(args['JOB_NAME'], args)
+# Optional tuning parameters
+OPTIONAL_ARGS = {
+    'target_file_size_mb': '128',
+    'cluster_sort_keys': '',
+    'cluster_zorder_keys': '',
+    'parquet_row_group_mb': '32',
+    'source_bucket': '',
+    'source_key': '',
+    'source_keys': '',
+    'manifest_path': '',
+    'source_delimiter': '',
+    'source_quote': '',
+    'source_encoding': '',
+    'build_rollups': 'true'
+}
 
-# Initialize EventBridge client for custom events
-eventbridge = boto3.client('events')
-
-def send_custom_event(event_type, details):
-    """Send custom event to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.glue.etl',
-                    'DetailType': event_type,
-                    'Detail': json.dumps(details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send event: {str(e)}")
+CUSTOMER_MAPPINGS = [
+    ("customer_id", "string", "customer_id", "string"),
+    ("full_name", "string", "full_name", "string"),
+    ("email", "string", "email", "string"),
+    ("email_domain", "string", "email_domain", "string"),
+    ("phone", "string", "phone", "string"),
+    ("age", "int", "age", "int"),
+    ("age_group", "string", "age_group", "string"),
+    ("city", "string", "city", "string"),
+    ("state", "string", "state", "string"),
+    ("registration_year", "int", "registration_year", "int"),
+    ("processed_timestamp", "timestamp", "processed_timestamp", "timestamp"),
+    ("data_source", "string", "data_source", "string"),
+    ("etl_job_name", "string", "etl_job_name", "string")
+]
 
 def validate_data_quality(df, job_name):
     """Validate data quality and return metrics"""
-    total_records = df.count()
-    null_records = df.filter(F.col("customer_id").isNull()).count()
-    duplicate_records = df.count() - df.dropDuplicates(["customer_id"]).count()
-    
-    quality_metrics = {
-        'job_name': job_name,
-        'total_records': total_records,
-        'null_records': null_records,
-        'duplicate_records': duplicate_records,
-        'null_percentage': (null_records / total_records) * 100 if total_records > 0 else 0,
-        'duplicate_percentage': (duplicate_records / total_records) * 100 if total_records > 0 else 0
-    }
-    
-    return quality_metrics
-
-try:
-    print("Starting Customer Data ETL Job...")
-    
-    # Read raw customer data from S3
-    customer_data_path = f"s3://{args['raw_data_bucket']}/customers/"
-    
-    # Create dynamic frame from S3
-    customer_dynamic_frame = glueContext.create_dynamic_frame.from_options(
-        format_options={"quoteChar": "\"", "withHeader": True, "separator": ","},
-        connection_type="s3",
-        format="csv",
-        connection_options={
-            "paths": [customer_data_path],
-            "recurse": True
-        },
-        transformation_ctx="customer_dynamic_frame"
-    )
-    
-    print(f"Raw records count: {customer_dynamic_frame.count()}")
-    
-    # Convert to Spark DataFrame for complex transformations
-    customer_df = customer_dynamic_frame.toDF()
-    
-    # Data validation and quality checks
-    quality_metrics = validate_data_quality(customer_df, args['JOB_NAME'])
-    print(f"Data Quality Metrics: {quality_metrics}")
-    
-    # Send quality metrics event
-    send_custom_event("Data Quality Check", quality_metrics)
-    
-    # Data transformations
+    return customer_quality_metrics(df, job_name)
+
+def transform_customers(customer_df, job_name, source_path):
+    """Clean raw customers and derive the reporting columns"""
     customer_transformed_df = customer_df \
         .filter(F.col("customer_id").isNotNull()) \
         .dropDuplicates(["customer_id"]) \
         .withColumn("full_name", F.concat_ws(" ", F.col("first_name"), F.col("last_name"))) \
         .withColumn("email_domain", F.regexp_extract(F.col("email"), "@(.+)", 1)) \
-        .withColumn("age_group", 
+        .withColumn("age_group",
                    F.when(F.col("age") < 25, "Young")
                     .when(F.col("age") < 45, "Adult")
                     .when(F.col("age") < 65, "Middle-aged")
@@ -105,96 +82,207 @@ try:
         .withColumn("registration_year", F.year(F.col("registration_date"))) \
         .withColumn("processed_timestamp", F.current_timestamp()) \
         .withColumn("data_source", F.lit("customer_system")) \
-        .withColumn("etl_job_name", F.lit(args['JOB_NAME']))
-    
+        .withColumn("etl_job_name", F.lit(job_name))
+
     # Add data lineage information
-    customer_transformed_df = customer_transformed_df.withColumn(
-        "data_lineage", 
+    return customer_transformed_df.withColumn(
+        "data_lineage",
         F.struct(
             F.lit("customer_data_etl").alias("job_name"),
             F.current_timestamp().alias("processed_at"),
-            F.lit(customer_data_path).alias("source_path")
+            F.lit(source_path).alias("source_path")
         )
     )
-    
-    print(f"Transformed records count: {customer_transformed_df.count()}")
-    
-    # Convert back to Dynamic Frame
-    customer_transformed_dynamic_frame = DynamicFrame.fromDF(
-        customer_transformed_df, 
-        glueContext, 
-        "customer_transformed_dynamic_frame"
-    )
-    
-    # Apply additional Glue transformations
-    customer_final_dynamic_frame = ApplyMapping.apply(
-        frame=customer_transformed_dynamic_frame,
-        mappings=[
-            ("customer_id", "string", "customer_id", "string"),
-            ("full_name", "string", "full_name", "string"),
-            ("email", "string", "email", "string"),
-            ("email_domain", "string", "email_domain", "string"),
-            ("phone", "string", "phone", "string"),
-            ("age", "int", "age", "int"),
-            ("age_group", "string", "age_group", "string"),
-            ("city", "string", "city", "string"),
-            ("state", "string", "state", "string"),
-            ("registration_year", "int", "registration_year", "int"),
-            ("processed_timestamp", "timestamp", "processed_timestamp", "timestamp"),
-            ("data_source", "string", "data_source", "string"),
-            ("etl_job_name", "string", "etl_job_name", "string")
-        ]
-    )
-    
-    # Write to S3 in Parquet format partitioned by registration_year
-    output_path = f"s3://{args['processed_data_bucket']}/customers/"
-    
-    glueContext.write_dynamic_frame.from_options(
-        frame=customer_final_dynamic_frame,
-        connection_type="s3",
-        connection_options={
-            "path": output_path,
-            "partitionKeys": ["registration_year"]
-        },
-        format="glueparquet",
-        transformation_ctx="write_customer_data"
-    )
-    
-    # Update Glue Data Catalog
-    glueContext.write_dynamic_frame.from_catalog(
-        frame=customer_final_dynamic_frame,
-        database=args['database_name'],
-        table_name="processed_customers",
-        transformation_ctx="catalog_write_customer_data"
-    )
-    
-    # Send success event
-    success_details = {
-        'job_name': args['JOB_NAME'],
-        'status': 'SUCCESS',
-        'records_processed': customer_transformed_df.count(),
-        'output_path': output_path,
-        'completion_time': datetime.now().isoformat()
-    }
-    
-    send_custom_event("ETL Job Completed", success_details)
-    
-    print(f"Customer ETL job completed successfully. Records processed: {customer_transformed_df.count()}")
-    
-except Exception as e:
-    print(f"Error in Customer ETL job: {str(e)}")
-    
-    # Send failure event
-    failure_details = {
-        'job_name': args['JOB_NAME'],
-        'status': 'FAILED',
-        'error_message': str(e),
-        'failure_time': datetime.now().isoformat()
-    }
-    
-    send_custom_event("ETL Job Failed", failure_details)
-    
-    raise e
-
-finally:
-    job.commit()
\ No newline at end of file
+
+def run_customer_etl(args, glueContext, job, s3, glue, events, stages=None):
+    """
+    Run the customer ETL with the given contexts and clients
+
+    Each step of the job runs as a stage of stages, a StageMetrics; the
+    per-stage breakdown goes into the completion and failure events.
+    Returns the details of the completion event.
+    """
+    spark = glueContext.spark_session
+    stages = stages or StageMetrics(spark.sparkContext, args['JOB_NAME'])
+
+    # Tracks persisted DataFrames so repeated actions reuse one computation
+    materialization = MaterializationPlanner()
+
+    try:
+        print("Starting Customer Data ETL Job...")
+
+        # Read raw customer data from S3
+        customer_data_path = f"s3://{args['raw_data_bucket']}/customers/"
+
+        with stages.stage("read_source"):
+            # Read the objects named by the run manifest, or files newer than the last successful run
+            source_watermark = SourceWatermark(s3, args['processed_data_bucket'], "_watermarks/customers")
+            source_bucket, new_objects = resolve_source_objects(s3, args, "customers/", source_watermark.read())
+            print(f"New customer files: {len(new_objects)}")
+
+            # Parse against the pinned raw schema; malformed rows go to the bad records sink
+            customer_df, bad_records = read_typed_csv(
+                spark,
+                object_paths(source_bucket, new_objects),
+                CUSTOMER_RAW_SCHEMA,
+                materialization,
+                "customer_raw",
+                bad_records_path=f"s3://{args['processed_data_bucket']}/_bad_records/customers/",
+                read_options=source_read_options(args)
+            )
+
+        with stages.stage("quality_metrics") as quality_stage:
+            # Data validation and quality checks (single aggregation pass)
+            quality_metrics = validate_data_quality(customer_df, args['JOB_NAME'])
+            quality_stage['rows'] = quality_metrics['total_records']
+        print(f"Raw records count: {quality_metrics['total_records']}")
+        quality_metrics['bad_records'] = bad_records
+        print(f"Data Quality Metrics: {quality_metrics}")
+
+        # Send quality metrics event
+        events.publish("Data Quality Check", quality_metrics)
+
+        with stages.stage("transform") as transform_stage:
+            customer_transformed_df = transform_customers(customer_df, args['JOB_NAME'], customer_data_path)
+
+            # Persist once; the write, catalog update and counts below reuse the cache
+            customer_transformed_df = materialization.materialize("customer_transformed", customer_transformed_df)
+            records_processed = materialization.row_count("customer_transformed")
+            materialization.release("customer_raw")
+            transform_stage['rows'] = records_processed
+
+        print(f"Transformed records count: {records_processed}")
+
+        with stages.stage("layout"):
+            # Size output files per registration_year partition
+            customer_output_df, max_records_per_file = size_output_files(
+                customer_transformed_df,
+                ["registration_year"],
+                records_processed,
+                target_file_bytes=int(float(args['target_file_size_mb']) * 1024 * 1024)
+            )
+
+            # Sort within files on the query keys so row-group statistics can skip data
+            customer_output_df = cluster_within_partitions(
+                customer_output_df,
+                ["registration_year"],
+                parse_keys(args['cluster_sort_keys']),
+                zorder_keys=parse_keys(args['cluster_zorder_keys']),
+                sample_df=customer_transformed_df,
+                total_rows=records_processed
+            )
+
+        with stages.stage("write") as write_stage:
+            # Convert back to Dynamic Frame
+            customer_transformed_dynamic_frame = DynamicFrame.fromDF(
+                customer_output_df,
+                glueContext,
+                "customer_transformed_dynamic_frame"
+            )
+
+            # Apply additional Glue transformations
+            customer_final_dynamic_frame = ApplyMapping.apply(
+                frame=customer_transformed_dynamic_frame,
+                mappings=CUSTOMER_MAPPINGS
+            )
+
+            # Write to S3 in Parquet format partitioned by registration_year with the
+            # Spark writer, which caps the records per file, and register the partitions
+            output_path = f"s3://{args['processed_data_bucket']}/customers/"
+
+            customer_sink = CatalogParquetSink(
+                glueContext,
+                glue,
+                args['database_name'],
+                "processed_customers",
+                output_path,
+                ["registration_year"],
+                row_group_bytes=int(float(args['parquet_row_group_mb']) * 1024 * 1024)
+            )
+            customer_final_df = customer_final_dynamic_frame.toDF()
+            customer_sink.ensure_table(customer_final_df)
+            customer_partitions = collect_partitions(customer_transformed_df, ["registration_year"])
+            customer_sink.append_partitions(
+                customer_final_df,
+                partitions=customer_partitions,
+                max_records_per_file=max_records_per_file
+            )
+            write_stage['rows'] = records_processed
+
+        if as_bool(args['build_rollups']):
+            with stages.stage("rollups") as rollups_stage:
+                # Recount the registration years this run added customers to, over
+                # every customer written so far in those years
+                customers_df = latest_customers(
+                    spark, output_path, registration_years=[values[0] for values in customer_partitions]
+                )
+                rollup_frames = build_rollups(customers_df, CUSTOMER_ROLLUPS, materialization)
+
+                for rollup in CUSTOMER_ROLLUPS:
+                    rollup_sink = CatalogParquetSink(
+                        glueContext,
+                        glue,
+                        args['database_name'],
+                        rollup['name'],
+                        f"s3://{args['processed_data_bucket']}/rollups/{rollup['name']}/",
+                        rollup['partition_keys']
+                    )
+                    write_rollup(rollup_sink, rollup_frames[rollup['name']], customer_partitions)
+                rollups_stage['rows'] = len(customer_partitions)
+
+        # Send success event
+        success_details = {
+            'job_name': args['JOB_NAME'],
+            'status': 'SUCCESS',
+            'records_processed': records_processed,
+            'output_path': output_path,
+            'completion_time': datetime.now().isoformat(),
+            'stage_metrics': stages.summary()
+        }
+
+        events.publish("ETL Job Completed", success_details)
+
+        source_watermark.advance(new_objects)
+
+        print(f"Customer ETL job completed successfully. Records processed: {records_processed}")
+        return success_details
+
+    except Exception as e:
+        print(f"Error in Customer ETL job: {str(e)}")
+
+        # Send failure event
+        failure_details = {
+            'job_name': args['JOB_NAME'],
+            'status': 'FAILED',
+            'error_message': str(e),
+            'failure_time': datetime.now().isoformat(),
+            'stage_metrics': stages.summary()
+        }
+
+        events.publish("ETL Job Failed", failure_details)
+
+        raise e
+
+    finally:
+        materialization.release_all()
+        events.flush()
+        job.commit()
+
+def main():
+    """Glue entry point: resolve the job arguments, build the contexts and clients, run"""
+    args = getResolvedOptions(sys.argv, JOB_ARGS)
+    args.update(get_optional_args(sys.argv, OPTIONAL_ARGS))
+
+    # Initialize Spark and Glue contexts
+    sc = SparkContext()
+    glueContext = GlueContext(sc)
+    job = Job(glueContext)
+    job.init(args['JOB_NAME'], args)
+
+    # Initialize EventBridge client for custom events; events are sent in batches
+    events = EventPublisher(boto3.client('events'), 'custom.glue.etl')
+
+    run_customer_etl(args, glueContext, job, boto3.client('s3'), boto3.client('glue'), events)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# glue-scripts/data_profiler.py
+from pyspark.sql import functions as F
+
+
+def _percentage(part, total):
+    """Return part as a percentage of total, 0 for empty inputs"""
+    return (part / total) * 100 if total > 0 else 0
+
+
+def profile_dataframe(df, null_columns=None, invalid_conditions=None, key_column=None, approx_distinct=False, rsd=0.05):
+    """
+    Profile a DataFrame in a single aggregation pass
+
+    Computes the total row count, per-column null counts, invalid-value counts
+    for each named condition and the distinct count of key_column with one
+    df.agg() action instead of a separate count() per metric.
+    """
+    null_columns = null_columns or []
+    invalid_conditions = invalid_conditions or {}
+
+    aggregations = [F.count(F.lit(1)).alias("total_records")]
+
+    for column in null_columns:
+        aggregations.append(
+            F.sum(F.when(F.col(column).isNull(), 1).otherwise(0)).alias(f"null__{column}")
+        )
+
+    for name, condition in invalid_conditions.items():
+        aggregations.append(
+            F.sum(F.when(condition, 1).otherwise(0)).alias(f"invalid__{name}")
+        )
+
+    if key_column:
+        if approx_distinct:
+            distinct_expr = F.approx_count_distinct(F.col(key_column), rsd=rsd)
+        else:
+            distinct_expr = F.countDistinct(F.col(key_column))
+        aggregations.append(distinct_expr.alias("distinct_keys"))
+        if key_column not in null_columns:
+            aggregations.append(
+                F.sum(F.when(F.col(key_column).isNull(), 1).otherwise(0)).alias(f"null__{key_column}")
+            )
+
+    row = df.agg(*aggregations).collect()[0].asDict()
+
+    profile = {
+        'total_records': row['total_records'],
+        'null_counts': {column: row[f"null__{column}"] or 0 for column in null_columns},
+        'invalid_counts': {name: row[f"invalid__{name}"] or 0 for name in invalid_conditions}
+    }
+
+    if key_column:
+        # dropDuplicates([key_column]) keeps one row for the null key, countDistinct ignores it
+        key_nulls = row[f"null__{key_column}"] or 0
+        distinct_keys = row['distinct_keys'] + (1 if key_nulls > 0 else 0)
+        profile['distinct_keys'] = distinct_keys
+        profile['duplicate_records'] = max(profile['total_records'] - distinct_keys, 0)
+
+    return profile
+
+
+def customer_quality_metrics(df, job_name, approx_distinct=False):
+    """Build the customer ETL quality_metrics payload from a single profiling pass"""
+    profile = profile_dataframe(
+        df,
+        null_columns=["customer_id"],
+        key_column="customer_id",
+        approx_distinct=approx_distinct
+    )
+
+    total_records = profile['total_records']
+    null_records = profile['null_counts']['customer_id']
+    duplicate_records = profile['duplicate_records']
+
+    return {
+        'job_name': job_name,
+        'total_records': total_records,
+        'null_records': null_records,
+        'duplicate_records': duplicate_records,
+        'null_percentage': _percentage(null_records, total_records),
+        'duplicate_percentage': _percentage(duplicate_records, total_records)
+    }
+
+
+def sales_quality_metrics(df):
+    """Build the sales ETL data_quality payload from a single profiling pass"""
+    profile = profile_dataframe(
+        df,
+        null_columns=["customer_id"],
+        invalid_conditions={"amount": F.col("amount") <= 0}
+    )
+
+    total_records = profile['total_records']
+    null_customer_ids = profile['null_counts']['customer_id']
+    invalid_amounts = profile['invalid_counts']['amount']
+
+    return {
+        'total_records': total_records,
+        'null_customer_ids': null_customer_ids,
+        'invalid_amounts': invalid_amounts,
+        'valid_records_percentage': _percentage(total_records - null_customer_ids - invalid_amounts, total_records)
+    }
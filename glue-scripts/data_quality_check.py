@@ -1,247 +1,125 @@
-# lambda-functions/glue_job_orchestrator.py
-import json
+# glue-scripts/data_quality_check.py
+import sys
+from awsglue.utils import getResolvedOptions
+from pyspark.context import SparkContext
+from awsglue.context import GlueContext
+from awsglue.job import Job
+from pyspark.sql.utils import AnalysisException
 import boto3
-import os
+import json
 from datetime import datetime
+from job_options import get_optional_args
+from quality_rules import CUSTOMER_RULES, SALES_RULES, evaluate_rules
+from event_publisher import EventPublisher
+
+# Get job parameters
+args = getResolvedOptions(sys.argv, [
+    'JOB_NAME',
+    'processed_data_bucket',
+    'database_name'
+])
+
+args.update(get_optional_args(sys.argv, {
+    'min_quality_score': '0'
+}))
 
-glue = boto3.client('glue')
+# Initialize contexts
+sc = SparkContext()
+glueContext = GlueContext(sc)
+spark = glueContext.spark_session
+job = Job(glueContext)
+job.init(args['JOB_NAME'], args)
+
+# Initialize AWS services
 eventbridge = boto3.client('events')
+s3 = boto3.client('s3')
+events = EventPublisher(eventbridge, 'custom.glue.etl')
 
-def lambda_handler(event, context):
-    """
-    Orchestrate Glue jobs based on EventBridge events
-    """
-    
-    try:
-        print(f"Received event: {json.dumps(event)}")
-        
-        # Parse the event
-        event_source = event.get('source', '')
-        event_detail_type = event.get('detail-type', '')
-        event_detail = event.get('detail', {})
-        
-        response = {
-            'statusCode': 200,
-            'orchestration_results': []
-        }
-        
-        # Handle S3 object created events
-        if event_source == 'aws.s3' and event_detail_type == 'Object Created':
-            bucket_name = event_detail.get('bucket', {}).get('name', '')
-            object_key = event_detail.get('object', {}).get('key', '')
-            
-            print(f"Processing S3 event: {bucket_name}/{object_key}")
-            
-            # Determine which ETL jobs to trigger based on object path
-            jobs_to_trigger = []
-            
-            if 'customers/' in object_key:
-                jobs_to_trigger.append('customer-data-etl')
-            elif 'sales/' in object_key:
-                jobs_to_trigger.append('sales-data-etl')
-            
-            # Trigger appropriate Glue jobs
-            for job_name in jobs_to_trigger:
-                full_job_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-{job_name}-{os.environ.get('ENVIRONMENT', 'dev')}"
-                
-                job_run_response = start_glue_job(full_job_name, {
-                    'trigger_event': 'S3_OBJECT_CREATED',
-                    'source_bucket': bucket_name,
-                    'source_key': object_key
-                })
-                
-                response['orchestration_results'].append({
-                    'job_name': full_job_name,
-                    'job_run_id': job_run_response.get('JobRunId'),
-                    'status': 'STARTED'
-                })
-        
-        # Handle scheduled events
-        elif event_source == 'aws.events' and 'Scheduled Event' in event.get('resources', [''])[0]:
-            print("Processing scheduled event")
-            
-            # Start the main workflow
-            workflow_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-main-workflow-{os.environ.get('ENVIRONMENT', 'dev')}"
-            
-            try:
-                workflow_response = glue.start_workflow_run(Name=workflow_name)
-                
-                response['orchestration_results'].append({
-                    'workflow_name': workflow_name,
-                    'workflow_run_id': workflow_response.get('RunId'),
-                    'status': 'STARTED'
-                })
-                
-            except Exception as workflow_error:
-                print(f"Failed to start workflow: {str(workflow_error)}")
-                response['orchestration_results'].append({
-                    'workflow_name': workflow_name,
-                    'status': 'FAILED',
-                    'error': str(workflow_error)
-                })
-        
-        # Handle Glue job state changes
-        elif event_source == 'aws.glue' and event_detail_type == 'Glue Job State Change':
-            job_name = event_detail.get('jobName', '')
-            job_run_id = event_detail.get('jobRunId', '')
-            job_state = event_detail.get('state', '')
-            
-            print(f"Glue job {job_name} changed state to {job_state}")
-            
-            # Handle job completion logic
-            if job_state == 'SUCCEEDED':
-                handle_job_success(job_name, job_run_id, event_detail)
-            elif job_state == 'FAILED':
-                handle_job_failure(job_name, job_run_id, event_detail)
-            
-            response['orchestration_results'].append({
-                'job_name': job_name,
-                'job_run_id': job_run_id,
-                'state': job_state,
-                'processed': True
-            })
-        
-        # Send orchestration completion event
-        send_orchestration_event({
-            'orchestration_timestamp': datetime.now().isoformat(),
-            'event_processed': event_detail_type,
-            'results': response['orchestration_results']
-        })
-        
-        return response
-        
-    except Exception as e:
-        print(f"Error in orchestration: {str(e)}")
-        
-        # Send failure event
-        send_orchestration_event({
-            'orchestration_timestamp': datetime.now().isoformat(),
-            'status': 'FAILED',
-            'error': str(e),
-            'original_event': event
-        })
-        
-        return {
-            'statusCode': 500,
-            'error': str(e)
-        }
-
-def start_glue_job(job_name, arguments=None):
-    """Start a Glue job with optional arguments"""
-    try:
-        job_args = arguments or {}
-        
-        response = glue.start_job_run(
-            JobName=job_name,
-            Arguments={f'--{k}': v for k, v in job_args.items()}
-        )
-        
-        print(f"Started Glue job {job_name} with run ID: {response['JobRunId']}")
-        return response
-        
-    except Exception as e:
-        print(f"Failed to start Glue job {job_name}: {str(e)}")
-        raise e
-
-def handle_job_success(job_name, job_run_id, job_details):
-    """Handle successful job completion"""
-    print(f"Job {job_name} completed successfully")
-    
-    # Get job run details
-    try:
-        job_run_details = glue.get_job_run(JobName=job_name, RunId=job_run_id)
-        execution_time = job_run_details['JobRun'].get('ExecutionTime', 0)
-        
-        # Trigger downstream jobs if needed
-        if 'customer-data-etl' in job_name or 'sales-data-etl' in job_name:
-            # Check if both customer and sales ETL jobs are complete
-            check_and_trigger_quality_job()
-        
-        # Send success metrics
-        send_job_metrics({
-            'job_name': job_name,
-            'job_run_id': job_run_id,
-            'status': 'SUCCESS',
-            'execution_time_seconds': execution_time,
-            'completion_timestamp': datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"Error handling job success for {job_name}: {str(e)}")
-
-def handle_job_failure(job_name, job_run_id, job_details):
-    """Handle job failure"""
-    print(f"Job {job_name} failed")
-    
-    try:
-        job_run_details = glue.get_job_run(JobName=job_name, RunId=job_run_id)
-        error_message = job_run_details['JobRun'].get('ErrorMessage', 'Unknown error')
-        
-        # Send failure notification
-        send_failure_notification({
-            'job_name': job_name,
-            'job_run_id': job_run_id,
-            'error_message': error_message,
-            'failure_timestamp': datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"Error handling job failure for {job_name}: {str(e)}")
+# Processed tables checked by this job
+QUALITY_TABLES = [
+    {'name': 'customers', 'rules': CUSTOMER_RULES, 'partition_keys': ["registration_year"]},
+    {'name': 'sales', 'rules': SALES_RULES, 'partition_keys': ["sales_year", "sales_month"]}
+]
+
+def send_custom_event(event_type, details):
+    """Queue a custom event; events are sent to EventBridge in batches"""
+    events.publish(event_type, details)
 
-def check_and_trigger_quality_job():
-    """Check if both ETL jobs are complete and trigger quality job"""
+def read_processed_table(name):
+    """Read a processed parquet table, None if it has not been written yet"""
+    path = f"s3://{args['processed_data_bucket']}/{name}/"
     try:
-        # This is a simplified check - in production, you'd want to track job states
-        quality_job_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-data-quality-check-{os.environ.get('ENVIRONMENT', 'dev')}"
-        
-        start_glue_job(quality_job_name, {
-            'trigger_reason': 'ETL_JOBS_COMPLETED'
+        return spark.read.parquet(path)
+    except AnalysisException:
+        print(f"No processed data at {path}")
+        return None
+
+try:
+    print("Starting Data Quality Check Job...")
+
+    tables = {table['name']: read_processed_table(table['name']) for table in QUALITY_TABLES}
+    references = {name: df for name, df in tables.items() if df is not None}
+
+    quality_report = {
+        'job_name': args['JOB_NAME'],
+        'check_time': datetime.now().isoformat(),
+        'tables': {}
+    }
+
+    for table in QUALITY_TABLES:
+        df = tables[table['name']]
+        if df is None:
+            continue
+
+        # Skip referential rules whose reference table does not exist yet
+        rules = [
+            rule for rule in table['rules']
+            if rule['type'] != 'referential' or rule['reference'] in references
+        ]
+
+        table_report = evaluate_rules(df, rules, table['partition_keys'], references)
+        quality_report['tables'][table['name']] = table_report
+        print(f"Quality score for {table['name']}: {table_report['score']} ({table_report['records']} records)")
+
+        send_custom_event("Data Quality Report", {
+            'job_name': args['JOB_NAME'],
+            'table': table['name'],
+            'records': table_report['records'],
+            'score': table_report['score'],
+            'rules': table_report['rules'],
+            'partitions_checked': len(table_report['partitions'])
         })
-        
-    except Exception as e:
-        print(f"Failed to trigger quality job: {str(e)}")
 
-def send_orchestration_event(details):
-    """Send orchestration event to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.orchestrator',
-                    'DetailType': 'Job Orchestration',
-                    'Detail': json.dumps(details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send orchestration event: {str(e)}")
-
-def send_job_metrics(metrics):
-    """Send job metrics to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.metrics',
-                    'DetailType': 'Job Metrics',
-                    'Detail': json.dumps(metrics)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send job metrics: {str(e)}")
-
-def send_failure_notification(failure_details):
-    """Send failure notification"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.notifications',
-                    'DetailType': 'Job Failure Alert',
-                    'Detail': json.dumps(failure_details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send failure notification: {str(e)}")
\ No newline at end of file
+    # Full report with per-partition scores
+    report_key = f"quality_reports/{datetime.now().strftime('%Y/%m/%d/%H%M%S')}/report.json"
+    s3.put_object(
+        Bucket=args['processed_data_bucket'],
+        Key=report_key,
+        Body=json.dumps(quality_report, default=str).encode('utf-8')
+    )
+    print(f"Quality report written to s3://{args['processed_data_bucket']}/{report_key}")
+
+    min_score = float(args['min_quality_score'])
+    failing_tables = [
+        name for name, table_report in quality_report['tables'].items()
+        if table_report['score'] < min_score
+    ]
+    if failing_tables:
+        raise Exception(f"Quality score below {min_score} for: {', '.join(failing_tables)}")
+
+    print("Data quality check completed successfully")
+
+except Exception as e:
+    print(f"Error in Data Quality Check job: {str(e)}")
+
+    send_custom_event("Data Quality Check Failed", {
+        'job_name': args['JOB_NAME'],
+        'status': 'FAILED',
+        'error_message': str(e),
+        'failure_time': datetime.now().isoformat()
+    })
+    raise e
+
+finally:
+    events.flush()
+    job.commit()
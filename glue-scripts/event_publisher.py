@@ -0,0 +1,107 @@
+# glue-scripts/event_publisher.py
+import atexit
+import json
+import random
+import time
+
+MAX_BATCH_ENTRIES = 10
+MAX_BATCH_BYTES = 256 * 1024
+# put_events counts 14 bytes for the entry timestamp
+ENTRY_TIME_BYTES = 14
+
+
+def entry_size(entry):
+    """Size of an entry as counted against the put_events request limit"""
+    size = ENTRY_TIME_BYTES
+    for field in ('Source', 'DetailType', 'Detail'):
+        size += len(entry.get(field, '').encode('utf-8'))
+    for resource in entry.get('Resources', []):
+        size += len(resource.encode('utf-8'))
+    return size
+
+
+class EventPublisher:
+    """
+    Buffer custom events and send them with as few put_events calls as possible
+
+    Entries are sent in batches of up to 10 that stay within the 256KB
+    request limit. Only entries the response reports as failed are retried,
+    with jittered backoff. Callers flush at the end of a handler or job and
+    anything still buffered is flushed when the interpreter exits.
+    """
+
+    def __init__(self, eventbridge_client, source, event_bus_name=None, max_attempts=3,
+                 backoff_seconds=0.2, flush_on_exit=True, sleep=time.sleep):
+        self.eventbridge = eventbridge_client
+        self.source = source
+        self.event_bus_name = event_bus_name
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.sleep = sleep
+        self._buffer = []
+        self._buffer_bytes = 0
+
+        if flush_on_exit:
+            atexit.register(self.flush)
+
+    def publish(self, detail_type, details, source=None):
+        """Buffer an event, sending the buffer once it holds a full batch"""
+        entry = {
+            'Source': source or self.source,
+            'DetailType': detail_type,
+            'Detail': json.dumps(details, default=str)
+        }
+        if self.event_bus_name:
+            entry['EventBusName'] = self.event_bus_name
+
+        size = entry_size(entry)
+        if size > MAX_BATCH_BYTES:
+            print(f"Dropping {detail_type} event of {size} bytes, above the {MAX_BATCH_BYTES} byte limit")
+            return
+
+        if self._buffer_bytes + size > MAX_BATCH_BYTES:
+            self.flush()
+
+        self._buffer.append(entry)
+        self._buffer_bytes += size
+
+        if len(self._buffer) >= MAX_BATCH_ENTRIES:
+            self.flush()
+
+    def flush(self):
+        """Send every buffered entry; returns the entries that could not be delivered"""
+        entries, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        if not entries:
+            return []
+
+        undelivered = []
+        for start in range(0, len(entries), MAX_BATCH_ENTRIES):
+            undelivered.extend(self._send_batch(entries[start:start + MAX_BATCH_ENTRIES]))
+        return undelivered
+
+    def _send_batch(self, entries):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.eventbridge.put_events(Entries=entries)
+            except Exception as e:
+                print(f"Failed to send {len(entries)} events (attempt {attempt}): {str(e)}")
+            else:
+                if not response.get('FailedEntryCount'):
+                    return []
+
+                # Response entries line up with request entries; keep only the failures
+                failed = [
+                    (entry, result) for entry, result in zip(entries, response.get('Entries', []))
+                    if result.get('ErrorCode')
+                ]
+                entries = [entry for entry, _ in failed]
+                if not entries:
+                    return []
+                print(f"{len(entries)} events failed (attempt {attempt}): "
+                      f"{sorted(set(result['ErrorCode'] for _, result in failed))}")
+
+            if attempt < self.max_attempts:
+                self.sleep(self.backoff_seconds * (2 ** (attempt - 1)) * (1 + random.random()))
+
+        print(f"Giving up on {len(entries)} events after {self.max_attempts} attempts")
+        return entries
@@ -0,0 +1,79 @@
+# glue-scripts/file_sizing.py
+import math
+from pyspark.sql import functions as F
+from join_strategy import estimate_size_bytes
+
+FILE_BUCKET_COLUMN = "_file_bucket"
+DEFAULT_TARGET_FILE_BYTES = 128 * 1024 * 1024
+
+# In-memory (cached) row size to compressed parquet row size
+DEFAULT_COMPRESSION_RATIO = 0.3
+
+# Plan statistics above this multiple of the schema's row width come from joins of
+# unknown sizes, whose estimates multiply, rather than from data that was measured
+MAX_ROW_WIDTH_FACTOR = 64
+
+
+def files_for_bytes(total_bytes, target_file_bytes):
+    """Number of files needed to hold total_bytes at roughly target_file_bytes each"""
+    return max(int(math.ceil(total_bytes / float(target_file_bytes))), 1)
+
+
+def schema_row_bytes(df):
+    """Row width of df from its column types' default sizes"""
+    return df._jdf.schema().defaultSize()
+
+
+def estimate_parquet_bytes_per_row(df, row_count, compression_ratio=DEFAULT_COMPRESSION_RATIO):
+    """Estimate the on-disk parquet size of one row of df"""
+    size_bytes = estimate_size_bytes(df)
+    if not size_bytes or not row_count:
+        return None
+
+    row_bytes = size_bytes / float(row_count)
+    schema_bytes = schema_row_bytes(df)
+    if row_bytes > schema_bytes * MAX_ROW_WIDTH_FACTOR:
+        print(f"Plan size estimate of {size_bytes} bytes is not usable, sizing rows from the column types")
+        row_bytes = schema_bytes
+    return max(row_bytes * compression_ratio, 1.0)
+
+
+def size_output_files(df, partition_keys, row_count, target_file_bytes=DEFAULT_TARGET_FILE_BYTES,
+                      compression_ratio=DEFAULT_COMPRESSION_RATIO):
+    """
+    Lay df out so each output partition is written as files of about target_file_bytes
+
+    Rows of every partition are spread over as many file buckets as its
+    estimated size needs, and df is repartitioned by partition key plus
+    bucket so one task writes each file. Returns the repartitioned
+    DataFrame and a maxRecordsPerFile cap for the writer (0 when unknown).
+    """
+    bytes_per_row = estimate_parquet_bytes_per_row(df, row_count, compression_ratio)
+    if bytes_per_row is None:
+        print("Could not estimate row size, writing with the existing partitioning")
+        return df, 0
+
+    rows_per_file = max(int(target_file_bytes / bytes_per_row), 1)
+
+    if not partition_keys:
+        file_count = files_for_bytes(row_count * bytes_per_row, target_file_bytes)
+        print(f"Writing {row_count} rows as {file_count} files (~{rows_per_file} rows each)")
+        return df.repartition(file_count), rows_per_file
+
+    # One small row per output partition with the number of files it needs
+    file_counts_df = df \
+        .groupBy(*partition_keys) \
+        .count() \
+        .withColumn("_file_count", F.greatest(F.ceil(F.col("count") / F.lit(rows_per_file)), F.lit(1))) \
+        .drop("count")
+
+    total_files = file_counts_df.agg(F.sum("_file_count")).collect()[0][0] or 1
+    print(f"Writing {row_count} rows as {total_files} files (~{rows_per_file} rows each)")
+
+    sized_df = df \
+        .join(F.broadcast(file_counts_df), partition_keys, "left") \
+        .withColumn(FILE_BUCKET_COLUMN, F.pmod(F.xxhash64(*df.columns), F.col("_file_count"))) \
+        .repartition(int(total_files), *partition_keys, FILE_BUCKET_COLUMN) \
+        .drop("_file_count", FILE_BUCKET_COLUMN)
+
+    return sized_df, rows_per_file
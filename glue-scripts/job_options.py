@@ -0,0 +1,18 @@
+# glue-scripts/job_options.py
+from awsglue.utils import getResolvedOptions
+
+
+def get_optional_args(argv, defaults):
+    """Resolve optional job arguments, falling back to defaults for any not passed"""
+    resolved = dict(defaults)
+    present = [name for name in defaults if f'--{name}' in argv]
+
+    if present:
+        resolved.update(getResolvedOptions(argv, present))
+
+    return resolved
+
+
+def as_bool(value):
+    """Interpret a job argument string as a boolean flag"""
+    return str(value).strip().lower() in ('true', '1', 'yes', 'enable', 'enabled')
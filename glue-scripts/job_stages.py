@@ -0,0 +1,114 @@
+# glue-scripts/job_stages.py
+import time
+import uuid
+from contextlib import contextmanager
+
+# Task metrics summed per pipeline stage: StageData accessor -> reported name
+SPARK_STAGE_METRICS = {
+    'inputRecords': 'input_records',
+    'inputBytes': 'input_bytes',
+    'outputRecords': 'output_records',
+    'outputBytes': 'output_bytes',
+    'shuffleReadRecords': 'shuffle_read_records',
+    'shuffleReadBytes': 'shuffle_read_bytes',
+    'shuffleWriteRecords': 'shuffle_write_records',
+    'shuffleWriteBytes': 'shuffle_write_bytes',
+    'memoryBytesSpilled': 'memory_spilled_bytes',
+    'diskBytesSpilled': 'disk_spilled_bytes',
+    'executorRunTime': 'executor_run_ms',
+    'jvmGcTime': 'jvm_gc_ms'
+}
+
+
+class StageMetrics:
+    """
+    Wall time and Spark task metrics per pipeline stage of a job run
+
+    Each stage runs its Spark jobs under a job group of its own. When the
+    stage ends, the metrics of the Spark stages those jobs ran are summed
+    from the driver's status store, the data the Spark UI shows, so no UI
+    or extra listener is needed. stage() yields the stage's record; a job
+    can set 'rows' on it when it already knows the row count. summary()
+    is attached to the job's completion and failure events.
+    """
+
+    def __init__(self, spark_context, run_label=None, settle_timeout_seconds=10):
+        self.sc = spark_context
+        self.run_label = run_label or uuid.uuid4().hex[:8]
+        self.settle_timeout_seconds = settle_timeout_seconds
+        self.stages = []
+        self.job_groups = {}
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        record = {'stage': name, 'status': 'RUNNING'}
+        group = f"{self.run_label}:{name}"
+        self.job_groups[name] = group
+        self.sc.setJobGroup(group, name)
+        started = time.time()
+        try:
+            yield record
+            record['status'] = 'SUCCEEDED'
+        except Exception:
+            record['status'] = 'FAILED'
+            raise
+        finally:
+            record['wall_seconds'] = round(time.time() - started, 3)
+            self.sc.setLocalProperty("spark.jobGroup.id", None)
+            try:
+                record.update(self.spark_metrics(group))
+            except Exception as e:
+                print(f"Could not collect Spark metrics for stage {name}: {str(e)}")
+            self.stages.append(record)
+
+    def _settle(self):
+        """Wait for the status store to process the events of the jobs that just ran"""
+        try:
+            self.sc._jsc.sc().listenerBus().waitUntilEmpty(self.settle_timeout_seconds * 1000)
+        except Exception as e:
+            print(f"Spark listener bus did not drain: {str(e)}")
+
+    def _stage_attempts(self, store, stage_id):
+        try:
+            attempts = store.stageData(
+                stage_id, False, self.sc._jvm.java.util.Collections.emptyList(), False,
+                self.sc._gateway.new_array(self.sc._jvm.double, 0)
+            )
+        except Exception:
+            # Spark releases before 3.3 take only the stage ID and details flag
+            attempts = store.stageData(stage_id, False)
+        return [attempts.apply(index) for index in range(attempts.size())]
+
+    def spark_metrics(self, group):
+        """Summed task metrics of every Spark stage run by the jobs in a job group"""
+        self._settle()
+        tracker = self.sc.statusTracker()
+        store = self.sc._jsc.sc().statusStore()
+
+        job_ids = tracker.getJobIdsForGroup(group)
+        stage_ids = set()
+        for job_id in job_ids:
+            job_info = tracker.getJobInfo(job_id)
+            if job_info is not None:
+                stage_ids.update(job_info.stageIds)
+
+        metrics = dict.fromkeys(SPARK_STAGE_METRICS.values(), 0)
+        metrics.update({'spark_jobs': len(job_ids), 'spark_stages': 0})
+        for stage_id in sorted(stage_ids):
+            for attempt in self._stage_attempts(store, stage_id):
+                # Stages whose shuffle output was reused never ran
+                if str(attempt.status()) == 'SKIPPED':
+                    continue
+                metrics['spark_stages'] += 1
+                for accessor, metric in SPARK_STAGE_METRICS.items():
+                    metrics[metric] += getattr(attempt, accessor)()
+
+        return metrics
+
+    def summary(self):
+        """Per-stage records and the total wall time, for the job events"""
+        return {
+            'total_seconds': round(time.time() - self.started, 3),
+            'stages': list(self.stages)
+        }
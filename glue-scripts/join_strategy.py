@@ -0,0 +1,81 @@
+# glue-scripts/join_strategy.py
+from pyspark.sql import functions as F
+
+SALT_COLUMN = "_join_salt"
+
+
+def estimate_size_bytes(df):
+    """Estimate a DataFrame's size from the optimizer statistics"""
+    try:
+        return int(str(df._jdf.queryExecution().optimizedPlan().stats().sizeInBytes()))
+    except Exception as e:
+        print(f"Could not estimate DataFrame size: {str(e)}")
+        return None
+
+
+def find_hot_keys(df, key, total_rows, hot_key_fraction=0.01, sample_fraction=0.1, max_hot_keys=100):
+    """Return the key values holding at least hot_key_fraction of df's rows, from a sample"""
+    if not total_rows:
+        return []
+
+    min_sample_count = max(int(total_rows * sample_fraction * hot_key_fraction), 1)
+    rows = df.select(key) \
+        .sample(withReplacement=False, fraction=sample_fraction, seed=17) \
+        .groupBy(key) \
+        .count() \
+        .filter(F.col("count") >= min_sample_count) \
+        .orderBy(F.desc("count")) \
+        .limit(max_hot_keys) \
+        .collect()
+
+    return [row[key] for row in rows if row[key] is not None]
+
+
+def salted_join(left, right, key, hot_keys, how="left", salt_buckets=16):
+    """
+    Join with the hot keys spread over salt_buckets tasks
+
+    Left rows of a hot key get a random salt; the matching right rows are
+    replicated once per salt so each left row still matches exactly one copy.
+    """
+    is_hot = F.col(key).isin(hot_keys)
+
+    salted_left = left.withColumn(
+        SALT_COLUMN,
+        F.when(is_hot, (F.rand(seed=17) * salt_buckets).cast("int")).otherwise(F.lit(0))
+    )
+    salted_right = right.withColumn(
+        SALT_COLUMN,
+        F.explode(
+            F.when(is_hot, F.sequence(F.lit(0), F.lit(salt_buckets - 1)))
+             .otherwise(F.array(F.lit(0)))
+        )
+    )
+
+    return salted_left.join(salted_right, [key, SALT_COLUMN], how).drop(SALT_COLUMN)
+
+
+def skew_aware_join(left, right, key, how="left", broadcast_threshold_bytes=64 * 1024 * 1024,
+                    left_row_count=None, hot_key_fraction=0.01, salt_buckets=16):
+    """
+    Join left to a per-key right side choosing broadcast, salted or plain shuffle join
+
+    The right side is broadcast when its estimated size fits under the
+    threshold. Otherwise hot keys on the left side are salted; without hot
+    keys a regular join is used.
+    """
+    right_size = estimate_size_bytes(right)
+
+    if right_size is not None and right_size <= broadcast_threshold_bytes:
+        print(f"Join on {key}: broadcasting right side (~{right_size} bytes)")
+        return left.join(F.broadcast(right), key, how)
+
+    total_rows = left_row_count if left_row_count is not None else left.count()
+    hot_keys = find_hot_keys(left, key, total_rows, hot_key_fraction=hot_key_fraction)
+
+    if hot_keys:
+        print(f"Join on {key}: salting {len(hot_keys)} hot keys over {salt_buckets} buckets")
+        return salted_join(left, right, key, hot_keys, how=how, salt_buckets=salt_buckets)
+
+    print(f"Join on {key}: no hot keys found, using shuffle join")
+    return left.join(right, key, how)
@@ -0,0 +1,68 @@
+# glue-scripts/materialization.py
+from pyspark import StorageLevel
+
+
+class MaterializedFrame:
+    """A DataFrame persisted once whose row count is captured by the materializing action"""
+
+    def __init__(self, name, df, storage_level):
+        self.name = name
+        self.df = df
+        self.storage_level = storage_level
+        self.row_count = None
+
+    def materialize(self):
+        """
+        Persist the DataFrame and fill the cache with a single count() action
+
+        The count is taken eagerly rather than from the write: the jobs size
+        output files and choose the join strategy from it before anything is
+        written, and frames read by concurrent actions must be cached first
+        or each action computes them again. The count computes the lineage
+        once; the writes then read cached partitions.
+        """
+        if self.row_count is None:
+            self.df.persist(self.storage_level)
+            self.row_count = self.df.count()
+            print(f"Materialized {self.name} ({self.storage_level}): {self.row_count} rows")
+        return self
+
+    def release(self):
+        """Drop the cached partitions"""
+        self.df.unpersist()
+        print(f"Released {self.name}")
+
+
+class MaterializationPlanner:
+    """Tracks the DataFrames a job persists so each lineage is computed only once"""
+
+    def __init__(self, default_storage_level=StorageLevel.MEMORY_AND_DISK):
+        self.default_storage_level = default_storage_level
+        self._frames = {}
+
+    def materialize(self, name, df, storage_level=None):
+        """Persist df under name and return the cached DataFrame"""
+        if name in self._frames:
+            self.release(name)
+
+        frame = MaterializedFrame(name, df, storage_level or self.default_storage_level)
+        self._frames[name] = frame.materialize()
+        return frame.df
+
+    def row_count(self, name):
+        """Row count captured when name was materialized"""
+        return self._frames[name].row_count
+
+    def release(self, name):
+        """Unpersist a single materialized DataFrame"""
+        frame = self._frames.pop(name, None)
+        if frame is not None:
+            frame.release()
+
+    def release_all(self):
+        """Unpersist every DataFrame still held by the planner"""
+        for name in list(self._frames):
+            try:
+                self.release(name)
+            except Exception as e:
+                print(f"Failed to release {name}: {str(e)}")
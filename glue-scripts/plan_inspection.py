@@ -0,0 +1,34 @@
+# glue-scripts/plan_inspection.py
+
+
+def _plan_children(node):
+    """Return the child plan nodes of a JVM SparkPlan node"""
+    # Adaptive plans hide the physical tree behind a leaf node
+    if node.nodeName() == "AdaptiveSparkPlan":
+        return [node.executedPlan()]
+
+    children = node.children()
+    return [children.apply(i) for i in range(children.size())]
+
+
+def plan_node_names(df):
+    """List the physical plan node names of a DataFrame in pre-order"""
+    names = []
+    pending = [df._jdf.queryExecution().executedPlan()]
+
+    while pending:
+        node = pending.pop()
+        names.append(node.nodeName())
+        pending.extend(reversed(_plan_children(node)))
+
+    return names
+
+
+def count_exchange_nodes(df):
+    """
+    Count shuffle and broadcast exchanges in a DataFrame's physical plan
+
+    Cached relations are scanned as leaves, so exchanges that already ran
+    while materializing a persisted input are not counted.
+    """
+    return sum(1 for name in plan_node_names(df) if name.endswith("Exchange"))
@@ -0,0 +1,141 @@
+# glue-scripts/quality_rules.py
+from functools import reduce
+from pyspark.sql import functions as F
+
+EMAIL_PATTERN = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+# Declarative rule sets for the processed tables
+CUSTOMER_RULES = [
+    {'name': 'customer_id_not_null', 'type': 'not_null', 'column': 'customer_id'},
+    {'name': 'customer_id_unique', 'type': 'unique', 'column': 'customer_id'},
+    {'name': 'email_format', 'type': 'regex', 'column': 'email', 'pattern': EMAIL_PATTERN},
+    {'name': 'age_range', 'type': 'range', 'column': 'age', 'min': 0, 'max': 120}
+]
+
+SALES_RULES = [
+    {'name': 'sale_id_not_null', 'type': 'not_null', 'column': 'sale_id'},
+    {'name': 'sale_id_unique', 'type': 'unique', 'column': 'sale_id'},
+    {'name': 'customer_id_not_null', 'type': 'not_null', 'column': 'customer_id'},
+    {'name': 'amount_range', 'type': 'range', 'column': 'amount', 'min': 0.01},
+    {'name': 'customer_exists', 'type': 'referential', 'column': 'customer_id',
+     'reference': 'customers', 'reference_column': 'customer_id'}
+]
+
+ROW_RULE_TYPES = ('not_null', 'range', 'regex', 'referential')
+
+
+def _reference_column(rule):
+    return f"_ref_{rule['name']}"
+
+
+def attach_references(df, rules, references):
+    """Join each referential rule's key set onto df so it becomes a row-level check"""
+    for rule in rules:
+        if rule['type'] != 'referential':
+            continue
+
+        reference_df = references[rule['reference']] \
+            .select(F.col(rule['reference_column']).alias(_reference_column(rule))) \
+            .filter(F.col(_reference_column(rule)).isNotNull()) \
+            .distinct()
+
+        df = df.join(reference_df, F.col(rule['column']) == F.col(_reference_column(rule)), "left")
+
+    return df
+
+
+def failure_condition(rule):
+    """Column expression that is true for rows violating a row-level rule"""
+    column = F.col(rule['column'])
+    rule_type = rule['type']
+
+    if rule_type == 'not_null':
+        return column.isNull()
+    if rule_type == 'range':
+        conditions = []
+        if 'min' in rule:
+            conditions.append(column < F.lit(rule['min']))
+        if 'max' in rule:
+            conditions.append(column > F.lit(rule['max']))
+        return reduce(lambda a, b: a | b, conditions) if conditions else F.lit(False)
+    if rule_type == 'regex':
+        return column.isNotNull() & ~column.rlike(rule['pattern'])
+    if rule_type == 'referential':
+        return column.isNotNull() & F.col(_reference_column(rule)).isNull()
+
+    raise ValueError(f"Unknown rule type: {rule_type}")
+
+
+def compile_aggregations(rules):
+    """Compile a rule set into the aggregate expressions of a single pass"""
+    aggregations = [F.count(F.lit(1)).alias("_records")]
+
+    for rule in rules:
+        if rule['type'] in ROW_RULE_TYPES:
+            aggregations.append(
+                F.sum(F.when(failure_condition(rule), 1).otherwise(0)).alias(rule['name'])
+            )
+        elif rule['type'] == 'unique':
+            # Rows beyond the first for each non-null key
+            aggregations.append(
+                (F.count(F.col(rule['column'])) - F.countDistinct(F.col(rule['column']))).alias(rule['name'])
+            )
+        else:
+            raise ValueError(f"Unknown rule type: {rule['type']}")
+
+    return aggregations
+
+
+def quality_score(records, failures):
+    """Average pass rate over all rules as a 0-100 score"""
+    if not records or not failures:
+        return 100.0
+    pass_rates = [1 - min(count, records) / float(records) for count in failures.values()]
+    return round(100 * sum(pass_rates) / len(pass_rates), 2)
+
+
+def evaluate_rules(df, rules, partition_keys=None, references=None):
+    """
+    Evaluate a rule set for a table and each of its partitions in one aggregation
+
+    Referential rules are turned into row-level checks with one join per
+    reference, then every rule becomes an aggregate expression. A rollup
+    over the partition keys yields per-partition and table totals from the
+    same pass.
+    """
+    partition_keys = partition_keys or []
+    prepared_df = attach_references(df, rules, references or {})
+    aggregations = compile_aggregations(rules)
+    rule_names = [rule['name'] for rule in rules]
+
+    if partition_keys:
+        all_grouped = (1 << len(partition_keys)) - 1
+        rows = prepared_df \
+            .rollup(*partition_keys) \
+            .agg(F.grouping_id().alias("_grouping_id"), *aggregations) \
+            .filter(F.col("_grouping_id").isin(0, all_grouped)) \
+            .collect()
+    else:
+        rows = [row.asDict() for row in prepared_df.agg(*aggregations).collect()]
+        rows = [dict(row, _grouping_id=0) for row in rows]
+        all_grouped = 0
+
+    report = {'records': 0, 'score': 100.0, 'rules': {}, 'partitions': []}
+
+    for row in rows:
+        row = row if isinstance(row, dict) else row.asDict()
+        failures = {name: row[name] or 0 for name in rule_names}
+        summary = {
+            'records': row['_records'],
+            'score': quality_score(row['_records'], failures),
+            'rules': failures
+        }
+
+        if row['_grouping_id'] == all_grouped:
+            report.update(summary)
+        else:
+            summary['partition'] = {key: row[key] for key in partition_keys}
+            report['partitions'].append(summary)
+
+    report['partitions'].sort(key=lambda entry: [str(entry['partition'][key]) for key in partition_keys])
+    return report
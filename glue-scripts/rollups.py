@@ -0,0 +1,163 @@
+# glue-scripts/rollups.py
+from pyspark.sql import functions as F
+from pyspark.sql.utils import AnalysisException
+from pyspark.sql.window import Window
+
+# Calendar columns carried by each grain; all follow from the grain's key, so they add no rows
+MONTH_COLUMNS = ["sales_year", "sales_quarter", "sales_month"]
+DAY_COLUMNS = MONTH_COLUMNS + ["sale_date", "day_of_week", "is_weekend"]
+
+# Additive measures: how each is computed from detail rows and combined from a finer rollup.
+# Averages are total_amount / order_count; distinct counts cannot be rolled up and are not offered
+MEASURES = {
+    'total_amount': {'function': 'sum', 'column': 'amount', 'combine': 'sum'},
+    'order_count': {'function': 'count', 'column': 'sale_id', 'combine': 'sum'},
+    'min_amount': {'function': 'min', 'column': 'amount', 'combine': 'min'},
+    'max_amount': {'function': 'max', 'column': 'amount', 'combine': 'max'},
+    'customer_count': {'function': 'count', 'column': 'customer_id', 'combine': 'sum'}
+}
+
+SALES_MEASURES = ['total_amount', 'order_count', 'min_amount', 'max_amount']
+
+# Customer attributes a rollup can take from processed_customers
+CUSTOMER_ATTRIBUTES = ["state", "age_group"]
+
+# Declared rollups, coarsest first: routing picks the first one that covers a query
+SALES_ROLLUPS = [
+    {'name': 'sales_monthly_by_segment', 'dimensions': MONTH_COLUMNS + ['customer_segment'],
+     'measures': SALES_MEASURES, 'partition_keys': ['sales_year', 'sales_month']},
+    {'name': 'sales_monthly_by_amount_category', 'dimensions': MONTH_COLUMNS + ['amount_category'],
+     'measures': SALES_MEASURES, 'partition_keys': ['sales_year', 'sales_month']},
+    {'name': 'sales_monthly_by_customer_state',
+     'dimensions': MONTH_COLUMNS + ['customer_segment'] + CUSTOMER_ATTRIBUTES,
+     'measures': SALES_MEASURES, 'partition_keys': ['sales_year', 'sales_month'], 'join': 'customers'},
+    {'name': 'sales_daily_by_segment', 'dimensions': DAY_COLUMNS + ['customer_segment'],
+     'measures': SALES_MEASURES, 'partition_keys': ['sales_year', 'sales_month']}
+]
+
+CUSTOMER_ROLLUPS = [
+    {'name': 'customers_by_state', 'dimensions': ['registration_year'] + CUSTOMER_ATTRIBUTES,
+     'measures': ['customer_count'], 'partition_keys': ['registration_year']}
+]
+
+ROLLUPS = {
+    'processed_sales': SALES_ROLLUPS,
+    'processed_customers': CUSTOMER_ROLLUPS
+}
+
+UNKNOWN_ATTRIBUTE = "Unknown"
+
+
+def route_rollup(group_by, measures=None, filter_columns=None, table='processed_sales', rollups=None):
+    """
+    Smallest declared rollup that can answer a query on table, None if only the table can
+
+    A rollup answers a query when every group-by and filter column is one
+    of its dimensions and every measure is one it stores. The caller
+    re-aggregates the rollup rows with each measure's 'combine' function
+    (sum for totals and counts), e.g. a monthly revenue by state query is
+    SUM(total_amount) over sales_monthly_by_customer_state grouped by
+    sales_year, sales_month and state.
+    """
+    columns = set(group_by) | set(filter_columns or [])
+    measures = set(measures or [])
+    candidates = ROLLUPS.get(table, []) if rollups is None else rollups
+
+    for rollup in candidates:
+        if columns <= set(rollup['dimensions']) and measures <= set(rollup['measures']):
+            return rollup
+    return None
+
+
+def latest_customers(spark, path, columns=None, registration_years=None):
+    """Latest row per customer_id of the processed customers output, None if it does not exist"""
+    try:
+        customers_df = spark.read.parquet(path)
+    except AnalysisException:
+        print(f"No processed customers at {path}")
+        return None
+
+    if registration_years is not None:
+        # Partition column predicate, pruned at listing time
+        customers_df = customers_df.filter(F.col("registration_year").isin(list(registration_years)))
+
+    # Customer runs append, so a customer sent twice has a row per run
+    latest = Window.partitionBy("customer_id").orderBy(F.col("processed_timestamp").desc())
+    customers_df = customers_df \
+        .withColumn("_row", F.row_number().over(latest)) \
+        .filter(F.col("_row") == 1) \
+        .drop("_row")
+
+    return customers_df.select(*columns) if columns else customers_df
+
+
+def _aggregate(df, dimensions, measures):
+    return df.groupBy(*dimensions).agg(*[
+        getattr(F, MEASURES[measure]['function'])(MEASURES[measure]['column']).alias(measure)
+        for measure in measures
+    ])
+
+
+def _combine(df, dimensions, measures):
+    return df.groupBy(*dimensions).agg(*[
+        getattr(F, MEASURES[measure]['combine'])(measure).alias(measure)
+        for measure in measures
+    ])
+
+
+def _aggregate_with_customers(df, rollup, customers_df):
+    """Pre-aggregate per customer, then join the customer attributes onto the much smaller result"""
+    own_dimensions = [column for column in rollup['dimensions'] if column not in CUSTOMER_ATTRIBUTES]
+    per_customer_df = _aggregate(df, own_dimensions + ["customer_id"], rollup['measures'])
+
+    if customers_df is None:
+        per_customer_df = per_customer_df.select(
+            "*", *[F.lit(UNKNOWN_ATTRIBUTE).alias(column) for column in CUSTOMER_ATTRIBUTES]
+        )
+    else:
+        per_customer_df = per_customer_df \
+            .join(customers_df.select("customer_id", *CUSTOMER_ATTRIBUTES), "customer_id", "left") \
+            .fillna(UNKNOWN_ATTRIBUTE, subset=CUSTOMER_ATTRIBUTES)
+
+    return _combine(per_customer_df, rollup['dimensions'], rollup['measures'])
+
+
+def build_rollups(df, rollups, materialization, customers_df=None):
+    """
+    Rollup DataFrames over the detail rows in df, by rollup name
+
+    The finest rollups are aggregated from df; a coarser rollup covered by
+    a finer one is re-aggregated from that instead of scanning df again,
+    and only those finer rollups are cached. Rollups with a 'join' take
+    the customer attributes from customers_df.
+    """
+    sources = {}
+    planned = []
+    for rollup in reversed(rollups):
+        source = route_rollup(rollup['dimensions'], rollup['measures'], rollups=planned)
+        sources[rollup['name']] = source['name'] if source else None
+        planned.insert(0, rollup)
+
+    reused = set(name for name in sources.values() if name)
+    built = {}
+    for rollup in reversed(rollups):
+        source = sources[rollup['name']]
+        if source:
+            rollup_df = _combine(built[source], rollup['dimensions'], rollup['measures'])
+        elif rollup.get('join') == 'customers':
+            rollup_df = _aggregate_with_customers(df, rollup, customers_df)
+        else:
+            rollup_df = _aggregate(df, rollup['dimensions'], rollup['measures'])
+
+        if rollup['name'] in reused:
+            rollup_df = materialization.materialize(f"rollup_{rollup['name']}", rollup_df)
+        built[rollup['name']] = rollup_df
+        print(f"Rollup {rollup['name']} built from {source or 'detail rows'}")
+
+    return built
+
+
+def write_rollup(sink, rollup_df, partitions):
+    """Replace the given partitions of a rollup table, one file per partition"""
+    sink.ensure_table(rollup_df)
+    return sink.overwrite_partitions(rollup_df.repartition(*sink.partition_keys), partitions=partitions)
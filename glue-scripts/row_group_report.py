@@ -0,0 +1,114 @@
+# glue-scripts/row_group_report.py
+"""
+Report how many parquet row groups a predicate lets engines skip
+
+    python row_group_report.py --bucket my-processed-bucket --prefix sales/ \
+        --column customer_id --equals 42
+"""
+import argparse
+from datetime import date, datetime
+
+import boto3
+import pyarrow.parquet as pq
+from pyarrow import fs
+from source_listing import list_objects
+
+
+def _convert(value, statistic):
+    """Coerce a command line value to the type of a row group statistic"""
+    if value is None or statistic is None:
+        return value
+    try:
+        # Date and timestamp statistics take ISO strings; datetime is a date subclass
+        if isinstance(statistic, datetime):
+            return datetime.fromisoformat(value)
+        if isinstance(statistic, date):
+            return date.fromisoformat(value)
+        return type(statistic)(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def row_group_may_match(statistics, equals=None, lower=None, upper=None):
+    """Whether min/max statistics allow the row group to contain matching rows"""
+    if statistics is None or not statistics.has_min_max:
+        return True
+
+    minimum, maximum = statistics.min, statistics.max
+    try:
+        if equals is not None:
+            value = _convert(equals, minimum)
+            return minimum <= value <= maximum
+        if lower is not None and maximum < _convert(lower, maximum):
+            return False
+        if upper is not None and minimum > _convert(upper, minimum):
+            return False
+    except TypeError:
+        # A value that cannot be compared with the statistics cannot rule the row group out
+        return True
+    return True
+
+
+def pruning_report(filesystem, paths, column, equals=None, lower=None, upper=None):
+    """Count the row groups and rows a predicate on column can skip across paths"""
+    report = {
+        'files': 0,
+        'row_groups': 0,
+        'row_groups_skipped': 0,
+        'rows': 0,
+        'rows_skipped': 0
+    }
+
+    for path in paths:
+        with filesystem.open_input_file(path) as source:
+            metadata = pq.ParquetFile(source).metadata
+
+        column_index = metadata.schema.names.index(column) if column in metadata.schema.names else None
+        report['files'] += 1
+
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+            report['row_groups'] += 1
+            report['rows'] += row_group.num_rows
+
+            statistics = row_group.column(column_index).statistics if column_index is not None else None
+            if not row_group_may_match(statistics, equals=equals, lower=lower, upper=upper):
+                report['row_groups_skipped'] += 1
+                report['rows_skipped'] += row_group.num_rows
+
+    report['row_group_pruning_ratio'] = (
+        report['row_groups_skipped'] / report['row_groups'] if report['row_groups'] else 0
+    )
+    report['row_pruning_ratio'] = report['rows_skipped'] / report['rows'] if report['rows'] else 0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bucket', required=True)
+    parser.add_argument('--prefix', required=True)
+    parser.add_argument('--column', required=True)
+    parser.add_argument('--equals')
+    parser.add_argument('--lower')
+    parser.add_argument('--upper')
+    options = parser.parse_args()
+
+    objects = [
+        obj for obj in list_objects(boto3.client('s3'), options.bucket, options.prefix)
+        if obj['key'].endswith('.parquet')
+    ]
+    report = pruning_report(
+        fs.S3FileSystem(),
+        [f"{options.bucket}/{obj['key']}" for obj in objects],
+        options.column,
+        equals=options.equals,
+        lower=options.lower,
+        upper=options.upper
+    )
+
+    for name, value in report.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == '__main__':
+    main()
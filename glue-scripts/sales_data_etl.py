@@ -5,61 +5,88 @@ from awsglue.utils import getResolvedOptions
 from pyspark.context import SparkContext
 from awsglue.context import GlueContext
 from awsglue.job import Job
-from awsglue.dynamicframe import DynamicFrame
 from pyspark.sql import functions as F
 from pyspark.sql.types import *
 from pyspark.sql.window import Window
 import boto3
-import json
 from datetime import datetime
+from data_profiler import sales_quality_metrics
+from materialization import MaterializationPlanner
+from plan_inspection import count_exchange_nodes
+from job_options import as_bool, get_optional_args
+from job_stages import StageMetrics
+from action_scheduler import ActionScheduler
+from join_strategy import skew_aware_join
+from schema_registry import SALES_RAW_SCHEMA, read_typed_csv, source_read_options
+from source_listing import SourceWatermark, object_paths, resolve_source_objects
+from event_publisher import EventPublisher
+from catalog_sink import CatalogParquetSink
+from file_sizing import size_output_files
+from clustering import cluster_within_partitions, parse_keys
+from rollups import CUSTOMER_ATTRIBUTES, SALES_ROLLUPS, build_rollups, latest_customers, write_rollup
+from incremental_state import (
+    AggregateStateStore,
+    apply_prior_totals,
+    bootstrap_totals,
+    collect_partitions,
+    customer_totals,
+    monthly_totals,
+    read_partitions,
+    replace_monthly_totals
+)
 
-# Get job parameters
-args = getResolvedOptions(sys.argv, [
+# Required job parameters
+JOB_ARGS = [
     'JOB_NAME',
     'raw_data_bucket',
     'processed_data_bucket',
     'database_name'
-])
+]
 
-# Initialize contexts
-sc = SparkContext()
-glueContext = GlueContext(sc)
-spark = glueContext.spark_session
-job = Job(glueContext)
-job.init(args['JOB_NAME'], args)
+# Optional tuning parameters
+OPTIONAL_ARGS = {
+    'segment_broadcast_threshold_mb': '64',
+    'join_hot_key_fraction': '0.01',
+    'join_salt_buckets': '16',
+    'processing_mode': 'full',
+    'target_file_size_mb': '128',
+    'cluster_sort_keys': '',
+    'cluster_zorder_keys': '',
+    'parquet_row_group_mb': '32',
+    'source_bucket': '',
+    'source_key': '',
+    'source_keys': '',
+    'manifest_path': '',
+    'source_delimiter': '',
+    'source_quote': '',
+    'source_encoding': '',
+    'parallel_actions': '4',
+    'build_rollups': 'true'
+}
 
-# Initialize AWS services
-eventbridge = boto3.client('events')
-s3 = boto3.client('s3')
-
-def send_custom_event(event_type, details):
-    """Send custom event to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.glue.etl',
-                    'DetailType': event_type,
-                    'Detail': json.dumps(details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send event: {str(e)}")
+SALES_PARTITION_KEYS = ["sales_year", "sales_month"]
 
 def calculate_business_metrics(df):
     """Calculate business metrics from sales data"""
-    # Window specifications
-    monthly_window = Window.partitionBy("customer_id", "sales_month")
+    # Shuffle once by customer_id and sort by purchase date. Every window below
+    # partitions by customer_id (plus a finer key at most), so Spark reuses this
+    # layout instead of adding an exchange per window specification
+    clustered_df = df \
+        .repartition("customer_id") \
+        .sortWithinPartitions("customer_id", "sale_date")
+    
+    # Window specifications; a month is a calendar month of one year, matching the
+    # sales_year/sales_month partitions an incremental run recomputes
+    monthly_window = Window.partitionBy("customer_id", "sales_year", "sales_month")
     yearly_window = Window.partitionBy("customer_id", "sales_year")
     
     # Calculate metrics
-    metrics_df = df \
+    metrics_df = clustered_df \
         .withColumn("monthly_total", F.sum("amount").over(monthly_window)) \
         .withColumn("yearly_total", F.sum("amount").over(yearly_window)) \
         .withColumn("avg_order_value", F.avg("amount").over(monthly_window)) \
         .withColumn("order_rank_in_month", F.row_number().over(
-            Window.partitionBy("customer_id", "sales_month").orderBy(F.desc("amount"))
+            monthly_window.orderBy(F.desc("amount"), "sale_id")
         )) \
         .withColumn("running_total", F.sum("amount").over(
             Window.partitionBy("customer_id").orderBy("sale_date")
@@ -68,57 +95,10 @@ def calculate_business_metrics(df):
     
     return metrics_df
 
-try:
-    print("Starting Sales Data ETL Job...")
-    
-    # Read raw sales data
-    sales_data_path = f"s3://{args['raw_data_bucket']}/sales/"
-    
-    sales_dynamic_frame = glueContext.create_dynamic_frame.from_options(
-        format_options={"quoteChar": "\"", "withHeader": True, "separator": ","},
-        connection_type="s3",
-        format="csv",
-        connection_options={
-            "paths": [sales_data_path],
-            "recurse": True
-        },
-        transformation_ctx="sales_dynamic_frame"
-    )
-    
-    print(f"Raw sales records count: {sales_dynamic_frame.count()}")
-    
-    # Convert to DataFrame
-    sales_df = sales_dynamic_frame.toDF()
-    
-    # Data validation
-    total_records = sales_df.count()
-    null_customer_ids = sales_df.filter(F.col("customer_id").isNull()).count()
-    invalid_amounts = sales_df.filter(F.col("amount") <= 0).count()
-    
-    # Data transformations
-    sales_transformed_df = sales_df \
-        .filter(F.col("customer_id").isNotNull()) \
-        .filter(F.col("amount") > 0) \
-        .withColumn("sale_date", F.to_date(F.col("sale_date"), "yyyy-MM-dd")) \
-        .withColumn("sales_year", F.year(F.col("sale_date"))) \
-        .withColumn("sales_month", F.month(F.col("sale_date"))) \
-        .withColumn("sales_quarter", F.quarter(F.col("sale_date"))) \
-        .withColumn("day_of_week", F.dayofweek(F.col("sale_date"))) \
-        .withColumn("is_weekend", F.when(F.col("day_of_week").isin([1, 7]), True).otherwise(False)) \
-        .withColumn("amount_category", 
-                   F.when(F.col("amount") < 100, "Small")
-                    .when(F.col("amount") < 500, "Medium")
-                    .when(F.col("amount") < 1000, "Large")
-                    .otherwise("Very Large")) \
-        .withColumn("processed_timestamp", F.current_timestamp()) \
-        .withColumn("data_source", F.lit("sales_system")) \
-        .withColumn("etl_job_name", F.lit(args['JOB_NAME']))
-    
-    # Calculate business metrics
-    sales_with_metrics_df = calculate_business_metrics(sales_transformed_df)
-    
-    # Add customer segmentation based on purchase behavior
-    customer_segments_df = sales_with_metrics_df \
+def calculate_customer_segments(metrics_df):
+    """Derive lifetime customer segments from the customer_id-partitioned metrics"""
+    # groupBy on the partitioning key needs no exchange on top of calculate_business_metrics
+    totals_df = metrics_df \
         .groupBy("customer_id") \
         .agg(
             F.sum("amount").alias("total_spent"),
@@ -126,7 +106,13 @@ try:
             F.avg("amount").alias("avg_order_value"),
             F.max("sale_date").alias("last_purchase_date"),
             F.min("sale_date").alias("first_purchase_date")
-        ) \
+        )
+    
+    return assign_customer_segments(totals_df)
+
+def assign_customer_segments(totals_df):
+    """Assign lifetime segments from per-customer totals"""
+    return totals_df \
         .withColumn("customer_lifetime_days", 
                    F.datediff(F.col("last_purchase_date"), F.col("first_purchase_date"))) \
         .withColumn("customer_segment",
@@ -134,96 +120,316 @@ try:
                     .when((F.col("total_spent") > 1000) & (F.col("total_orders") > 5), "High Value")
                     .when(F.col("total_orders") > 3, "Regular")
                     .otherwise("New"))
-    
-    # Join back with main sales data
-    sales_final_df = sales_with_metrics_df.join(
-        customer_segments_df.select("customer_id", "customer_segment", "total_spent", "total_orders"),
-        "customer_id",
-        "left"
-    )
-    
-    print(f"Transformed sales records count: {sales_final_df.count()}")
-    
-    # Convert back to Dynamic Frame
-    sales_final_dynamic_frame = DynamicFrame.fromDF(
-        sales_final_df, 
-        glueContext, 
-        "sales_final_dynamic_frame"
-    )
-    
-    # Write partitioned data to S3
-    output_path = f"s3://{args['processed_data_bucket']}/sales/"
-    
-    glueContext.write_dynamic_frame.from_options(
-        frame=sales_final_dynamic_frame,
-        connection_type="s3",
-        connection_options={
-            "path": output_path,
-            "partitionKeys": ["sales_year", "sales_month"]
-        },
-        format="glueparquet",
-        transformation_ctx="write_sales_data"
-    )
-    
-    # Write customer segments separately
-    customer_segments_output_path = f"s3://{args['processed_data_bucket']}/customer_segments/"
-    customer_segments_dynamic_frame = DynamicFrame.fromDF(
-        customer_segments_df,
-        glueContext,
-        "customer_segments_dynamic_frame"
-    )
-    
-    glueContext.write_dynamic_frame.from_options(
-        frame=customer_segments_dynamic_frame,
-        connection_type="s3",
-        connection_options={"path": customer_segments_output_path},
-        format="glueparquet",
-        transformation_ctx="write_customer_segments"
-    )
-    
-    # Update Data Catalog
-    glueContext.write_dynamic_frame.from_catalog(
-        frame=sales_final_dynamic_frame,
-        database=args['database_name'],
-        table_name="processed_sales",
-        transformation_ctx="catalog_write_sales_data"
-    )
-    
-    # Send success metrics
-    success_details = {
-        'job_name': args['JOB_NAME'],
-        'status': 'SUCCESS',
-        'records_processed': sales_final_df.count(),
-        'data_quality': {
-            'total_records': total_records,
-            'null_customer_ids': null_customer_ids,
-            'invalid_amounts': invalid_amounts,
-            'valid_records_percentage': ((total_records - null_customer_ids - invalid_amounts) / total_records) * 100
-        },
-        'customer_segments': {
-            segment_row['customer_segment']: segment_row['count'] 
-            for segment_row in customer_segments_df.groupBy("customer_segment").count().collect()
-        },
-        'output_path': output_path,
-        'completion_time': datetime.now().isoformat()
-    }
-    
-    send_custom_event("ETL Job Completed", success_details)
-    
-    print(f"Sales ETL job completed successfully. Records processed: {sales_final_df.count()}")
-    
-except Exception as e:
-    print(f"Error in Sales ETL job: {str(e)}")
-    
-    failure_details = {
-        'job_name': args['JOB_NAME'],
-        'status': 'FAILED',
-        'error_message': str(e),
-        'failure_time': datetime.now().isoformat()
-    }
-    
-    send_custom_event("ETL Job Failed", failure_details)
-    raise e
 
-finally:
-    job.commit()
\ No newline at end of file
+def transform_sales(sales_df, job_name):
+    """Clean raw sales and derive the calendar and amount columns"""
+    return sales_df \
+        .filter(F.col("customer_id").isNotNull()) \
+        .filter(F.col("amount") > 0) \
+        .withColumn("sales_year", F.year(F.col("sale_date"))) \
+        .withColumn("sales_month", F.month(F.col("sale_date"))) \
+        .withColumn("sales_quarter", F.quarter(F.col("sale_date"))) \
+        .withColumn("day_of_week", F.dayofweek(F.col("sale_date"))) \
+        .withColumn("is_weekend", F.when(F.col("day_of_week").isin([1, 7]), True).otherwise(False)) \
+        .withColumn("amount_category",
+                   F.when(F.col("amount") < 100, "Small")
+                    .when(F.col("amount") < 500, "Medium")
+                    .when(F.col("amount") < 1000, "Large")
+                    .otherwise("Very Large")) \
+        .withColumn("processed_timestamp", F.current_timestamp()) \
+        .withColumn("data_source", F.lit("sales_system")) \
+        .withColumn("etl_job_name", F.lit(job_name))
+
+def run_sales_etl(args, glueContext, job, s3, glue, events, stages=None):
+    """
+    Run the sales ETL with the given contexts and clients
+
+    Each step of the job runs as a stage of stages, a StageMetrics; the
+    per-stage breakdown goes into the completion and failure events. The
+    job bookmark is committed only after a successful run. Returns the
+    details of the completion event.
+    """
+    spark = glueContext.spark_session
+    stages = stages or StageMetrics(spark.sparkContext, args['JOB_NAME'])
+
+    # Tracks persisted DataFrames so repeated actions reuse one computation
+    materialization = MaterializationPlanner()
+
+    # Independent outputs are written concurrently from driver threads
+    actions = ActionScheduler(spark.sparkContext, max_workers=int(args['parallel_actions']))
+
+    try:
+        print("Starting Sales Data ETL Job...")
+
+        incremental = args['processing_mode'] == 'incremental'
+
+        with stages.stage("read_source"):
+            # Incremental runs read the objects named by the run manifest, or files newer than
+            # the last successful run; full runs always rebuild from the whole prefix
+            source_watermark = SourceWatermark(s3, args['processed_data_bucket'], "_watermarks/sales")
+            source_bucket, new_objects = resolve_source_objects(
+                s3, args, "sales/", source_watermark.read() if incremental else None, use_manifest=incremental
+            )
+            print(f"Sales files to read: {len(new_objects)}")
+
+            # Parse against the pinned raw schema; malformed rows go to the bad records sink
+            sales_df, bad_records = read_typed_csv(
+                spark,
+                object_paths(source_bucket, new_objects),
+                SALES_RAW_SCHEMA,
+                materialization,
+                "sales_raw",
+                bad_records_path=f"s3://{args['processed_data_bucket']}/_bad_records/sales/",
+                read_options=source_read_options(args)
+            )
+
+        with stages.stage("quality_metrics") as quality_stage:
+            # Data validation (single aggregation pass)
+            data_quality = sales_quality_metrics(sales_df)
+            quality_stage['rows'] = data_quality['total_records']
+        data_quality['bad_records'] = bad_records
+        print(f"Raw sales records count: {data_quality['total_records']}")
+
+        # Data transformations
+        sales_transformed_df = transform_sales(sales_df, args['JOB_NAME'])
+
+        output_path = f"s3://{args['processed_data_bucket']}/sales/"
+
+        # Per-customer aggregate state persisted in the processed bucket
+        state_store = AggregateStateStore(spark, s3, args['processed_data_bucket'])
+        existing_sales_df = None
+        metrics_input_df = sales_transformed_df
+
+        if incremental:
+            with stages.stage("incremental_state"):
+                # Job bookmarks restrict the input to new files, so only the partitions
+                # they touch are recomputed and rewritten
+                sales_transformed_df = materialization.materialize("sales_new", sales_transformed_df)
+                affected_partitions = collect_partitions(sales_transformed_df, SALES_PARTITION_KEYS)
+                print(f"Partitions touched by new sales: {affected_partitions}")
+
+                monthly_totals_df = state_store.read("customer_monthly_totals")
+                if monthly_totals_df is None:
+                    monthly_totals_df = bootstrap_totals(spark, output_path)
+
+                existing_sales_df = read_partitions(
+                    spark, output_path, SALES_PARTITION_KEYS, affected_partitions, sales_transformed_df.columns
+                )
+                if existing_sales_df is not None:
+                    # Rows left by an earlier failed attempt of this batch are replaced, not counted twice
+                    existing_sales_df = existing_sales_df.join(
+                        sales_transformed_df.select("sale_id"), "sale_id", "left_anti"
+                    )
+                    existing_sales_df = materialization.materialize("sales_existing", existing_sales_df)
+                    metrics_input_df = existing_sales_df.unionByName(sales_transformed_df)
+
+        with stages.stage("business_metrics") as metrics_stage:
+            # Calculate business metrics
+            sales_with_metrics_df = calculate_business_metrics(metrics_input_df)
+            print(f"Business metrics plan exchanges: {count_exchange_nodes(sales_with_metrics_df)}")
+
+            if incremental:
+                # Windows only saw the rewritten partitions; add back the months outside them
+                sales_with_metrics_df = apply_prior_totals(
+                    sales_with_metrics_df, monthly_totals_df, SALES_PARTITION_KEYS, affected_partitions
+                )
+                # The rewritten months are recomputed from all of their rows, so a retried batch is not added twice
+                monthly_totals_df = replace_monthly_totals(
+                    monthly_totals_df, metrics_input_df, SALES_PARTITION_KEYS, affected_partitions
+                )
+                # Segments and the state write read it; compute it before the rewritten partitions are replaced
+                monthly_totals_df = materialization.materialize("monthly_totals", monthly_totals_df)
+
+            # Window results feed both the segmentation and the join back, compute them once
+            sales_with_metrics_df = materialization.materialize("sales_with_metrics", sales_with_metrics_df)
+            metrics_stage['rows'] = materialization.row_count("sales_with_metrics")
+
+        with stages.stage("customer_segments") as segments_stage:
+            # Add customer segmentation based on purchase behavior
+            if incremental:
+                customer_segments_df = assign_customer_segments(
+                    customer_totals(monthly_totals_df)
+                    .withColumn("avg_order_value", F.col("total_spent") / F.col("total_orders"))
+                )
+            else:
+                customer_segments_df = calculate_customer_segments(sales_with_metrics_df)
+
+            # Segments are written, joined and summarised below
+            customer_segments_df = materialization.materialize("customer_segments", customer_segments_df)
+            segments_stage['rows'] = materialization.row_count("customer_segments")
+
+        with stages.stage("segment_join") as join_stage:
+            # Join back with main sales data: broadcast the per-customer segments when
+            # they are small enough, otherwise salt the hot customer IDs
+            sales_final_df = skew_aware_join(
+                sales_with_metrics_df,
+                customer_segments_df.select("customer_id", "customer_segment", "total_spent", "total_orders"),
+                "customer_id",
+                how="left",
+                broadcast_threshold_bytes=int(float(args['segment_broadcast_threshold_mb']) * 1024 * 1024),
+                left_row_count=materialization.row_count("sales_with_metrics"),
+                hot_key_fraction=float(args['join_hot_key_fraction']),
+                salt_buckets=int(args['join_salt_buckets'])
+            )
+            print(f"Segment join plan exchanges: {count_exchange_nodes(sales_final_df)}")
+
+            sales_final_df = materialization.materialize("sales_final", sales_final_df)
+            records_processed = materialization.row_count("sales_final")
+            materialization.release("sales_with_metrics")
+            materialization.release("sales_raw")
+            join_stage['rows'] = records_processed
+
+        print(f"Transformed sales records count: {records_processed}")
+
+        with stages.stage("layout"):
+            # Size output files per sales_year/sales_month partition
+            sales_output_df, max_records_per_file = size_output_files(
+                sales_final_df,
+                SALES_PARTITION_KEYS,
+                records_processed,
+                target_file_bytes=int(float(args['target_file_size_mb']) * 1024 * 1024)
+            )
+
+            # Sort within files on the query keys so row-group statistics can skip data
+            sales_output_df = cluster_within_partitions(
+                sales_output_df,
+                SALES_PARTITION_KEYS,
+                parse_keys(args['cluster_sort_keys']),
+                zorder_keys=parse_keys(args['cluster_zorder_keys']),
+                sample_df=sales_final_df,
+                total_rows=records_processed
+            )
+
+        with stages.stage("write") as write_stage:
+            # Write partitioned data to S3
+            customer_segments_output_path = f"s3://{args['processed_data_bucket']}/customer_segments/"
+
+            # Single write per output; the sink registers processed_sales and its partitions
+            sales_sink = CatalogParquetSink(
+                glueContext,
+                glue,
+                args['database_name'],
+                "processed_sales",
+                output_path,
+                SALES_PARTITION_KEYS,
+                row_group_bytes=int(float(args['parquet_row_group_mb']) * 1024 * 1024)
+            )
+
+            sales_sink.ensure_table(sales_output_df)
+
+            # Partitions written by this run; the rollups rebuild the same ones
+            sales_partitions = collect_partitions(sales_final_df, SALES_PARTITION_KEYS)
+
+            # The sales output, the segments output and the segment summary read only
+            # cached frames and do not depend on each other, so they run concurrently.
+            # Both modes replace the partitions they hold instead of appending: a full run
+            # rereads the whole raw prefix, so appending would add another copy of every sale.
+            # Segments cover every customer in both modes and are replaced as a whole
+            actions.submit(
+                "sales_output",
+                sales_sink.overwrite_partitions,
+                sales_output_df,
+                partitions=sales_partitions,
+                max_records_per_file=max_records_per_file
+            )
+            actions.submit("segments_output", customer_segments_df.write.mode("overwrite").parquet,
+                           customer_segments_output_path)
+
+            actions.submit("segment_counts", lambda: {
+                segment_row['customer_segment']: segment_row['count']
+                for segment_row in customer_segments_df.groupBy("customer_segment").count().collect()
+            })
+            segment_counts = actions.run_all()['segment_counts']
+
+            if not incremental:
+                # Bootstrap the aggregate state from the full history read by this run
+                monthly_totals_df = monthly_totals(sales_final_df)
+
+            write_stage['rows'] = records_processed
+
+        if as_bool(args['build_rollups']):
+            with stages.stage("rollups") as rollups_stage:
+                # Pre-aggregated tables for dashboard queries, rebuilt only for the
+                # partitions this run wrote since those hold every row of the month
+                customers_df = latest_customers(
+                    spark,
+                    f"s3://{args['processed_data_bucket']}/customers/",
+                    ["customer_id"] + CUSTOMER_ATTRIBUTES
+                )
+                rollup_frames = build_rollups(sales_final_df, SALES_ROLLUPS, materialization, customers_df)
+
+                for rollup in SALES_ROLLUPS:
+                    rollup_sink = CatalogParquetSink(
+                        glueContext,
+                        glue,
+                        args['database_name'],
+                        rollup['name'],
+                        f"s3://{args['processed_data_bucket']}/rollups/{rollup['name']}/",
+                        rollup['partition_keys']
+                    )
+                    actions.submit(rollup['name'], write_rollup, rollup_sink, rollup_frames[rollup['name']], sales_partitions)
+                actions.run_all()
+                rollups_stage['rows'] = len(sales_partitions)
+
+        with stages.stage("aggregate_state"):
+            # Persist the state only after the output is written. A single table under one
+            # pointer: a retry before the watermark advances rewrites the same months
+            state_store.write("customer_monthly_totals", monthly_totals_df)
+
+        # Send success metrics
+        success_details = {
+            'job_name': args['JOB_NAME'],
+            'status': 'SUCCESS',
+            'records_processed': records_processed,
+            'data_quality': data_quality,
+            'customer_segments': segment_counts,
+            'output_path': output_path,
+            'completion_time': datetime.now().isoformat(),
+            'stage_metrics': stages.summary()
+        }
+
+        events.publish("ETL Job Completed", success_details)
+
+        print(f"Sales ETL job completed successfully. Records processed: {records_processed}")
+
+        # Advance the watermark and job bookmark only once output and state are both written
+        source_watermark.advance(new_objects)
+        job.commit()
+        return success_details
+
+    except Exception as e:
+        print(f"Error in Sales ETL job: {str(e)}")
+
+        failure_details = {
+            'job_name': args['JOB_NAME'],
+            'status': 'FAILED',
+            'error_message': str(e),
+            'failure_time': datetime.now().isoformat(),
+            'stage_metrics': stages.summary()
+        }
+
+        events.publish("ETL Job Failed", failure_details)
+        raise e
+
+    finally:
+        materialization.release_all()
+        events.flush()
+
+def main():
+    """Glue entry point: resolve the job arguments, build the contexts and clients, run"""
+    args = getResolvedOptions(sys.argv, JOB_ARGS)
+    args.update(get_optional_args(sys.argv, OPTIONAL_ARGS))
+
+    # Initialize contexts
+    sc = SparkContext()
+    glueContext = GlueContext(sc)
+    job = Job(glueContext)
+    job.init(args['JOB_NAME'], args)
+
+    # Initialize AWS services; custom events are sent to EventBridge in batches
+    events = EventPublisher(boto3.client('events'), 'custom.glue.etl')
+
+    run_sales_etl(args, glueContext, job, boto3.client('s3'), boto3.client('glue'), events)
+
+if __name__ == '__main__':
+    main()
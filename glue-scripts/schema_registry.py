@@ -0,0 +1,89 @@
+# glue-scripts/schema_registry.py
+from pyspark.sql import functions as F
+from pyspark.sql.types import *
+
+CORRUPT_RECORD_COLUMN = "_corrupt_record"
+
+# Raw CSV layouts as delivered to the raw bucket
+CUSTOMER_RAW_SCHEMA = StructType([
+    StructField("customer_id", StringType(), True),
+    StructField("first_name", StringType(), True),
+    StructField("last_name", StringType(), True),
+    StructField("email", StringType(), True),
+    StructField("phone", StringType(), True),
+    StructField("age", IntegerType(), True),
+    StructField("city", StringType(), True),
+    StructField("state", StringType(), True),
+    StructField("registration_date", DateType(), True)
+])
+
+SALES_RAW_SCHEMA = StructType([
+    StructField("sale_id", StringType(), True),
+    StructField("customer_id", StringType(), True),
+    StructField("product_id", StringType(), True),
+    StructField("product_name", StringType(), True),
+    StructField("amount", DoubleType(), True),
+    StructField("sale_date", DateType(), True)
+])
+
+RAW_SCHEMAS = {
+    'customers': CUSTOMER_RAW_SCHEMA,
+    'sales': SALES_RAW_SCHEMA
+}
+
+CSV_READ_OPTIONS = {
+    'header': 'true',
+    'sep': ',',
+    'quote': '"',
+    'dateFormat': 'yyyy-MM-dd',
+    'mode': 'PERMISSIVE',
+    'columnNameOfCorruptRecord': CORRUPT_RECORD_COLUMN
+}
+
+
+def source_read_options(args):
+    """CSV reader overrides from the format the orchestrator detected in the input files"""
+    options = {}
+    for argument, option in (('source_delimiter', 'sep'), ('source_quote', 'quote'), ('source_encoding', 'encoding')):
+        if args.get(argument):
+            options[option] = args[argument]
+    return options
+
+
+def read_typed_csv(spark, paths, schema, materialization, name, bad_records_path=None, read_options=None):
+    """
+    Parse CSV files against a pinned schema in a single pass
+
+    Rows that do not fit the schema are diverted to bad_records_path as
+    their raw text instead of failing the job or turning into nulls.
+    read_options override the default CSV options, e.g. the delimiter.
+    Returns the well-formed rows and the number of bad records.
+    """
+    if not paths:
+        print(f"No input files for {name}")
+        return spark.createDataFrame([], schema), 0
+
+    reader_schema = StructType(schema.fields + [StructField(CORRUPT_RECORD_COLUMN, StringType(), True)])
+    parsed_df = spark.read \
+        .schema(reader_schema) \
+        .options(**dict(CSV_READ_OPTIONS, **(read_options or {}))) \
+        .csv(paths)
+
+    # Spark only allows filtering on the corrupt record column of a cached scan;
+    # caching also lets profiling and transformations reuse the parse
+    parsed_df = materialization.materialize(name, parsed_df)
+
+    bad_records_df = parsed_df \
+        .filter(F.col(CORRUPT_RECORD_COLUMN).isNotNull()) \
+        .select(CORRUPT_RECORD_COLUMN)
+    bad_record_count = bad_records_df.count()
+
+    if bad_record_count and bad_records_path:
+        print(f"Writing {bad_record_count} bad {name} records to {bad_records_path}")
+        bad_records_df.write.mode("append").text(bad_records_path)
+
+    good_df = parsed_df \
+        .filter(F.col(CORRUPT_RECORD_COLUMN).isNull()) \
+        .drop(CORRUPT_RECORD_COLUMN)
+
+    return good_df, bad_record_count
@@ -0,0 +1,143 @@
+# glue-scripts/source_listing.py
+import json
+from datetime import datetime
+
+
+def list_objects(s3_client, bucket, prefix, modified_after=None):
+    """List data objects under a prefix, optionally only those modified after a watermark"""
+    objects = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            # Skip folder placeholders and empty uploads
+            if obj['Key'].endswith('/') or obj['Size'] == 0:
+                continue
+            if modified_after and obj['LastModified'] <= modified_after:
+                continue
+
+            objects.append({
+                'key': obj['Key'],
+                'size': obj['Size'],
+                'last_modified': obj['LastModified']
+            })
+
+    return objects
+
+
+def describe_objects(s3_client, bucket, keys):
+    """Look up size and last-modified time for explicit keys, skipping missing and empty objects"""
+    objects = []
+
+    for key in dict.fromkeys(keys):
+        try:
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+        except s3_client.exceptions.ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                print(f"Skipping missing source object s3://{bucket}/{key}")
+                continue
+            raise
+
+        if key.endswith('/') or head['ContentLength'] == 0:
+            continue
+
+        objects.append({
+            'key': key,
+            'size': head['ContentLength'],
+            'last_modified': head['LastModified']
+        })
+
+    return objects
+
+
+def parse_s3_path(path):
+    """Split an s3://bucket/key path into bucket and key"""
+    if not path.startswith('s3://'):
+        raise ValueError(f"Not an S3 path: {path}")
+    bucket, _, key = path[len('s3://'):].partition('/')
+    return bucket, key
+
+
+def read_manifest(s3_client, manifest_path):
+    """Load a manifest file: {"bucket": ..., "keys": [...]}"""
+    bucket, key = parse_s3_path(manifest_path)
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    return json.loads(response['Body'].read().decode('utf-8'))
+
+
+def manifest_keys(s3_client, args, prefix):
+    """
+    Object keys handed to the job by the orchestrator, None when the job should list
+
+    A manifest file (--manifest_path) wins over inline keys (--source_keys,
+    a JSON list) which win over the single --source_key of a per-object
+    trigger. Keys outside prefix are ignored so a job never reads another
+    job's data.
+    """
+    bucket = args.get('source_bucket') or args['raw_data_bucket']
+
+    if args.get('manifest_path'):
+        manifest = read_manifest(s3_client, args['manifest_path'])
+        bucket, keys = manifest.get('bucket', bucket), manifest.get('keys', [])
+    elif args.get('source_keys'):
+        keys = json.loads(args['source_keys'])
+    elif args.get('source_key'):
+        keys = [args['source_key']]
+    else:
+        return None
+
+    return bucket, [key for key in keys if key.startswith(prefix)]
+
+
+def resolve_source_objects(s3_client, args, prefix, modified_after=None, use_manifest=True):
+    """
+    Raw objects a run should read, as (bucket, objects)
+
+    Runs started with a manifest read exactly the listed objects; otherwise
+    the prefix is listed, limited to objects newer than modified_after.
+    """
+    manifest = manifest_keys(s3_client, args, prefix) if use_manifest else None
+    if manifest is None:
+        bucket = args['raw_data_bucket']
+        return bucket, list_objects(s3_client, bucket, prefix, modified_after)
+
+    bucket, keys = manifest
+    print(f"Reading {len(keys)} objects from the run manifest")
+    return bucket, describe_objects(s3_client, bucket, keys)
+
+
+def object_paths(bucket, objects):
+    """Build s3:// paths for listed objects"""
+    return [f"s3://{bucket}/{obj['key']}" for obj in objects]
+
+
+class SourceWatermark:
+    """Last-modified watermark of the raw objects a job has already processed"""
+
+    def __init__(self, s3_client, bucket, key):
+        self.s3 = s3_client
+        self.bucket = bucket
+        self.key = key
+
+    def read(self):
+        """Return the stored watermark, None before the first successful run"""
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+        return datetime.fromisoformat(response['Body'].read().decode('utf-8').strip())
+
+    def advance(self, objects):
+        """Move the watermark forward to the newest of the processed objects"""
+        if not objects:
+            return
+
+        latest = max(obj['last_modified'] for obj in objects)
+        # Manifest runs can finish out of order; never move the watermark back
+        current = self.read()
+        if current and current >= latest:
+            return
+
+        self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=latest.isoformat().encode('utf-8'))
+        print(f"Advanced source watermark {self.key} to {latest.isoformat()}")
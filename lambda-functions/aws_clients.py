@@ -0,0 +1,43 @@
+# lambda-functions/aws_clients.py
+import os
+
+
+def client_config(**overrides):
+    """Retry and timeout settings shared by the Lambda functions' clients"""
+    from botocore.config import Config
+
+    settings = {
+        'connect_timeout': float(os.environ.get('AWS_CONNECT_TIMEOUT_SECONDS', '2')),
+        'read_timeout': float(os.environ.get('AWS_READ_TIMEOUT_SECONDS', '10')),
+        'retries': {
+            'max_attempts': int(os.environ.get('AWS_MAX_ATTEMPTS', '4')),
+            'mode': os.environ.get('AWS_RETRY_MODE', 'adaptive')
+        },
+        'tcp_keepalive': True
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+class LazyClient:
+    """
+    boto3 client created on first use and reused for the life of the container
+
+    Importing boto3 and building a client is deferred until an event needs
+    the service, so handlers that never touch it do not pay for it.
+    """
+
+    def __init__(self, service_name, client=None, **config_overrides):
+        self.service_name = service_name
+        self._client = client
+        self._config_overrides = config_overrides
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client(self.service_name, config=client_config(**self._config_overrides))
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
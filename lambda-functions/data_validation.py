@@ -1,25 +1,163 @@
+import csv
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus
+from aws_clients import LazyClient
+from file_inspector import STREAMABLE_COMPRESSIONS, inspect_object
 
-def lambda_handler(event, context):
-    # Validate incoming S3 event structure
-    records = event.get('Records', [])
-    validation_results = []
+# Raw CSV layouts; keep in step with the Spark schemas in glue-scripts/schema_registry.py.
+# The Glue readers apply the schema by position, so column order matters as well as names.
+EXPECTED_HEADERS = {
+    'customers/': ['customer_id', 'first_name', 'last_name', 'email', 'phone', 'age', 'city', 'state',
+                   'registration_date'],
+    'sales/': ['sale_id', 'customer_id', 'product_id', 'product_name', 'amount', 'sale_date']
+}
+
+# Raw file extensions the Glue CSV readers can open
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.bz2')
+
+HEADER_BYTES = int(os.environ.get('VALIDATION_HEADER_BYTES', '8192'))
+SAMPLE_CHUNKS = int(os.environ.get('VALIDATION_SAMPLE_CHUNKS', '1'))
+MAX_FILE_BYTES = int(os.environ.get('VALIDATION_MAX_FILE_BYTES', str(5 * 1024 ** 3)))
+MAX_WORKERS = int(os.environ.get('VALIDATION_MAX_WORKERS', '16'))
+
+# One pooled connection per validation thread
+s3 = LazyClient('s3', max_pool_connections=MAX_WORKERS)
 
-    for record in records:
+
+def parse_event_objects(event):
+    """Objects named by an S3 notification or an EventBridge Object Created event"""
+    objects = []
+
+    for record in event.get('Records', []):
         s3_info = record.get('s3', {})
-        bucket = s3_info.get('bucket', {}).get('name')
         key = s3_info.get('object', {}).get('key')
+        objects.append({
+            'bucket': s3_info.get('bucket', {}).get('name'),
+            # Notification keys are URL-encoded
+            'key': unquote_plus(key) if key else key,
+            'size': s3_info.get('object', {}).get('size')
+        })
+
+    detail = event.get('detail', {})
+    if event.get('detail-type') == 'Object Created':
+        objects.append({
+            'bucket': detail.get('bucket', {}).get('name'),
+            'key': detail.get('object', {}).get('key'),
+            'size': detail.get('object', {}).get('size')
+        })
+
+    return objects
+
+
+def dataset_for_key(key):
+    """Dataset prefix of a raw object key, None if no schema applies"""
+    for prefix in EXPECTED_HEADERS:
+        if key.startswith(prefix):
+            return prefix
+    return None
+
+
+def compare_header(columns, expected):
+    """Errors describing how a header row differs from the expected columns"""
+    normalized = [column.strip().lower() for column in columns]
+    errors = []
+
+    missing = [column for column in expected if column not in normalized]
+    unexpected = [column for column in normalized if column not in expected]
+    if missing:
+        errors.append(f"missing columns: {missing}")
+    if unexpected:
+        errors.append(f"unexpected columns: {unexpected}")
+    if not missing and not unexpected and normalized != expected:
+        errors.append(f"column order {normalized} differs from {expected}")
 
-        # Example validation: Check file extension
-        if key and key.endswith('.csv'):
-            result = f"File {key} in bucket {bucket} is valid."
-        else:
-            result = f"File {key} in bucket {bucket} is invalid or missing."
+    return errors
 
-        validation_results.append(result)
 
-    print("Validation Results:", validation_results)
+def validate_object(s3_client, obj, header_bytes=HEADER_BYTES, max_file_bytes=MAX_FILE_BYTES,
+                    sample_chunks=SAMPLE_CHUNKS):
+    """Validate one object from its event size and a ranged read of its header"""
+    bucket, key, size = obj.get('bucket'), obj.get('key'), obj.get('size')
+    result = {'bucket': bucket, 'key': key, 'size': size, 'dataset': None, 'valid': False, 'errors': []}
+
+    if not bucket or not key:
+        result['errors'].append("missing bucket or key")
+        return result
+
+    dataset = dataset_for_key(key)
+    result['dataset'] = dataset.rstrip('/') if dataset else None
+    if dataset is None:
+        result['errors'].append("no schema for this prefix")
+        return result
+    if not key.endswith(CSV_EXTENSIONS):
+        result['errors'].append(f"not one of {list(CSV_EXTENSIONS)}")
+        return result
+
+    # Size checks from the event need no request at all
+    if size is not None and size == 0:
+        result['errors'].append("empty file")
+        return result
+    if size is not None and size > max_file_bytes:
+        result['errors'].append(f"file of {size} bytes exceeds the {max_file_bytes} byte limit")
+        return result
+
+    try:
+        # Compressed streams are read only as far as the header needs
+        profile = inspect_object(s3_client, bucket, key, size, chunk_bytes=header_bytes, sample_chunks=sample_chunks,
+                                 max_compressed_sample_bytes=header_bytes)
+    except Exception as e:
+        result['errors'].append(f"could not read header: {str(e)}")
+        return result
+
+    header_line = profile.pop('header_line')
+    result['format'] = profile
+    if result['size'] is None:
+        result['size'] = profile['size']
+    # No compression is detected when the read returned no bytes at all
+    if profile['size'] == 0 or profile['compression'] is None:
+        result['errors'].append("empty file")
+        return result
+    if profile['compression'] not in ('none',) + STREAMABLE_COMPRESSIONS:
+        result['errors'].append(f"unsupported compression: {profile['compression']}")
+        return result
+    if header_line is None:
+        result['errors'].append(f"no header row within the first {header_bytes} bytes")
+        return result
+    if not header_line.strip():
+        result['errors'].append("empty header row")
+        return result
+
+    columns = next(csv.reader([header_line], delimiter=profile['delimiter'], quotechar=profile['quote_char']))
+    result['header'] = columns
+    result['errors'].extend(compare_header(columns, EXPECTED_HEADERS[dataset]))
+    result['valid'] = not result['errors']
+    return result
+
+
+def validate_objects(s3_client, objects, max_workers=MAX_WORKERS, **options):
+    """Validate objects concurrently with a bounded thread pool, keeping input order"""
+    if not objects:
+        return []
+    if len(objects) == 1:
+        return [validate_object(s3_client, objects[0], **options)]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(objects))) as executor:
+        return list(executor.map(lambda obj: validate_object(s3_client, obj, **options), objects))
+
+
+def lambda_handler(event, context):
+    # Validate every object named by the S3 or EventBridge event
+    results = validate_objects(s3, parse_event_objects(event))
+    invalid = [result for result in results if not result['valid']]
+
+    print("Validation Results:", json.dumps(
+        {'validated': len(results), 'invalid': [(r['key'], r['errors']) for r in invalid]}
+    ))
     return {
         "status": "Validation complete",
-        "results": validation_results
-    }
\ No newline at end of file
+        "validated": len(results),
+        "invalid": len(invalid),
+        "results": results
+    }
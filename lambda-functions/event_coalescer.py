@@ -0,0 +1,245 @@
+# lambda-functions/event_coalescer.py
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class LocalFileBatchStore:
+    """
+    Pending object keys per job kept in a local JSON file
+
+    Suitable for tests and single-container use; the file lock keeps
+    concurrent handlers in one container consistent.
+    """
+
+    def __init__(self, path, dedupe_ttl_seconds=3600):
+        self.path = path
+        self.dedupe_ttl_seconds = dedupe_ttl_seconds
+
+    @contextmanager
+    def _state(self):
+        with open(self.path, 'a+') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                content = handle.read()
+                state = json.loads(content) if content else {'pending': {}, 'dispatched': {}}
+                yield state
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def add(self, job_name, bucket, key, seen_at):
+        """Record a pending key; False if it is already pending or was recently dispatched"""
+        with self._state() as state:
+            dispatched = state['dispatched'].get(job_name, {})
+            pending = state['pending'].setdefault(job_name, {})
+            if key in pending or (key in dispatched and dispatched[key] > seen_at - self.dedupe_ttl_seconds):
+                return False
+            pending[key] = {'bucket': bucket, 'seen_at': seen_at}
+            return True
+
+    def snapshot(self, job_name):
+        """Return the pending entries for a job"""
+        with self._state() as state:
+            return dict(state['pending'].get(job_name, {}))
+
+    def pending_jobs(self):
+        """Names of jobs with pending keys"""
+        with self._state() as state:
+            return [job_name for job_name, pending in state['pending'].items() if pending]
+
+    def drain(self, job_name, now):
+        """Remove and return all pending entries for a job, remembering them as dispatched"""
+        with self._state() as state:
+            pending = state['pending'].pop(job_name, {})
+            dispatched = state['dispatched'].setdefault(job_name, {})
+            for key in pending:
+                dispatched[key] = now
+            # Forget dispatched keys once they are outside the dedupe window
+            state['dispatched'][job_name] = {
+                key: dispatched_at for key, dispatched_at in dispatched.items()
+                if dispatched_at > now - self.dedupe_ttl_seconds
+            }
+            return pending
+
+
+class DynamoDBBatchStore:
+    """
+    Pending object keys per job in a DynamoDB table keyed by (job_name, object_key)
+
+    Conditional writes reject duplicate keys and a lock item makes draining
+    a batch exclusive across concurrent Lambda invocations.
+    """
+
+    LOCK_KEY = '#lock'
+    DISPATCHED_PREFIX = '#dispatched#'
+
+    def __init__(self, dynamodb_client, table_name, dedupe_ttl_seconds=3600, lock_ttl_seconds=60):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+        self.dedupe_ttl_seconds = dedupe_ttl_seconds
+        self.lock_ttl_seconds = lock_ttl_seconds
+
+    def add(self, job_name, bucket, key, seen_at):
+        dispatched = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key={'job_name': {'S': job_name}, 'object_key': {'S': self.DISPATCHED_PREFIX + key}}
+        ).get('Item')
+        if dispatched and float(dispatched['expires_at']['N']) > seen_at:
+            return False
+
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item={
+                    'job_name': {'S': job_name},
+                    'object_key': {'S': key},
+                    'bucket': {'S': bucket},
+                    'seen_at': {'N': str(seen_at)}
+                },
+                ConditionExpression='attribute_not_exists(object_key)'
+            )
+            return True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            return False
+
+    def _query_pending(self, job_name):
+        pending = {}
+        kwargs = {
+            'TableName': self.table_name,
+            'KeyConditionExpression': 'job_name = :job_name',
+            'ExpressionAttributeValues': {':job_name': {'S': job_name}},
+            'ConsistentRead': True
+        }
+        while True:
+            response = self.dynamodb.query(**kwargs)
+            for item in response.get('Items', []):
+                key = item['object_key']['S']
+                if key.startswith('#'):
+                    continue
+                pending[key] = {'bucket': item['bucket']['S'], 'seen_at': float(item['seen_at']['N'])}
+            if 'LastEvaluatedKey' not in response:
+                return pending
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def snapshot(self, job_name):
+        return self._query_pending(job_name)
+
+    def pending_jobs(self):
+        jobs = set()
+        kwargs = {'TableName': self.table_name, 'ProjectionExpression': 'job_name, object_key'}
+        while True:
+            response = self.dynamodb.scan(**kwargs)
+            for item in response.get('Items', []):
+                if not item['object_key']['S'].startswith('#'):
+                    jobs.add(item['job_name']['S'])
+            if 'LastEvaluatedKey' not in response:
+                return sorted(jobs)
+            kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def drain(self, job_name, now):
+        lock_key = {'job_name': {'S': job_name}, 'object_key': {'S': self.LOCK_KEY}}
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item=dict(lock_key, expires_at={'N': str(int(now + self.lock_ttl_seconds))}),
+                ConditionExpression='attribute_not_exists(object_key) OR expires_at < :now',
+                ExpressionAttributeValues={':now': {'N': str(int(now))}}
+            )
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            # Another invocation is dispatching this job's batch
+            return {}
+
+        try:
+            pending = self._query_pending(job_name)
+            for key in pending:
+                self.dynamodb.delete_item(
+                    TableName=self.table_name,
+                    Key={'job_name': {'S': job_name}, 'object_key': {'S': key}}
+                )
+                self.dynamodb.put_item(
+                    TableName=self.table_name,
+                    Item={
+                        'job_name': {'S': job_name},
+                        'object_key': {'S': self.DISPATCHED_PREFIX + key},
+                        'expires_at': {'N': str(int(now + self.dedupe_ttl_seconds))}
+                    }
+                )
+            return pending
+        finally:
+            self.dynamodb.delete_item(TableName=self.table_name, Key=lock_key)
+
+
+class EventCoalescer:
+    """
+    Collect object-created events per job and release them as one batch
+
+    A batch closes when it reaches max_keys or when its oldest key has
+    waited window_seconds; flush_due() releases windows that expired
+    without further events.
+    """
+
+    def __init__(self, store, window_seconds=60, max_keys=100, clock=time.time):
+        self.store = store
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.clock = clock
+
+    def _is_due(self, pending, now):
+        if not pending:
+            return False
+        if len(pending) >= self.max_keys:
+            return True
+        oldest = min(entry['seen_at'] for entry in pending.values())
+        return now - oldest >= self.window_seconds
+
+    def _drain(self, job_name, now):
+        pending = self.store.drain(job_name, now)
+        if not pending:
+            return None
+        return {
+            'bucket': next(iter(pending.values()))['bucket'],
+            'keys': sorted(pending)
+        }
+
+    def add(self, job_name, bucket, key):
+        """Queue a key; return the released batch when this key closes it, else None"""
+        now = self.clock()
+        if not self.store.add(job_name, bucket, key, now):
+            logger.info("Skipping duplicate object %s for %s", key, job_name)
+            return None
+
+        if self._is_due(self.store.snapshot(job_name), now):
+            return self._drain(job_name, now)
+        return None
+
+    def flush_due(self, force=False):
+        """Release every batch whose window has expired (or all of them when forced)"""
+        now = self.clock()
+        batches = {}
+        for job_name in self.store.pending_jobs():
+            if force or self._is_due(self.store.snapshot(job_name), now):
+                batch = self._drain(job_name, now)
+                if batch:
+                    batches[job_name] = batch
+        return batches
+
+
+def create_batch_store():
+    """Build the batch store selected by the COALESCE_STATE_STORE environment variable"""
+    store_type = os.environ.get('COALESCE_STATE_STORE', 'local')
+    dedupe_ttl = int(os.environ.get('COALESCE_DEDUPE_TTL_SECONDS', '3600'))
+
+    if store_type == 'dynamodb':
+        from aws_clients import LazyClient
+        return DynamoDBBatchStore(LazyClient('dynamodb'), os.environ['COALESCE_TABLE_NAME'], dedupe_ttl)
+
+    return LocalFileBatchStore(os.environ.get('COALESCE_STATE_PATH', '/tmp/coalescer_state.json'), dedupe_ttl)
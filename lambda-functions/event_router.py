@@ -0,0 +1,147 @@
+# lambda-functions/event_router.py
+import fnmatch
+import json
+import os
+import re
+
+GLOB_CHARS = re.compile(r'[*?\[]')
+
+# Literal tail of a glob: the text after its last wildcard or closing bracket
+GLOB_LITERAL_TAIL = re.compile(r'[^*?\]]*$')
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'routing_rules.json')
+
+
+class RoutingRule:
+    """
+    Object key condition and the jobs it starts
+
+    A rule has any combination of prefix, suffix and glob; a key matches
+    when it satisfies all of them. Globs use fnmatch syntax, where '*'
+    also matches '/'.
+    """
+
+    def __init__(self, name, jobs, prefix=None, suffix=None, glob=None, arguments=None, order=0):
+        if not (prefix or suffix or glob):
+            raise ValueError(f"Routing rule {name} needs a prefix, suffix or glob")
+
+        self.name = name
+        self.jobs = list(jobs)
+        self.prefix = prefix
+        self.suffix = suffix
+        self.glob = glob
+        self.arguments = dict(arguments or {})
+        self.order = order
+        self._glob_pattern = re.compile(fnmatch.translate(glob)) if glob else None
+
+    @classmethod
+    def from_config(cls, config, order=0):
+        return cls(
+            config.get('name', f"rule_{order}"),
+            config['jobs'],
+            prefix=config.get('prefix'),
+            suffix=config.get('suffix'),
+            glob=config.get('glob'),
+            arguments=config.get('arguments'),
+            order=order
+        )
+
+    def literal_prefix(self):
+        """Longest text every matching key starts with"""
+        glob_prefix = GLOB_CHARS.split(self.glob, 1)[0] if self.glob else ''
+        return max(self.prefix or '', glob_prefix, key=len)
+
+    def literal_suffix(self):
+        """Longest text every matching key ends with"""
+        glob_suffix = GLOB_LITERAL_TAIL.search(self.glob).group() if self.glob and GLOB_CHARS.search(self.glob) else ''
+        return max(self.suffix or '', glob_suffix, key=len)
+
+    def matches(self, key):
+        if self.prefix and not key.startswith(self.prefix):
+            return False
+        if self.suffix and not key.endswith(self.suffix):
+            return False
+        if self._glob_pattern and not self._glob_pattern.match(key):
+            return False
+        return True
+
+
+class _Trie:
+    """Character trie mapping literal strings to the rules indexed under them"""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, text, rule):
+        node = self.root
+        for char in text:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(rule)
+
+    def walk(self, chars):
+        """Rules stored at every node along chars: those whose literal is a prefix of chars"""
+        node = self.root
+        found = list(node.get(None, []))
+        for char in chars:
+            node = node.get(char)
+            if node is None:
+                break
+            found.extend(node.get(None, []))
+        return found
+
+
+class EventRouter:
+    """
+    Rules compiled once into a prefix trie and a suffix trie
+
+    Each rule is indexed by its longest literal prefix, or failing that by
+    its longest literal suffix, so a lookup walks the key once from each
+    end and only checks the few rules found along the way. Rules with no
+    literal anchor (such as '*/daily/*') are checked on every lookup.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._prefixes = _Trie()
+        self._suffixes = _Trie()
+        self._unanchored = []
+
+        for rule in self.rules:
+            prefix = rule.literal_prefix()
+            suffix = rule.literal_suffix()
+            if prefix:
+                self._prefixes.insert(prefix, rule)
+            elif suffix:
+                self._suffixes.insert(reversed(suffix), rule)
+            else:
+                self._unanchored.append(rule)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(RoutingRule.from_config(rule, order) for order, rule in enumerate(config.get('rules', [])))
+
+    def match(self, key):
+        """Matching rules in configuration order"""
+        candidates = self._prefixes.walk(key) + self._suffixes.walk(reversed(key)) + self._unanchored
+        return sorted((rule for rule in candidates if rule.matches(key)), key=lambda rule: rule.order)
+
+    def route(self, key):
+        """Jobs to start for a key with their rule arguments; the first rule naming a job wins"""
+        routes = {}
+        for rule in self.match(key):
+            for job_name in rule.jobs:
+                routes.setdefault(job_name, rule.arguments)
+        return list(routes.items())
+
+    def job_names(self):
+        """Every job named by a rule"""
+        return sorted({job_name for rule in self.rules for job_name in rule.jobs})
+
+
+def load_routing_config(environ=os.environ):
+    """Rules from ROUTING_RULES (inline JSON), ROUTING_RULES_PATH or the bundled routing_rules.json"""
+    if environ.get('ROUTING_RULES'):
+        return json.loads(environ['ROUTING_RULES'])
+
+    with open(environ.get('ROUTING_RULES_PATH', DEFAULT_RULES_PATH)) as handle:
+        return json.load(handle)
@@ -0,0 +1,237 @@
+# lambda-functions/file_inspector.py
+import bz2
+import csv
+import zlib
+
+CHUNK_BYTES = 64 * 1024
+SNIFF_DELIMITERS = ',;\t|'
+
+# Byte order marks, longest first so UTF-32 is not mistaken for UTF-16
+BOMS = [
+    (b'\xff\xfe\x00\x00', 'utf-32-le'),
+    (b'\x00\x00\xfe\xff', 'utf-32-be'),
+    (b'\xef\xbb\xbf', 'utf-8'),
+    (b'\xff\xfe', 'utf-16-le'),
+    (b'\xfe\xff', 'utf-16-be')
+]
+
+MAGIC_NUMBERS = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bzip2'),
+    (b'PK\x03\x04', 'zip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd')
+]
+
+# Compressions whose stream can be decoded chunk by chunk here
+STREAMABLE_COMPRESSIONS = ('gzip', 'bzip2')
+
+# Charset names the Spark CSV reader expects for the detected encodings
+SPARK_ENCODINGS = {
+    'utf-8': 'UTF-8',
+    'latin-1': 'ISO-8859-1',
+    'utf-16-le': 'UTF-16LE',
+    'utf-16-be': 'UTF-16BE',
+    'utf-32-le': 'UTF-32LE',
+    'utf-32-be': 'UTF-32BE'
+}
+
+
+def content_range_total(response):
+    """Object size from the ContentRange of a ranged GET, None if absent"""
+    content_range = response.get('ContentRange') or ''
+    total = content_range.rsplit('/', 1)[-1]
+    return int(total) if total.isdigit() else None
+
+
+def iter_chunks(s3_client, bucket, key, chunk_bytes=CHUNK_BYTES, start=0, end=None):
+    """Yield an object's bytes from start to end (exclusive) as fixed-size ranged GETs"""
+    offset = start
+    while end is None or offset < end:
+        last = offset + chunk_bytes - 1
+        if end is not None:
+            last = min(last, end - 1)
+
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={offset}-{last}")
+        data = response['Body'].read()
+        if not data:
+            return
+        yield data
+
+        offset += len(data)
+        total = content_range_total(response)
+        if total is not None and offset >= total:
+            return
+
+
+def detect_compression(head, key=''):
+    """Compression from the leading magic bytes, falling back to the file extension"""
+    for magic, compression in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return compression
+    for extension, compression in (('.gz', 'gzip'), ('.bz2', 'bzip2'), ('.zip', 'zip'), ('.zst', 'zstd')):
+        if key.endswith(extension):
+            return compression
+    return 'none'
+
+
+def detect_encoding(head):
+    """(encoding, bom) of uncompressed leading bytes"""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, bom.hex()
+
+    try:
+        # A multi-byte character may be cut at the end of the sample
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:
+            return 'latin-1', None
+    return 'utf-8', None
+
+
+def decompress_chunks(chunks, compression):
+    """Yield (compressed bytes consumed, decompressed bytes) for a chunk stream"""
+    if compression == 'gzip':
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif compression == 'bzip2':
+        decompressor = bz2.BZ2Decompressor()
+    else:
+        for chunk in chunks:
+            yield len(chunk), chunk
+        return
+
+    for chunk in chunks:
+        yield len(chunk), decompressor.decompress(chunk)
+        if getattr(decompressor, 'eof', False):
+            return
+
+
+def sniff_dialect(text):
+    """(delimiter, quote character) of a CSV sample, comma and double quote when unclear"""
+    lines = text.splitlines()[:20]
+    try:
+        dialect = csv.Sniffer().sniff('\n'.join(lines), delimiters=SNIFF_DELIMITERS)
+        return dialect.delimiter, dialect.quotechar or '"'
+    except csv.Error:
+        return ',', '"'
+
+
+def newline_pattern(encoding):
+    """Byte sequence of a line feed in an encoding"""
+    return '\n'.encode(encoding.replace('-sig', ''))
+
+
+def inspect_object(s3_client, bucket, key, size=None, chunk_bytes=CHUNK_BYTES, sample_chunks=4,
+                   max_compressed_sample_bytes=4 * CHUNK_BYTES):
+    """
+    Detect the format of a raw file and estimate its row count from sampled chunks
+
+    Plain files are sampled with ranged GETs of the first chunk and a few
+    chunks spread across the object; rows are estimated from the line
+    density of the samples. Gzip and bzip2 files are decompressed as a
+    stream from the start until max_compressed_sample_bytes, and the
+    density is measured against the compressed bytes read. Nothing beyond
+    the samples is held in memory.
+    """
+    profile = {
+        'key': key,
+        'size': size,
+        'compression': None,
+        'encoding': None,
+        'bom': None,
+        'delimiter': None,
+        'quote_char': None,
+        'header_line': None,
+        'estimated_rows': None,
+        'sampled_bytes': 0
+    }
+
+    response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes=0-{chunk_bytes - 1}")
+    first = response['Body'].read()
+    if size is None:
+        size = content_range_total(response)
+        profile['size'] = size
+    if not first:
+        profile['estimated_rows'] = 0
+        return profile
+
+    # Further chunks are only fetched if a compressed stream needs them
+    chunks = _prepend(first, iter_chunks(s3_client, bucket, key, chunk_bytes, start=len(first), end=size))
+
+    compression = detect_compression(first, key)
+    profile['compression'] = compression
+
+    if compression != 'none':
+        if compression not in STREAMABLE_COMPRESSIONS:
+            return profile
+
+        # Decompress from the start: compressed streams cannot be entered at an offset
+        text_bytes = b''
+        line_feeds = 0
+        consumed = 0
+        # bzip2 releases output a block at a time; measure against the input that produced it
+        consumed_at_output = 0
+        stream = decompress_chunks(chunks, compression)
+        for compressed_bytes, data in stream:
+            consumed += compressed_bytes
+            if data:
+                consumed_at_output = consumed
+            if len(text_bytes) < chunk_bytes:
+                text_bytes += data[:chunk_bytes - len(text_bytes)]
+            line_feeds += data.count(b'\n')
+            if consumed >= max_compressed_sample_bytes and consumed_at_output:
+                break
+        profile['sampled_bytes'] = consumed
+        density = line_feeds / float(consumed_at_output or consumed)
+        complete = size is not None and consumed >= size
+    else:
+        text_bytes = first
+        profile['sampled_bytes'] = len(first)
+        complete = size is not None and len(first) >= size
+
+    encoding, bom = detect_encoding(text_bytes)
+    profile['encoding'], profile['bom'] = encoding, bom
+
+    text = text_bytes.decode(encoding + ('-sig' if encoding == 'utf-8' else ''), errors='replace')
+    if not complete:
+        # Drop the line cut off at the end of the sample
+        text = text[:text.rfind('\n') + 1]
+    profile['header_line'] = text.split('\n', 1)[0].rstrip('\r') if text else None
+    profile['delimiter'], profile['quote_char'] = sniff_dialect(text)
+
+    if size is None:
+        return profile
+
+    if compression == 'none':
+        feed = newline_pattern(encoding)
+        line_feeds = first.count(feed)
+        sampled = len(first)
+
+        # Spread the remaining samples evenly across the rest of the object
+        if not complete and sample_chunks > 1 and size > chunk_bytes:
+            stride = (size - chunk_bytes) // (sample_chunks - 1)
+            for index in range(1, sample_chunks):
+                offset = chunk_bytes + stride * index - chunk_bytes // 2
+                offset = max(chunk_bytes, min(offset, size - chunk_bytes))
+                sample = next(iter_chunks(s3_client, bucket, key, chunk_bytes, start=offset, end=offset + chunk_bytes), b'')
+                line_feeds += sample.count(feed)
+                sampled += len(sample)
+        profile['sampled_bytes'] = sampled
+        density = line_feeds / float(sampled)
+
+    if complete and compression == 'none':
+        # The sample is the whole file: count exactly
+        data_lines = [line for line in text.split('\n')[1:] if line.strip()]
+        profile['estimated_rows'] = len(data_lines)
+    elif complete:
+        profile['estimated_rows'] = max(0, line_feeds - 1)
+    else:
+        profile['estimated_rows'] = max(0, int(round(density * size)) - 1)
+
+    return profile
+
+
+def _prepend(first, chunks):
+    yield first
+    for chunk in chunks:
+        yield chunk
@@ -1,19 +1,132 @@
 # lambda-functions/glue_job_orchestrator.py
 import json
-import boto3
+import logging
 import os
+import uuid
 from datetime import datetime
+from aws_clients import LazyClient
+from event_coalescer import EventCoalescer, create_batch_store
+from job_state_tracker import JobStateTracker, create_state_backend
+from glue_run_scheduler import GlueRunScheduler, JobRunQueue
+from event_publisher import EventPublisher
+from event_router import EventRouter, load_routing_config
+from sqs_ingest import group_records, is_sqs_batch
+from file_inspector import SPARK_ENCODINGS, inspect_object
+from worker_sizing import WorkerSizer, load_sizing_config, object_bytes, prefix_bytes
 
-glue = boto3.client('glue')
-eventbridge = boto3.client('events')
+# The Lambda runtime attaches its handler to the root logger; LOG_LEVEL gates all modules
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
+# Clients are created on first use and reused across warm invocations
+glue = LazyClient('glue')
+eventbridge = LazyClient('events')
+s3 = LazyClient('s3')
+
+# Events are buffered and sent in batches when the handler finishes
+events = EventPublisher(eventbridge, 'custom.lambda.orchestrator')
+
+# Bucket for run manifests; without it batch keys are passed inline as --source_keys
+MANIFEST_BUCKET = os.environ.get('MANIFEST_BUCKET', '')
+
+# Sample the input objects of each run for format and size hints passed to the job
+INSPECT_SOURCE_FILES = os.environ.get('INSPECT_SOURCE_FILES', 'true').lower() == 'true'
+INSPECT_MAX_OBJECTS = int(os.environ.get('INSPECT_MAX_OBJECTS', '3'))
+INSPECT_SAMPLE_CHUNKS = int(os.environ.get('INSPECT_SAMPLE_CHUNKS', '3'))
+
+# Pick worker type, worker count and execution class per run from the size of its input
+ADAPTIVE_WORKER_SIZING = os.environ.get('ADAPTIVE_WORKER_SIZING', 'true').lower() == 'true'
+
+# 'immediate' starts a run per object; 'coalesce' batches object-created events per job
+TRIGGER_MODE = os.environ.get('TRIGGER_MODE', 'immediate')
+
+coalescer = None
+if TRIGGER_MODE == 'coalesce':
+    coalescer = EventCoalescer(
+        create_batch_store(),
+        window_seconds=int(os.environ.get('COALESCE_WINDOW_SECONDS', '60')),
+        max_keys=int(os.environ.get('COALESCE_MAX_KEYS', '100'))
+    )
+
+PIPELINE_JOBS = ['customer-data-etl', 'sales-data-etl', 'data-quality-check', 'partition-compaction']
+
+def build_routing_table(environ=os.environ):
+    """Resolve deployed job and workflow names once per container"""
+    project_name = environ.get('PROJECT_NAME', 'data-pipeline')
+    environment = environ.get('ENVIRONMENT', 'dev')
+    deployed_jobs = json.loads(environ.get('GLUE_JOB_NAMES', '[]'))
+    
+    def resolve(job_name):
+        default_name = f"{project_name}-{job_name}-{environment}"
+        if default_name in deployed_jobs:
+            return default_name
+        # Terraform passes the deployed names; prefer them over the naming convention
+        matches = [name for name in deployed_jobs if f"-{job_name}-" in name]
+        return matches[0] if matches else default_name
+    
+    jobs = {job_name: resolve(job_name) for job_name in PIPELINE_JOBS}
+    
+    # S3 routing rules name jobs by their short name; compile them against the deployed names
+    routing_config = load_routing_config(environ)
+    for rule in routing_config.get('rules', []):
+        rule['jobs'] = [jobs.get(job_name) or resolve(job_name) for job_name in rule['jobs']]
+    
+    return {
+        'jobs': jobs,
+        'router': EventRouter.from_config(routing_config),
+        'workflow': environ.get('MAIN_WORKFLOW_NAME') or f"{project_name}-main-workflow-{environment}"
+    }
+
+ROUTING = build_routing_table()
+
+def rule_arguments(job_name, object_key):
+    """Job arguments of the routing rule that sends object_key to job_name"""
+    for routed_job, arguments in ROUTING['router'].route(object_key):
+        if routed_job == job_name:
+            return arguments
+    return {}
+
+# The quality job runs once both ETL jobs have succeeded since its last run
+QUALITY_JOB_NAME = ROUTING['jobs']['data-quality-check']
+
+state_backend = create_state_backend()
+
+job_state_tracker = JobStateTracker(state_backend, {
+    QUALITY_JOB_NAME: [ROUTING['jobs']['customer-data-etl'], ROUTING['jobs']['sales-data-etl']]
+})
+
+# Runs beyond a job's MaxConcurrentRuns wait in the same backend until a run finishes
+run_scheduler = GlueRunScheduler(
+    glue,
+    JobRunQueue(state_backend),
+    max_attempts=int(os.environ.get('START_RUN_MAX_ATTEMPTS', '4'))
+)
+
+# Sizing settings name jobs by their short name, like the routing rules
+SIZING_CONFIG = load_sizing_config()
+worker_sizer = WorkerSizer(state_backend, {
+    'defaults': SIZING_CONFIG.get('defaults', {}),
+    'jobs': {ROUTING['jobs'].get(job_name, job_name): settings
+             for job_name, settings in SIZING_CONFIG.get('jobs', {}).items()}
+})
+
+TERMINAL_RUN_STATES = ('SUCCEEDED', 'FAILED', 'STOPPED', 'TIMEOUT', 'ERROR')
 
 def lambda_handler(event, context):
     """
     Orchestrate Glue jobs based on EventBridge events
     """
     
+    # Queued S3 events report failures per message; an unexpected error fails the whole batch
+    if is_sqs_batch(event):
+        try:
+            return handle_sqs_batch(event['Records'])
+        finally:
+            events.flush()
+    
     try:
-        print(f"Received event: {json.dumps(event)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received event: %s", json.dumps(event))
         
         # Parse the event
         event_source = event.get('source', '')
@@ -25,43 +138,65 @@ def lambda_handler(event, context):
             'orchestration_results': []
         }
         
+        # An object routed to several jobs is inspected once per invocation
+        source_profiles = {}
+        
         # Handle S3 object created events
         if event_source == 'aws.s3' and event_detail_type == 'Object Created':
             bucket_name = event_detail.get('bucket', {}).get('name', '')
             object_key = event_detail.get('object', {}).get('key', '')
             
-            print(f"Processing S3 event: {bucket_name}/{object_key}")
-            
-            # Determine which ETL jobs to trigger based on object path
-            jobs_to_trigger = []
-            
-            if 'customers/' in object_key:
-                jobs_to_trigger.append('customer-data-etl')
-            elif 'sales/' in object_key:
-                jobs_to_trigger.append('sales-data-etl')
+            logger.info("Processing S3 event: %s/%s", bucket_name, object_key)
             
-            # Trigger appropriate Glue jobs
-            for job_name in jobs_to_trigger:
-                full_job_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-{job_name}-{os.environ.get('ENVIRONMENT', 'dev')}"
+            # Trigger the ETL jobs the routing rules select for the object key
+            for full_job_name, arguments in ROUTING['router'].route(object_key):
+                if coalescer:
+                    # Hold the key until the job's batch window closes
+                    batch = coalescer.add(full_job_name, bucket_name, object_key)
+                    if batch:
+                        response['orchestration_results'].append(start_batch_job(full_job_name, batch, source_profiles))
+                    else:
+                        response['orchestration_results'].append({
+                            'job_name': full_job_name,
+                            'object_key': object_key,
+                            'status': 'QUEUED'
+                        })
+                    continue
                 
-                job_run_response = start_glue_job(full_job_name, {
+                run_arguments = dict(arguments, **{
                     'trigger_event': 'S3_OBJECT_CREATED',
                     'source_bucket': bucket_name,
                     'source_key': object_key
-                })
+                }, **source_profile_arguments(bucket_name, [object_key], source_profiles))
+                input_arguments, run_options = size_run(
+                    full_job_name, bucket_name, [object_key], run_arguments,
+                    known_bytes=event_detail.get('object', {}).get('size')
+                )
+                run_arguments.update(input_arguments)
+                
+                job_run_response = start_glue_job(full_job_name, run_arguments, run_options)
                 
                 response['orchestration_results'].append({
                     'job_name': full_job_name,
-                    'job_run_id': job_run_response.get('JobRunId'),
-                    'status': 'STARTED'
+                    'job_run_id': job_run_response['job_run_id'],
+                    'status': job_run_response['status']
                 })
         
+        # Release coalesced batches whose window expired without further events
+        elif event_source == 'custom.orchestrator' and event_detail_type == 'Coalescer Flush':
+            if coalescer:
+                for job_name, batch in coalescer.flush_due().items():
+                    response['orchestration_results'].append(start_batch_job(job_name, batch, source_profiles))
+            
+            # Pick up queued runs whose completion event was missed
+            response['orchestration_results'].extend(run_scheduler.drain_all(list(ROUTING['jobs'].values())))
+        
         # Handle scheduled events
         elif event_source == 'aws.events' and 'Scheduled Event' in event.get('resources', [''])[0]:
-            print("Processing scheduled event")
+            logger.info("Processing scheduled event")
             
             # Start the main workflow
-            workflow_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-main-workflow-{os.environ.get('ENVIRONMENT', 'dev')}"
+            workflow_name = ROUTING['workflow']
             
             try:
                 workflow_response = glue.start_workflow_run(Name=workflow_name)
@@ -73,7 +208,7 @@ def lambda_handler(event, context):
                 })
                 
             except Exception as workflow_error:
-                print(f"Failed to start workflow: {str(workflow_error)}")
+                logger.error("Failed to start workflow: %s", workflow_error)
                 response['orchestration_results'].append({
                     'workflow_name': workflow_name,
                     'status': 'FAILED',
@@ -86,7 +221,7 @@ def lambda_handler(event, context):
             job_run_id = event_detail.get('jobRunId', '')
             job_state = event_detail.get('state', '')
             
-            print(f"Glue job {job_name} changed state to {job_state}")
+            logger.info("Glue job %s changed state to %s", job_name, job_state)
             
             # Handle job completion logic
             if job_state == 'SUCCEEDED':
@@ -100,6 +235,10 @@ def lambda_handler(event, context):
                 'state': job_state,
                 'processed': True
             })
+            
+            # A finished run frees a concurrency slot for the next queued run
+            if job_state in TERMINAL_RUN_STATES:
+                response['orchestration_results'].extend(run_scheduler.drain(job_name))
         
         # Send orchestration completion event
         send_orchestration_event({
@@ -111,7 +250,7 @@ def lambda_handler(event, context):
         return response
         
     except Exception as e:
-        print(f"Error in orchestration: {str(e)}")
+        logger.error("Error in orchestration: %s", e)
         
         # Send failure event
         send_orchestration_event({
@@ -125,37 +264,184 @@ def lambda_handler(event, context):
             'statusCode': 500,
             'error': str(e)
         }
+    
+    finally:
+        events.flush()
+
+def handle_sqs_batch(records):
+    """Start one Glue run per target job for a batch of queued S3 events"""
+    groups, malformed = group_records(
+        records, lambda object_key: [job_name for job_name, _ in ROUTING['router'].route(object_key)]
+    )
+    
+    # Redelivering a message that cannot be parsed would never succeed
+    for message_id in malformed:
+        logger.warning("Dropping malformed message %s", message_id)
+    
+    results = []
+    failed_message_ids = []
+    source_profiles = {}
+    
+    for (job_name, bucket), group in groups.items():
+        try:
+            results.append(start_batch_job(job_name, group, source_profiles))
+        except Exception as e:
+            logger.error("Failed to start %s for %d queued objects: %s", job_name, len(group['keys']), e)
+            failed_message_ids.extend(
+                message_id for message_id in group['message_ids'] if message_id not in failed_message_ids
+            )
+            results.append({
+                'job_name': job_name,
+                'object_count': len(group['keys']),
+                'status': 'FAILED',
+                'error': str(e)
+            })
+    
+    send_orchestration_event({
+        'orchestration_timestamp': datetime.now().isoformat(),
+        'event_processed': 'SQS Batch',
+        'messages': len(records),
+        'results': results
+    })
+    
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failed_message_ids]}
 
-def start_glue_job(job_name, arguments=None):
-    """Start a Glue job with optional arguments"""
+def start_glue_job(job_name, arguments=None, run_options=None):
+    """Start a Glue job with optional arguments, queueing it when the job is at its concurrency limit"""
     try:
         job_args = arguments or {}
         
-        response = glue.start_job_run(
-            JobName=job_name,
-            Arguments={f'--{k}': v for k, v in job_args.items()}
-        )
-        
-        print(f"Started Glue job {job_name} with run ID: {response['JobRunId']}")
-        return response
+        return run_scheduler.submit(job_name, {f'--{k}': v for k, v in job_args.items()}, run_options)
         
     except Exception as e:
-        print(f"Failed to start Glue job {job_name}: {str(e)}")
+        logger.error("Failed to start Glue job %s: %s", job_name, e)
         raise e
 
+def source_profile_arguments(bucket, keys, source_profiles=None):
+    """
+    Read options and size estimates for a run, from a sample of its input objects
+    
+    source_profiles caches inspections by (bucket, key) across the runs
+    started by one invocation, so each object is sampled once.
+    """
+    if not INSPECT_SOURCE_FILES or not keys:
+        return {}
+    
+    source_profiles = {} if source_profiles is None else source_profiles
+    try:
+        profiles = []
+        for key in keys[:INSPECT_MAX_OBJECTS]:
+            if (bucket, key) not in source_profiles:
+                source_profiles[(bucket, key)] = inspect_object(s3, bucket, key, sample_chunks=INSPECT_SAMPLE_CHUNKS)
+            profiles.append(source_profiles[(bucket, key)])
+    except Exception as e:
+        # Hints are optional; the job falls back to its default read options
+        logger.warning("Could not inspect source objects in %s: %s", bucket, e)
+        return {}
+    
+    readable = [profile for profile in profiles if profile['delimiter']]
+    if not readable:
+        return {}
+    
+    # Extrapolate from the sampled objects to the whole run
+    scale = len(keys) / float(len(profiles))
+    first = readable[0]
+    return {
+        'source_delimiter': first['delimiter'],
+        'source_quote': first['quote_char'],
+        'source_encoding': SPARK_ENCODINGS.get(first['encoding'], 'UTF-8'),
+        'source_compression': first['compression'],
+        'estimated_source_rows': str(int(sum(profile['estimated_rows'] or 0 for profile in profiles) * scale)),
+        'estimated_source_bytes': str(int(sum(profile['size'] or 0 for profile in profiles) * scale))
+    }
+
+def size_run(job_name, bucket, keys, arguments, known_bytes=None):
+    """
+    Input size argument and capacity options for a run
+    
+    Returns ({'input_bytes': ...}, run options for start_job_run). Jobs
+    that rebuild from a whole prefix outside incremental mode are sized
+    by that prefix rather than by the new objects; the mode comes from the
+    run arguments, else from the job's default arguments. Both are empty when
+    sizing is off or the input cannot be measured, so the run keeps the
+    capacity of the job definition.
+    """
+    if not ADAPTIVE_WORKER_SIZING or not keys:
+        return {}, {}
+    
+    try:
+        settings = worker_sizer.settings(job_name)
+        processing_mode = arguments.get('processing_mode') or \
+            run_scheduler.default_arguments(job_name).get('--processing_mode', 'full')
+        if settings['full_read_prefix'] and processing_mode != 'incremental':
+            input_bytes = prefix_bytes(s3, bucket, settings['full_read_prefix'])
+        elif known_bytes is not None and len(keys) == 1:
+            # Object-created events carry the size; no request needed
+            input_bytes = int(known_bytes)
+        else:
+            input_bytes = object_bytes(s3, bucket, keys)
+        
+        return {'input_bytes': str(input_bytes)}, worker_sizer.choose(job_name, input_bytes)
+    
+    except Exception as e:
+        logger.warning("Could not size %s, keeping the job's default capacity: %s", job_name, e)
+        return {}, {}
+
+def write_manifest(job_name, bucket, keys):
+    """Write the object keys of a run to S3 and return the manifest path"""
+    manifest_key = f"_manifests/{job_name}/{datetime.now().strftime('%Y/%m/%d/%H%M%S')}-{uuid.uuid4().hex[:8]}.json"
+    
+    s3.put_object(
+        Bucket=MANIFEST_BUCKET,
+        Key=manifest_key,
+        Body=json.dumps({'bucket': bucket, 'keys': keys}).encode('utf-8'),
+        ContentType='application/json'
+    )
+    
+    return f"s3://{MANIFEST_BUCKET}/{manifest_key}"
+
+def start_batch_job(job_name, batch, source_profiles=None):
+    """Start one Glue run for a coalesced batch of new object keys"""
+    arguments = dict(rule_arguments(job_name, batch['keys'][0]), **{
+        'trigger_event': 'S3_OBJECT_CREATED_BATCH',
+        'source_bucket': batch['bucket']
+    })
+    
+    arguments.update(source_profile_arguments(batch['bucket'], batch['keys'], source_profiles))
+    
+    input_arguments, run_options = size_run(job_name, batch['bucket'], batch['keys'], arguments)
+    arguments.update(input_arguments)
+    
+    if MANIFEST_BUCKET:
+        arguments['manifest_path'] = write_manifest(job_name, batch['bucket'], batch['keys'])
+    else:
+        arguments['source_keys'] = json.dumps(batch['keys'])
+    
+    job_run_response = start_glue_job(job_name, arguments, run_options)
+    
+    logger.info("Submitted %s for a batch of %d objects: %s", job_name, len(batch['keys']), job_run_response['status'])
+    return {
+        'job_name': job_name,
+        'job_run_id': job_run_response['job_run_id'],
+        'object_count': len(batch['keys']),
+        'status': job_run_response['status']
+    }
+
 def handle_job_success(job_name, job_run_id, job_details):
     """Handle successful job completion"""
-    print(f"Job {job_name} completed successfully")
+    logger.info("Job %s completed successfully", job_name)
     
     # Get job run details
     try:
-        job_run_details = glue.get_job_run(JobName=job_name, RunId=job_run_id)
-        execution_time = job_run_details['JobRun'].get('ExecutionTime', 0)
+        job_run = glue.get_job_run(JobName=job_name, RunId=job_run_id)['JobRun']
+        execution_time = job_run.get('ExecutionTime', 0)
         
-        # Trigger downstream jobs if needed
-        if 'customer-data-etl' in job_name or 'sales-data-etl' in job_name:
-            # Check if both customer and sales ETL jobs are complete
-            check_and_trigger_quality_job()
+        # Trigger downstream jobs whose dependencies are now all complete
+        check_and_trigger_quality_job(job_name, job_run_id)
+        
+        # Duration against input size of sized runs feeds the next sizing decisions
+        if ADAPTIVE_WORKER_SIZING:
+            worker_sizer.record_run(job_name, job_run)
         
         # Send success metrics
         send_job_metrics({
@@ -163,15 +449,19 @@ def handle_job_success(job_name, job_run_id, job_details):
             'job_run_id': job_run_id,
             'status': 'SUCCESS',
             'execution_time_seconds': execution_time,
+            'input_bytes': (job_run.get('Arguments') or {}).get('--input_bytes'),
+            'worker_type': job_run.get('WorkerType'),
+            'number_of_workers': job_run.get('NumberOfWorkers'),
+            'execution_class': job_run.get('ExecutionClass'),
             'completion_timestamp': datetime.now().isoformat()
         })
         
     except Exception as e:
-        print(f"Error handling job success for {job_name}: {str(e)}")
+        logger.error("Error handling job success for %s: %s", job_name, e)
 
 def handle_job_failure(job_name, job_run_id, job_details):
     """Handle job failure"""
-    print(f"Job {job_name} failed")
+    logger.info("Job %s failed", job_name)
     
     try:
         job_run_details = glue.get_job_run(JobName=job_name, RunId=job_run_id)
@@ -186,62 +476,29 @@ def handle_job_failure(job_name, job_run_id, job_details):
         })
         
     except Exception as e:
-        print(f"Error handling job failure for {job_name}: {str(e)}")
+        logger.error("Error handling job failure for %s: %s", job_name, e)
 
-def check_and_trigger_quality_job():
-    """Check if both ETL jobs are complete and trigger quality job"""
+def check_and_trigger_quality_job(job_name, job_run_id):
+    """Record an ETL completion and trigger the quality job once both ETL jobs are complete"""
     try:
-        # This is a simplified check - in production, you'd want to track job states
-        quality_job_name = f"{os.environ.get('PROJECT_NAME', 'data-pipeline')}-data-quality-check-{os.environ.get('ENVIRONMENT', 'dev')}"
-        
-        start_glue_job(quality_job_name, {
-            'trigger_reason': 'ETL_JOBS_COMPLETED'
-        })
+        for downstream_job, cycle, upstream_runs in job_state_tracker.record_success(job_name, job_run_id):
+            start_glue_job(downstream_job, {
+                'trigger_reason': 'ETL_JOBS_COMPLETED',
+                'dependency_cycle': str(cycle),
+                'upstream_runs': json.dumps(upstream_runs)
+            })
         
     except Exception as e:
-        print(f"Failed to trigger quality job: {str(e)}")
+        logger.error("Failed to trigger quality job: %s", e)
 
 def send_orchestration_event(details):
-    """Send orchestration event to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.orchestrator',
-                    'DetailType': 'Job Orchestration',
-                    'Detail': json.dumps(details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send orchestration event: {str(e)}")
+    """Queue orchestration event for EventBridge"""
+    events.publish('Job Orchestration', details, source='custom.lambda.orchestrator')
 
 def send_job_metrics(metrics):
-    """Send job metrics to EventBridge"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.metrics',
-                    'DetailType': 'Job Metrics',
-                    'Detail': json.dumps(metrics)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send job metrics: {str(e)}")
+    """Queue job metrics for EventBridge"""
+    events.publish('Job Metrics', metrics, source='custom.lambda.metrics')
 
 def send_failure_notification(failure_details):
-    """Send failure notification"""
-    try:
-        eventbridge.put_events(
-            Entries=[
-                {
-                    'Source': 'custom.lambda.notifications',
-                    'DetailType': 'Job Failure Alert',
-                    'Detail': json.dumps(failure_details)
-                }
-            ]
-        )
-    except Exception as e:
-        print(f"Failed to send failure notification: {str(e)}")
\ No newline at end of file
+    """Queue failure notification for EventBridge"""
+    events.publish('Job Failure Alert', failure_details, source='custom.lambda.notifications')
\ No newline at end of file
@@ -0,0 +1,216 @@
+# lambda-functions/glue_run_scheduler.py
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY_ERRORS = ('ConcurrentRunsExceededException',)
+THROTTLING_ERRORS = (
+    'ThrottlingException',
+    'Throttling',
+    'TooManyRequestsException',
+    'OperationTimeoutException',
+    'InternalServiceException',
+    'ResourceNumberLimitExceededException'
+)
+ACTIVE_RUN_STATES = ('STARTING', 'RUNNING', 'STOPPING', 'WAITING')
+# Glue's default job timeout, plus slack for time spent queued or stopping
+DEFAULT_JOB_TIMEOUT_MINUTES = 2880
+ACTIVE_RUN_MARGIN_MINUTES = 60
+
+
+def error_code(error):
+    """AWS error code of a client exception, or its class name for other errors"""
+    response = getattr(error, 'response', None) or {}
+    return response.get('Error', {}).get('Code') or type(error).__name__
+
+
+class JobRunQueue:
+    """
+    FIFO of pending run requests per job, kept in a versioned state backend
+
+    Uses the same backends as the job state tracker; each job's queue is
+    one item updated with optimistic concurrency.
+    """
+
+    def __init__(self, backend, max_attempts=10):
+        self.backend = backend
+        self.max_attempts = max_attempts
+
+    def _key(self, job_name):
+        return f"run-queue#{job_name}"
+
+    def _update(self, job_name, change):
+        for _ in range(self.max_attempts):
+            state, version = self.backend.get(self._key(job_name))
+            requests = list((state or {}).get('requests', []))
+            result = change(requests)
+            if self.backend.put_if_version(self._key(job_name), {'requests': requests}, version):
+                return result
+        raise RuntimeError(f"Could not update the run queue of {job_name} after {self.max_attempts} attempts")
+
+    def push(self, job_name, request, front=False):
+        """Queue a request; returns the queue length"""
+        def change(requests):
+            requests.insert(0 if front else len(requests), request)
+            return len(requests)
+        return self._update(job_name, change)
+
+    def pop(self, job_name):
+        """Take the oldest request, None if the queue is empty"""
+        return self._update(job_name, lambda requests: requests.pop(0) if requests else None)
+
+    def size(self, job_name):
+        state, _ = self.backend.get(self._key(job_name))
+        return len((state or {}).get('requests', []))
+
+    def job_names(self, candidates):
+        """Jobs among candidates with queued requests"""
+        return [job_name for job_name in candidates if self.size(job_name)]
+
+
+class GlueRunScheduler:
+    """
+    Start Glue job runs within each job's concurrency limit
+
+    A run that Glue rejects because the job is at its MaxConcurrentRuns is
+    queued instead of dropped; throttling and transient service errors are
+    retried with jittered exponential backoff before the request is queued.
+    New requests queue behind older ones so runs start in arrival order,
+    and drain() starts queued runs as capacity frees up, normally when a
+    job-state-change event reports a finished run.
+    """
+
+    def __init__(self, glue_client, queue, max_attempts=4, base_delay_seconds=0.5,
+                 max_delay_seconds=8, sleep=time.sleep):
+        self.glue = glue_client
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.sleep = sleep
+        self._jobs = {}
+
+    def _job(self, job_name):
+        """Job definition, looked up once per container"""
+        if job_name not in self._jobs:
+            self._jobs[job_name] = self.glue.get_job(JobName=job_name)['Job']
+        return self._jobs[job_name]
+
+    def max_concurrent_runs(self, job_name):
+        """Concurrency limit from the job definition"""
+        return self._job(job_name).get('ExecutionProperty', {}).get('MaxConcurrentRuns', 1)
+
+    def default_arguments(self, job_name):
+        """Default arguments from the job definition, keyed with their -- prefix"""
+        return self._job(job_name).get('DefaultArguments', {})
+
+    def active_runs(self, job_name):
+        """
+        Runs of a job that currently hold a concurrency slot
+
+        get_job_runs lists the newest runs first and no run stays active past
+        the job timeout, so paging stops at the first page of finished runs
+        that reaches back beyond it instead of walking the whole history.
+        """
+        timeout_minutes = self._job(job_name).get('Timeout') or DEFAULT_JOB_TIMEOUT_MINUTES
+        oldest_active = datetime.now(timezone.utc) - timedelta(minutes=timeout_minutes + ACTIVE_RUN_MARGIN_MINUTES)
+
+        active = 0
+        kwargs = {'JobName': job_name}
+        while True:
+            response = self.glue.get_job_runs(**kwargs)
+            runs = response.get('JobRuns', [])
+            page_active = sum(1 for run in runs if run.get('JobRunState') in ACTIVE_RUN_STATES)
+            active += page_active
+            if not response.get('NextToken'):
+                return active
+            if not page_active and runs and all(
+                    run.get('StartedOn') and run['StartedOn'] < oldest_active for run in runs):
+                return active
+            kwargs['NextToken'] = response['NextToken']
+
+    def _backoff(self, attempt):
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** attempt))
+        self.sleep(random.uniform(0, delay))
+
+    def _start(self, job_name, arguments, run_options=None):
+        """Start a run; returns the run id, or None when the job has no free slot"""
+        for attempt in range(self.max_attempts):
+            try:
+                response = self.glue.start_job_run(JobName=job_name, Arguments=arguments, **(run_options or {}))
+                logger.info("Started Glue job %s with run ID: %s", job_name, response['JobRunId'])
+                return response['JobRunId']
+            except Exception as e:
+                code = error_code(e)
+                if code in CONCURRENCY_ERRORS:
+                    return None
+                if code not in THROTTLING_ERRORS:
+                    raise
+                logger.warning("Starting %s was throttled (%s, attempt %d)", job_name, code, attempt + 1)
+                if attempt + 1 < self.max_attempts:
+                    self._backoff(attempt)
+
+        # Still throttled: keep the request rather than lose it
+        return None
+
+    def submit(self, job_name, arguments, run_options=None):
+        """
+        Start a run now if the job has capacity, otherwise queue it
+
+        run_options are further start_job_run parameters, such as the
+        worker type and count; they stay with the request while it waits.
+        """
+        if self.queue.size(job_name):
+            queued = self._enqueue(job_name, arguments, run_options)
+            for run in self.drain(job_name):
+                if run['request_id'] == queued['request_id']:
+                    return run
+            return queued
+
+        job_run_id = self._start(job_name, arguments, run_options)
+        if job_run_id:
+            return {'job_name': job_name, 'job_run_id': job_run_id, 'status': 'STARTED'}
+        return self._enqueue(job_name, arguments, run_options)
+
+    def _enqueue(self, job_name, arguments, run_options=None):
+        request = {'request_id': uuid.uuid4().hex, 'arguments': arguments, 'run_options': run_options or {},
+                   'queued_at': datetime.now().isoformat()}
+        length = self.queue.push(job_name, request)
+        logger.info("Queued a run of %s (%d waiting)", job_name, length)
+        return {'job_name': job_name, 'job_run_id': None, 'status': 'QUEUED', 'queue_length': length,
+                'request_id': request['request_id']}
+
+    def drain(self, job_name):
+        """Start queued runs of a job while it has free concurrency slots"""
+        started = []
+        if not self.queue.size(job_name):
+            return started
+
+        free_slots = self.max_concurrent_runs(job_name) - self.active_runs(job_name)
+        while free_slots > 0:
+            request = self.queue.pop(job_name)
+            if request is None:
+                break
+
+            job_run_id = self._start(job_name, request['arguments'], request.get('run_options'))
+            if not job_run_id:
+                # Another caller took the slot; keep the request at the head of the queue
+                self.queue.push(job_name, request, front=True)
+                break
+
+            started.append({'job_name': job_name, 'job_run_id': job_run_id, 'status': 'STARTED',
+                            'request_id': request['request_id']})
+            free_slots -= 1
+
+        return started
+
+    def drain_all(self, job_names):
+        """Drain every job in job_names that has queued runs"""
+        started = []
+        for job_name in self.queue.job_names(job_names):
+            started.extend(self.drain(job_name))
+        return started
@@ -0,0 +1,172 @@
+# lambda-functions/job_state_tracker.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryStateBackend:
+    """Versioned state items held in process memory, for tests and local runs"""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            return (json.loads(item[1]), item[0]) if item else (None, 0)
+
+    def put_if_version(self, key, state, expected_version):
+        """Store state if the item is still at expected_version; False on a lost race"""
+        with self._lock:
+            current_version = self._items.get(key, (0, None))[0]
+            if current_version != expected_version:
+                return False
+            self._items[key] = (expected_version + 1, json.dumps(state))
+            return True
+
+
+class SQLiteStateBackend:
+    """Versioned state items in a SQLite file shared by handlers on one host"""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS job_state "
+                "(state_key TEXT PRIMARY KEY, version INTEGER NOT NULL, body TEXT NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level='IMMEDIATE')
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT body, version FROM job_state WHERE state_key = ?", (key,)
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, 0)
+
+    def put_if_version(self, key, state, expected_version):
+        body = json.dumps(state)
+        with self._connect() as connection:
+            if expected_version == 0:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO job_state (state_key, version, body) VALUES (?, 1, ?)", (key, body)
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE job_state SET version = version + 1, body = ? WHERE state_key = ? AND version = ?",
+                    (body, key, expected_version)
+                )
+            return cursor.rowcount == 1
+
+
+class DynamoDBStateBackend:
+    """Versioned state items in a DynamoDB table keyed by state_key, updated with conditional writes"""
+
+    def __init__(self, dynamodb_client, table_name):
+        self.dynamodb = dynamodb_client
+        self.table_name = table_name
+
+    def get(self, key):
+        item = self.dynamodb.get_item(
+            TableName=self.table_name,
+            Key={'state_key': {'S': key}},
+            ConsistentRead=True
+        ).get('Item')
+        if not item:
+            return None, 0
+        return json.loads(item['body']['S']), int(item['version']['N'])
+
+    def put_if_version(self, key, state, expected_version):
+        try:
+            self.dynamodb.put_item(
+                TableName=self.table_name,
+                Item={
+                    'state_key': {'S': key},
+                    'version': {'N': str(expected_version + 1)},
+                    'body': {'S': json.dumps(state)}
+                },
+                ConditionExpression='attribute_not_exists(state_key) OR version = :expected',
+                ExpressionAttributeValues={':expected': {'N': str(expected_version)}}
+            )
+            return True
+        except self.dynamodb.exceptions.ConditionalCheckFailedException:
+            return False
+
+
+class JobStateTracker:
+    """
+    Record upstream job completions and release each downstream job once per cycle
+
+    dependencies maps a downstream job to the upstream jobs it waits for.
+    Every downstream job has an open cycle collecting the successful run of
+    each upstream job; the completion that closes the cycle claims it with
+    a versioned write, so exactly one caller is told to start the downstream
+    job even when completion events race or are delivered twice.
+    """
+
+    def __init__(self, backend, dependencies, max_attempts=10):
+        self.backend = backend
+        self.dependencies = dependencies
+        self.max_attempts = max_attempts
+
+    def record_success(self, job_name, job_run_id):
+        """Record a successful run; return the downstream jobs it completed as [(job, cycle, upstream_runs)]"""
+        ready = []
+
+        for downstream, upstream_jobs in self.dependencies.items():
+            if job_name not in upstream_jobs:
+                continue
+
+            completed_cycle = self._record(downstream, upstream_jobs, job_name, job_run_id)
+            if completed_cycle:
+                ready.append((downstream,) + completed_cycle)
+
+        return ready
+
+    def _record(self, downstream, upstream_jobs, job_name, job_run_id):
+        for _ in range(self.max_attempts):
+            state, version = self.backend.get(downstream)
+            state = state or {'cycle': 1, 'completed': {}, 'last_completed': {}}
+
+            # Redelivered completion event for a run already counted
+            if job_run_id in (state['completed'].get(job_name), state['last_completed'].get(job_name)):
+                logger.info("Ignoring duplicate completion of %s run %s", job_name, job_run_id)
+                return None
+
+            completed = dict(state['completed'], **{job_name: job_run_id})
+            cycle_complete = all(job in completed for job in upstream_jobs)
+
+            if cycle_complete:
+                new_state = {'cycle': state['cycle'] + 1, 'completed': {}, 'last_completed': completed}
+            else:
+                new_state = dict(state, completed=completed)
+
+            if self.backend.put_if_version(downstream, new_state, version):
+                if cycle_complete:
+                    logger.info("All dependencies of %s completed for cycle %s: %s", downstream, state['cycle'], completed)
+                    return state['cycle'], completed
+                waiting = [job for job in upstream_jobs if job not in completed]
+                logger.info("%s cycle %s waiting for %s", downstream, state['cycle'], waiting)
+                return None
+
+        raise RuntimeError(f"Could not record completion of {job_name} for {downstream} after {self.max_attempts} attempts")
+
+
+def create_state_backend():
+    """Build the state backend selected by the JOB_STATE_STORE environment variable"""
+    store_type = os.environ.get('JOB_STATE_STORE', 'sqlite')
+
+    if store_type == 'dynamodb':
+        from aws_clients import LazyClient
+        return DynamoDBStateBackend(LazyClient('dynamodb'), os.environ['JOB_STATE_TABLE_NAME'])
+    if store_type == 'memory':
+        return InMemoryStateBackend()
+
+    return SQLiteStateBackend(os.environ.get('JOB_STATE_DB_PATH', '/tmp/job_state.db'))
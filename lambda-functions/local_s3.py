@@ -0,0 +1,96 @@
+# lambda-functions/local_s3.py
+import io
+import os
+from datetime import datetime, timezone
+
+
+class NoSuchKey(Exception):
+    """Raised like the S3 client's NoSuchKey error"""
+
+    def __init__(self, key):
+        super().__init__(f"NoSuchKey: {key}")
+        self.response = {'Error': {'Code': 'NoSuchKey', 'Message': key}}
+
+
+class LocalPaginator:
+    """Paginator over a LocalS3 listing, which always fits in one page"""
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def paginate(self, **kwargs):
+        yield self.operation(**kwargs)
+
+
+class LocalS3:
+    """
+    Directory-backed stand-in for the S3 client calls the Lambda functions make
+
+    Objects live at <root>/<bucket>/<key>. get_object honours single
+    bytes=start-end ranges and reports ContentRange like S3 does;
+    list_objects_v2 returns every matching key as a single page.
+    """
+
+    class exceptions:
+        NoSuchKey = NoSuchKey
+        ClientError = NoSuchKey
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as handle:
+            handle.write(Body.encode('utf-8') if isinstance(Body, str) else Body)
+        return {}
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise NoSuchKey(Key)
+        return {
+            'ContentLength': os.path.getsize(path),
+            'LastModified': datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+        }
+
+    def list_objects_v2(self, Bucket, Prefix='', **kwargs):
+        bucket_root = os.path.join(self.root, Bucket)
+        contents = []
+        for directory, _, files in os.walk(bucket_root):
+            for name in files:
+                key = os.path.relpath(os.path.join(directory, name), bucket_root).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    head = self.head_object(Bucket, key)
+                    contents.append({'Key': key, 'Size': head['ContentLength'], 'LastModified': head['LastModified']})
+        contents.sort(key=lambda obj: obj['Key'])
+        return {'Contents': contents, 'KeyCount': len(contents), 'IsTruncated': False}
+
+    def get_paginator(self, operation_name):
+        return LocalPaginator(getattr(self, operation_name))
+
+    def get_object(self, Bucket, Key, Range=None):
+        path = self._path(Bucket, Key)
+        if not os.path.isfile(path):
+            raise NoSuchKey(Key)
+
+        size = os.path.getsize(path)
+        with open(path, 'rb') as handle:
+            if not Range:
+                data = handle.read()
+                return {'Body': io.BytesIO(data), 'ContentLength': len(data)}
+
+            start, _, end = Range[len('bytes='):].partition('-')
+            start = int(start)
+            end = min(int(end) if end else size - 1, size - 1)
+            handle.seek(start)
+            data = handle.read(max(0, end - start + 1))
+
+        return {
+            'Body': io.BytesIO(data),
+            'ContentLength': len(data),
+            'ContentRange': f"bytes {start}-{start + len(data) - 1}/{size}"
+        }
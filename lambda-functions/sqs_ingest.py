@@ -0,0 +1,101 @@
+# lambda-functions/sqs_ingest.py
+import json
+import logging
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def is_sqs_batch(event):
+    """Whether a Lambda event is a batch from an SQS event source mapping"""
+    records = event.get('Records') or []
+    return bool(records) and records[0].get('eventSource') == 'aws:sqs'
+
+
+def group_records(records, route):
+    """
+    Group S3 object-created messages by the job and bucket they start
+
+    route(object_key) returns the jobs for a key. Returns the groups as
+    {(job_name, bucket): {'bucket', 'keys', 'message_ids'}} in arrival
+    order, plus the ids of messages that could not be parsed.
+    """
+    groups = OrderedDict()
+    malformed = []
+
+    for record in records:
+        message_id = record['messageId']
+        try:
+            event = json.loads(record['body'])
+            bucket = event['detail']['bucket']['name']
+            object_key = event['detail']['object']['key']
+        except (KeyError, TypeError, ValueError):
+            malformed.append(message_id)
+            continue
+
+        for job_name in route(object_key):
+            group = groups.setdefault((job_name, bucket), {'bucket': bucket, 'keys': [], 'message_ids': []})
+            if object_key not in group['keys']:
+                group['keys'].append(object_key)
+            group['message_ids'].append(message_id)
+
+    return groups, malformed
+
+
+class LocalQueue:
+    """
+    In-process stand-in for an SQS queue feeding the orchestrator
+
+    receive() builds the event an SQS event source mapping would deliver
+    and complete() applies the handler's batchItemFailures: successful
+    messages are deleted, failed ones become visible again and move to the
+    dead-letter list after max_receive_count deliveries.
+    """
+
+    def __init__(self, max_receive_count=5):
+        self.max_receive_count = max_receive_count
+        self.messages = OrderedDict()
+        self.in_flight = {}
+        self.dead_letters = []
+
+    def send(self, body):
+        message_id = str(uuid.uuid4())
+        self.messages[message_id] = {
+            'body': body if isinstance(body, str) else json.dumps(body),
+            'receive_count': 0
+        }
+        return message_id
+
+    def receive(self, max_messages=10):
+        """Take up to max_messages visible messages as an SQS batch event"""
+        records = []
+        while self.messages and len(records) < max_messages:
+            message_id, message = self.messages.popitem(last=False)
+            message['receive_count'] += 1
+            self.in_flight[message_id] = message
+            records.append({
+                'messageId': message_id,
+                'receiptHandle': message_id,
+                'body': message['body'],
+                'attributes': {'ApproximateReceiveCount': str(message['receive_count'])},
+                'eventSource': 'aws:sqs'
+            })
+        return {'Records': records}
+
+    def complete(self, response):
+        """Delete processed messages and return failed ones to the queue"""
+        failed = {item['itemIdentifier'] for item in (response or {}).get('batchItemFailures', [])}
+
+        for message_id, message in list(self.in_flight.items()):
+            del self.in_flight[message_id]
+            if message_id not in failed:
+                continue
+            if message['receive_count'] >= self.max_receive_count:
+                logger.warning("Moving message %s to the dead-letter queue", message_id)
+                self.dead_letters.append(message)
+            else:
+                self.messages[message_id] = message
+
+    def __len__(self):
+        return len(self.messages) + len(self.in_flight)
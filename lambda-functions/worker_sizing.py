@@ -0,0 +1,155 @@
+# lambda-functions/worker_sizing.py
+import json
+import logging
+import math
+import os
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker_sizing.json')
+
+# DPUs per worker of each Glue worker type, smallest first
+WORKER_TYPE_DPUS = {'G.1X': 1, 'G.2X': 2, 'G.4X': 4, 'G.8X': 8}
+
+# Worker types that can run with the flex execution class
+FLEX_WORKER_TYPES = ('G.1X', 'G.2X')
+
+DEFAULT_SIZING = {
+    'worker_types': ['G.1X', 'G.2X'],
+    'min_workers': 2,
+    'max_workers': 10,
+    'target_seconds': 900,
+    'startup_seconds': 90,
+    'bytes_per_dpu_second': 1000000,
+    'flex_max_bytes': 0,
+    'full_read_prefix': None,
+    'history_size': 20,
+    'min_history_runs': 3
+}
+
+
+def load_sizing_config(environ=os.environ):
+    """Sizing config from WORKER_SIZING (inline JSON), WORKER_SIZING_PATH or the bundled worker_sizing.json"""
+    if environ.get('WORKER_SIZING'):
+        return json.loads(environ['WORKER_SIZING'])
+
+    with open(environ.get('WORKER_SIZING_PATH', DEFAULT_CONFIG_PATH)) as handle:
+        return json.load(handle)
+
+
+def object_bytes(s3_client, bucket, keys, max_workers=16):
+    """Total size of explicit object keys, from concurrent HEAD requests"""
+    if not keys:
+        return 0
+
+    def size(key):
+        return s3_client.head_object(Bucket=bucket, Key=key)['ContentLength']
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(keys))) as executor:
+        return sum(executor.map(size, keys))
+
+
+def prefix_bytes(s3_client, bucket, prefix):
+    """Total size of the objects under a prefix"""
+    total = 0
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        total += sum(obj['Size'] for obj in page.get('Contents', []))
+    return total
+
+
+class WorkerSizer:
+    """
+    Choose Glue capacity for a run from its input size and the job's past runs
+
+    A run is modelled as a fixed startup time plus its input bytes divided
+    by a throughput per DPU-second. The throughput is the median observed
+    over the job's recent successful runs, or the configured default until
+    min_history_runs runs are recorded. The sizer picks the smallest worker
+    type whose workers, within max_workers, are expected to finish inside
+    target_seconds, and the flex execution class for inputs no larger than
+    flex_max_bytes. History is kept in the orchestrator's versioned state
+    backend.
+    """
+
+    def __init__(self, backend, config, max_attempts=10):
+        self.backend = backend
+        self.defaults = dict(DEFAULT_SIZING, **config.get('defaults', {}))
+        self.jobs = config.get('jobs', {})
+        self.max_attempts = max_attempts
+
+    def settings(self, job_name):
+        return dict(self.defaults, **self.jobs.get(job_name, {}))
+
+    def _key(self, job_name):
+        return f"worker-sizing#{job_name}"
+
+    def history(self, job_name):
+        state, _ = self.backend.get(self._key(job_name))
+        return (state or {}).get('runs', [])
+
+    def throughput(self, job_name):
+        """Bytes per DPU-second: median of the recorded runs, or the configured default"""
+        settings = self.settings(job_name)
+        samples = []
+        for run in self.history(job_name):
+            busy_seconds = run['execution_seconds'] - settings['startup_seconds']
+            if run['input_bytes'] > 0 and busy_seconds > 0 and run['dpus'] > 0:
+                samples.append(run['input_bytes'] / float(busy_seconds * run['dpus']))
+
+        if len(samples) < settings['min_history_runs']:
+            return settings['bytes_per_dpu_second'], 'default'
+        return statistics.median(samples), f"median of {len(samples)} runs"
+
+    def choose(self, job_name, input_bytes):
+        """Run options for start_job_run: NumberOfWorkers, WorkerType and ExecutionClass"""
+        settings = self.settings(job_name)
+        throughput, basis = self.throughput(job_name)
+        busy_seconds = max(settings['target_seconds'] - settings['startup_seconds'], 60)
+        dpus_needed = input_bytes / float(throughput * busy_seconds)
+
+        worker_types = [worker_type for worker_type in settings['worker_types'] if worker_type in WORKER_TYPE_DPUS]
+        for worker_type in worker_types:
+            workers = math.ceil(dpus_needed / WORKER_TYPE_DPUS[worker_type])
+            if workers <= settings['max_workers']:
+                break
+        workers = max(settings['min_workers'], min(workers, settings['max_workers']))
+
+        execution_class = 'STANDARD'
+        if input_bytes <= settings['flex_max_bytes'] and worker_type in FLEX_WORKER_TYPES:
+            execution_class = 'FLEX'
+
+        expected_seconds = settings['startup_seconds'] + input_bytes / (
+            throughput * workers * WORKER_TYPE_DPUS[worker_type]
+        )
+        logger.info(
+            "Sizing %s for %d input bytes: %d x %s %s, about %.0fs at %.0f bytes/DPU-s (%s)",
+            job_name, input_bytes, workers, worker_type, execution_class, expected_seconds, throughput, basis
+        )
+        return {'NumberOfWorkers': workers, 'WorkerType': worker_type, 'ExecutionClass': execution_class}
+
+    def record_run(self, job_name, job_run):
+        """Add a successful run from get_job_run to the job's history; False if it was not sized"""
+        input_bytes = (job_run.get('Arguments') or {}).get('--input_bytes')
+        worker_type = job_run.get('WorkerType')
+        if input_bytes is None or worker_type not in WORKER_TYPE_DPUS or not job_run.get('ExecutionTime'):
+            return False
+
+        run = {
+            'job_run_id': job_run.get('Id'),
+            'input_bytes': int(input_bytes),
+            'execution_seconds': job_run['ExecutionTime'],
+            'dpus': job_run.get('NumberOfWorkers', 0) * WORKER_TYPE_DPUS[worker_type],
+            'execution_class': job_run.get('ExecutionClass', 'STANDARD')
+        }
+        history_size = self.settings(job_name)['history_size']
+
+        for _ in range(self.max_attempts):
+            state, version = self.backend.get(self._key(job_name))
+            runs = [previous for previous in (state or {}).get('runs', []) if previous['job_run_id'] != run['job_run_id']]
+            runs = (runs + [run])[-history_size:]
+            if self.backend.put_if_version(self._key(job_name), {'runs': runs}, version):
+                return True
+        raise RuntimeError(f"Could not record the run history of {job_name} after {self.max_attempts} attempts")
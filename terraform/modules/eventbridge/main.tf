@@ -45,18 +45,86 @@ resource "aws_cloudwatch_event_rule" "daily_etl_schedule" {
 
 # Lambda targets
 resource "aws_cloudwatch_event_target" "lambda_target" {
+  count          = var.ingest_mode == "direct" ? 1 : 0
   rule           = aws_cloudwatch_event_rule.s3_object_created.name
   event_bus_name = aws_cloudwatch_event_bus.main.name
   target_id      = "GlueOrchestratorTarget"
   arn            = var.lambda_orchestrator_arn
 }
 
+# Queue buffering S3 events for batched orchestration (ingest_mode = "sqs")
+resource "aws_sqs_queue" "s3_events_dlq" {
+  count                     = var.ingest_mode == "sqs" ? 1 : 0
+  name                      = "${var.project_name}-s3-events-dlq-${var.environment}"
+  message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "s3_events" {
+  count                      = var.ingest_mode == "sqs" ? 1 : 0
+  name                       = "${var.project_name}-s3-events-${var.environment}"
+  visibility_timeout_seconds = var.sqs_visibility_timeout_seconds
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.s3_events_dlq[0].arn
+    maxReceiveCount     = var.sqs_max_receive_count
+  })
+}
+
+resource "aws_sqs_queue_policy" "s3_events" {
+  count     = var.ingest_mode == "sqs" ? 1 : 0
+  queue_url = aws_sqs_queue.s3_events[0].id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect    = "Allow"
+        Principal = { Service = "events.amazonaws.com" }
+        Action    = "sqs:SendMessage"
+        Resource  = aws_sqs_queue.s3_events[0].arn
+        Condition = {
+          ArnEquals = { "aws:SourceArn" = aws_cloudwatch_event_rule.s3_object_created.arn }
+        }
+      }
+    ]
+  })
+}
+
+resource "aws_cloudwatch_event_target" "sqs_target" {
+  count          = var.ingest_mode == "sqs" ? 1 : 0
+  rule           = aws_cloudwatch_event_rule.s3_object_created.name
+  event_bus_name = aws_cloudwatch_event_bus.main.name
+  target_id      = "S3EventsQueueTarget"
+  arn            = aws_sqs_queue.s3_events[0].arn
+}
+
 resource "aws_cloudwatch_event_target" "schedule_target" {
   rule      = aws_cloudwatch_event_rule.daily_etl_schedule.name
   target_id = "DailyETLTarget"
   arn       = var.lambda_orchestrator_arn
 }
 
+# Periodic flush of coalesced S3 event batches
+resource "aws_cloudwatch_event_rule" "coalescer_flush" {
+  count               = var.enable_event_coalescing ? 1 : 0
+  name                = "${var.project_name}-coalescer-flush-${var.environment}"
+  description         = "Release S3 event batches whose coalescing window expired"
+  schedule_expression = "rate(1 minute)"
+}
+
+resource "aws_cloudwatch_event_target" "coalescer_flush_target" {
+  count     = var.enable_event_coalescing ? 1 : 0
+  rule      = aws_cloudwatch_event_rule.coalescer_flush[0].name
+  target_id = "CoalescerFlushTarget"
+  arn       = var.lambda_orchestrator_arn
+
+  input = jsonencode({
+    source        = "custom.orchestrator"
+    "detail-type" = "Coalescer Flush"
+    detail        = {}
+  })
+}
+
 # SNS targets for notifications
 resource "aws_cloudwatch_event_target" "sns_target" {
   rule           = aws_cloudwatch_event_rule.glue_job_state_change.name
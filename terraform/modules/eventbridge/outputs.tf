@@ -11,4 +11,9 @@ output "s3_object_created_rule_arn" {
 output "glue_job_state_change_rule_arn" {
   description = "ARN of the Glue Job State Change EventBridge rule"
   value       = aws_cloudwatch_event_rule.glue_job_state_change.arn
+}
+
+output "s3_events_queue_arn" {
+  description = "ARN of the S3 events queue (null unless ingest_mode is sqs)"
+  value       = var.ingest_mode == "sqs" ? aws_sqs_queue.s3_events[0].arn : null
 }
\ No newline at end of file
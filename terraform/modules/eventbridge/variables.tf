@@ -28,4 +28,33 @@ variable "lambda_orchestrator_arn" {
 variable "sns_topic_arn" {
   description = "ARN of the SNS topic for notifications"
   type        = string
+}
+
+variable "enable_event_coalescing" {
+  description = "Schedule periodic flushes of coalesced S3 event batches"
+  type        = bool
+  default     = false
+}
+
+variable "ingest_mode" {
+  description = "How S3 events reach the orchestrator: direct (one invocation per event) or sqs (batched through a queue)"
+  type        = string
+  default     = "direct"
+
+  validation {
+    condition     = contains(["direct", "sqs"], var.ingest_mode)
+    error_message = "ingest_mode must be direct or sqs."
+  }
+}
+
+variable "sqs_visibility_timeout_seconds" {
+  description = "Visibility timeout of the S3 events queue; at least six times the orchestrator timeout"
+  type        = number
+  default     = 1800
+}
+
+variable "sqs_max_receive_count" {
+  description = "Deliveries of a queued S3 event before it moves to the dead-letter queue"
+  type        = number
+  default     = 5
 }
\ No newline at end of file
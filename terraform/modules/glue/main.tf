@@ -6,6 +6,30 @@ resource "aws_glue_catalog_database" "main" {
   description = "Main database for ${var.project_name} project"
 }
 
+# Shared Python modules imported by the ETL scripts
+locals {
+  glue_shared_modules = [
+    "action_scheduler.py",
+    "catalog_sink.py",
+    "clustering.py",
+    "data_profiler.py",
+    "event_publisher.py",
+    "file_sizing.py",
+    "incremental_state.py",
+    "job_options.py",
+    "job_stages.py",
+    "join_strategy.py",
+    "materialization.py",
+    "plan_inspection.py",
+    "quality_rules.py",
+    "rollups.py",
+    "schema_registry.py",
+    "source_listing.py"
+  ]
+
+  glue_extra_py_files = join(",", [for module in local.glue_shared_modules : "s3://${var.s3_bucket_scripts}/${module}"])
+}
+
 # Glue Crawler for raw data discovery
 resource "aws_glue_crawler" "raw_data_crawler" {
   name          = "${var.project_name}-raw-data-crawler-${var.environment}"
@@ -49,6 +73,8 @@ resource "aws_glue_job" "customer_data_etl" {
     "--raw_data_bucket"              = var.s3_bucket_raw
     "--processed_data_bucket"        = var.s3_bucket_processed
     "--database_name"                = aws_glue_catalog_database.main.name
+    "--extra-py-files"               = local.glue_extra_py_files
+    "--cluster_sort_keys"            = "state,email_domain"
   }
 }
 
@@ -77,6 +103,11 @@ resource "aws_glue_job" "sales_data_etl" {
     "--raw_data_bucket"              = var.s3_bucket_raw
     "--processed_data_bucket"        = var.s3_bucket_processed
     "--database_name"                = aws_glue_catalog_database.main.name
+    "--extra-py-files"               = local.glue_extra_py_files
+    "--processing_mode"              = "incremental"
+    "--cluster_sort_keys"            = "customer_id,amount_category"
+    "--parallel_actions"             = "4"
+    "--conf"                         = "spark.scheduler.mode=FAIR"
   }
 }
 
@@ -98,6 +129,41 @@ resource "aws_glue_job" "data_quality_check" {
     "--enable-metrics"        = ""
     "--processed_data_bucket" = var.s3_bucket_processed
     "--database_name"         = aws_glue_catalog_database.main.name
+    "--extra-py-files"        = local.glue_extra_py_files
+  }
+}
+
+# Partition Compaction Job
+resource "aws_glue_job" "partition_compaction" {
+  name          = "${var.project_name}-partition-compaction-${var.environment}"
+  role_arn      = aws_iam_role.glue_role.arn
+  glue_version  = "4.0"
+  worker_type   = "G.1X"
+  number_of_workers = 2
+  timeout       = 60
+  
+  command {
+    script_location = "s3://${var.s3_bucket_scripts}/compact_partitions.py"
+    python_version  = "3"
+  }
+  
+  default_arguments = {
+    "--enable-metrics"        = ""
+    "--processed_data_bucket" = var.s3_bucket_processed
+    "--datasets"              = "customers,sales"
+    "--target_file_size_mb"   = "128"
+    "--small_file_size_mb"    = "32"
+    "--extra-py-files"        = local.glue_extra_py_files
+  }
+}
+
+resource "aws_glue_trigger" "partition_compaction_schedule" {
+  name     = "${var.project_name}-partition-compaction-schedule-${var.environment}"
+  type     = "SCHEDULED"
+  schedule = "cron(0 4 ? * SUN *)"  # Run weekly on Sunday at 4 AM
+  
+  actions {
+    job_name = aws_glue_job.partition_compaction.name
   }
 }
 
@@ -108,7 +174,8 @@ resource "aws_glue_workflow" "main_workflow" {
   description = "Main ETL workflow for ${var.project_name}"
 }
 
-# Workflow triggers
+# Workflow triggers. The quality job has no trigger here: the orchestrator's job
+# state tracker starts it once per cycle for workflow and event-driven runs alike
 resource "aws_glue_trigger" "workflow_start" {
   name          = "${var.project_name}-workflow-start-${var.environment}"
   type          = "ON_DEMAND"
@@ -123,30 +190,6 @@ resource "aws_glue_trigger" "workflow_start" {
   }
 }
 
-resource "aws_glue_trigger" "data_quality_trigger" {
-  name          = "${var.project_name}-data-quality-trigger-${var.environment}"
-  type          = "CONDITIONAL"
-  workflow_name = aws_glue_workflow.main_workflow.name
-  
-  actions {
-    job_name = aws_glue_job.data_quality_check.name
-  }
-  
-  predicate {
-    conditions {
-      job_name = aws_glue_job.customer_data_etl.name
-      logical_operator = "EQUALS"
-      state = "SUCCEEDED"
-    }
-    
-    conditions {
-      job_name = aws_glue_job.sales_data_etl.name
-      logical_operator = "EQUALS"
-      state = "SUCCEEDED"
-    }
-  }
-}
-
 # IAM Role for Glue
 resource "aws_iam_role" "glue_role" {
   name = "${var.project_name}-glue-role-${var.environment}"
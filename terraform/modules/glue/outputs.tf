@@ -9,6 +9,9 @@ output "glue_jobs" {
     },
     {
       name = aws_glue_job.data_quality_check.name
+    },
+    {
+      name = aws_glue_job.partition_compaction.name
     }
   ]
 }
@@ -18,7 +21,8 @@ output "glue_job_names" {
   value = [
     aws_glue_job.customer_data_etl.name,
     aws_glue_job.sales_data_etl.name,
-    aws_glue_job.data_quality_check.name
+    aws_glue_job.data_quality_check.name,
+    aws_glue_job.partition_compaction.name
   ]
 }
 
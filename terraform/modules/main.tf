@@ -57,6 +57,8 @@ module "eventbridge" {
   environment = var.environment
   project_name = var.project_name
   glue_jobs = module.glue.glue_jobs
+  enable_event_coalescing = var.orchestrator_trigger_mode == "coalesce"
+  ingest_mode = var.orchestrator_ingest_mode
 }
 
 # Lambda for orchestration
@@ -71,11 +73,69 @@ resource "aws_lambda_function" "glue_orchestrator" {
   environment {
     variables = {
       GLUE_JOB_NAMES = jsonencode(module.glue.glue_job_names)
+      MAIN_WORKFLOW_NAME = module.glue.main_workflow_name
+      PROJECT_NAME   = var.project_name
+      ENVIRONMENT    = var.environment
+      LOG_LEVEL      = "INFO"
       EVENT_BUS_NAME = module.eventbridge.event_bus_name
+      TRIGGER_MODE   = var.orchestrator_trigger_mode
+      MANIFEST_BUCKET = module.s3.processed_data_bucket
+      JOB_STATE_STORE      = "dynamodb"
+      JOB_STATE_TABLE_NAME = aws_dynamodb_table.orchestrator_job_state.name
+      COALESCE_STATE_STORE      = "dynamodb"
+      COALESCE_TABLE_NAME       = aws_dynamodb_table.orchestrator_batches.name
+      COALESCE_WINDOW_SECONDS   = tostring(var.coalesce_window_seconds)
+      COALESCE_MAX_KEYS         = tostring(var.coalesce_max_keys)
+      ADAPTIVE_WORKER_SIZING    = tostring(var.enable_adaptive_worker_sizing)
     }
   }
 }
 
+# Batched delivery of queued S3 events (orchestrator_ingest_mode = "sqs")
+resource "aws_lambda_event_source_mapping" "orchestrator_s3_events" {
+  count                              = var.orchestrator_ingest_mode == "sqs" ? 1 : 0
+  event_source_arn                   = module.eventbridge.s3_events_queue_arn
+  function_name                      = aws_lambda_function.glue_orchestrator.arn
+  batch_size                         = var.sqs_batch_size
+  maximum_batching_window_in_seconds = var.sqs_batching_window_seconds
+  function_response_types            = ["ReportBatchItemFailures"]
+}
+
+# Upstream completions per downstream job, so dependent jobs start once per cycle
+resource "aws_dynamodb_table" "orchestrator_job_state" {
+  name         = "${var.project_name}-orchestrator-job-state-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "state_key"
+
+  attribute {
+    name = "state_key"
+    type = "S"
+  }
+}
+
+# Pending S3 object keys for coalesced job triggering
+resource "aws_dynamodb_table" "orchestrator_batches" {
+  name         = "${var.project_name}-orchestrator-batches-${var.environment}"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "job_name"
+  range_key    = "object_key"
+
+  attribute {
+    name = "job_name"
+    type = "S"
+  }
+
+  attribute {
+    name = "object_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+}
+
 # SNS for notifications
 resource "aws_sns_topic" "glue_notifications" {
   name = "${var.project_name}-glue-notifications-${var.environment}"
@@ -56,4 +56,46 @@ variable "eventbridge_schedule_expression" {
   description = "Schedule expression for EventBridge rule"
   type        = string
   default     = "cron(0 6 * * ? *)"
+}
+
+variable "orchestrator_trigger_mode" {
+  description = "How the orchestrator starts jobs for S3 events (immediate or coalesce)"
+  type        = string
+  default     = "immediate"
+}
+
+variable "coalesce_window_seconds" {
+  description = "Seconds to collect S3 events before starting a coalesced job run"
+  type        = number
+  default     = 60
+}
+
+variable "coalesce_max_keys" {
+  description = "Number of new objects that starts a coalesced job run immediately"
+  type        = number
+  default     = 100
+}
+
+variable "orchestrator_ingest_mode" {
+  description = "How S3 events reach the orchestrator (direct or sqs)"
+  type        = string
+  default     = "direct"
+}
+
+variable "sqs_batch_size" {
+  description = "Maximum queued S3 events per orchestrator invocation in sqs ingest mode"
+  type        = number
+  default     = 100
+}
+
+variable "sqs_batching_window_seconds" {
+  description = "Seconds to gather queued S3 events before invoking the orchestrator"
+  type        = number
+  default     = 30
+}
+
+variable "enable_adaptive_worker_sizing" {
+  description = "Let the orchestrator choose worker type, worker count and execution class per run from its input size"
+  type        = bool
+  default     = true
 }
\ No newline at end of file
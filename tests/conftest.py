@@ -0,0 +1,141 @@
+# tests/conftest.py
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(ROOT, 'lambda-functions'))
+sys.path.insert(0, os.path.join(ROOT, 'glue-scripts'))
+
+
+@pytest.fixture(scope="session")
+def bucket_root(tmp_path_factory):
+    """Local directory holding the benchmark buckets"""
+    return str(tmp_path_factory.mktemp("buckets"))
+
+
+@pytest.fixture(scope="session")
+def spark(bucket_root):
+    """Local-mode session with the awsglue shims installed, so the job modules import"""
+    pytest.importorskip("pyspark")
+    import glue_shims
+    from etl_benchmark import PROCESSED_BUCKET, RAW_BUCKET
+
+    glue_shims.install(bucket_root)
+    session = glue_shims.local_spark_session(bucket_root, [RAW_BUCKET, PROCESSED_BUCKET], cores=2,
+                                             shuffle_partitions=4)
+    session.sparkContext.setLogLevel("ERROR")
+    yield session
+    session.stop()
+
+
+class ClientError(Exception):
+    """Client exception carrying an AWS error code like botocore's ClientError"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}}
+
+
+class LocalGlue:
+    """
+    Glue client that runs no jobs but enforces each job's MaxConcurrentRuns
+
+    Runs stay RUNNING until finish() is called; errors queued with fail()
+    are raised by the next start_job_run calls of that job.
+    """
+
+    def __init__(self, max_concurrent_runs=None, page_size=2):
+        self.max_concurrent_runs = max_concurrent_runs or {}
+        self.page_size = page_size
+        self.runs = {}
+        self.failures = {}
+        self.calls = []
+
+    def fail(self, job_name, *codes):
+        self.failures.setdefault(job_name, []).extend(codes)
+
+    def finish(self, job_name, job_run_id, state='SUCCEEDED'):
+        for run in self.runs[job_name]:
+            if run['Id'] == job_run_id:
+                run['JobRunState'] = state
+
+    def started(self, job_name):
+        return self.runs.get(job_name, [])
+
+    def start_job_run(self, JobName, Arguments=None, **run_options):
+        self.calls.append(('start_job_run', JobName))
+        if self.failures.get(JobName):
+            raise ClientError(self.failures[JobName].pop(0))
+        runs = self.runs.setdefault(JobName, [])
+        if sum(1 for run in runs if run['JobRunState'] == 'RUNNING') >= self.max_concurrent_runs.get(JobName, 1):
+            raise ClientError('ConcurrentRunsExceededException')
+
+        run = {'Id': f"jr_{JobName}_{len(runs) + 1}", 'JobRunState': 'RUNNING', 'Arguments': Arguments or {},
+               'StartedOn': datetime.now(timezone.utc)}
+        runs.append(run)
+        return {'JobRunId': run['Id']}
+
+    def get_job(self, JobName):
+        self.calls.append(('get_job', JobName))
+        return {'Job': {'Name': JobName, 'Timeout': 60,
+                        'ExecutionProperty': {'MaxConcurrentRuns': self.max_concurrent_runs.get(JobName, 1)}}}
+
+    def get_job_runs(self, JobName, NextToken=None):
+        self.calls.append(('get_job_runs', JobName))
+        runs = list(reversed(self.runs.get(JobName, [])))
+        start = int(NextToken or 0)
+        response = {'JobRuns': runs[start:start + self.page_size]}
+        if start + self.page_size < len(runs):
+            response['NextToken'] = str(start + self.page_size)
+        return response
+
+    def get_job_run(self, JobName, RunId):
+        self.calls.append(('get_job_run', JobName))
+        return {'JobRun': next(run for run in self.runs[JobName] if run['Id'] == RunId)}
+
+
+class LocalEvents:
+    """EventBridge client that keeps the entries it is sent"""
+
+    def __init__(self):
+        self.entries = []
+
+    def put_events(self, Entries):
+        self.entries.extend(Entries)
+        return {'FailedEntryCount': 0, 'Entries': [{'EventId': str(index)} for index in range(len(Entries))]}
+
+
+@pytest.fixture
+def glue_client():
+    return LocalGlue()
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, glue_client):
+    """The orchestrator module over in-memory state and the local Glue and EventBridge clients"""
+    monkeypatch.setenv('JOB_STATE_STORE', 'memory')
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+    import glue_job_orchestrator
+    from aws_clients import LazyClient
+    from event_publisher import EventPublisher
+    from glue_run_scheduler import GlueRunScheduler, JobRunQueue
+    from job_state_tracker import InMemoryStateBackend, JobStateTracker
+
+    backend = InMemoryStateBackend()
+    glue = LazyClient('glue', client=glue_client)
+    monkeypatch.setattr(glue_job_orchestrator, 'glue', glue)
+    monkeypatch.setattr(glue_job_orchestrator, 'run_scheduler',
+                        GlueRunScheduler(glue, JobRunQueue(backend), sleep=lambda seconds: None))
+    monkeypatch.setattr(glue_job_orchestrator, 'job_state_tracker',
+                        JobStateTracker(backend, glue_job_orchestrator.job_state_tracker.dependencies))
+    monkeypatch.setattr(glue_job_orchestrator, 'events',
+                        EventPublisher(LocalEvents(), 'custom.lambda.orchestrator', flush_on_exit=False))
+    # Sizing and format sniffing read S3; they are optional hints
+    monkeypatch.setattr(glue_job_orchestrator, 'ADAPTIVE_WORKER_SIZING', False)
+    monkeypatch.setattr(glue_job_orchestrator, 'INSPECT_SOURCE_FILES', False)
+    monkeypatch.setattr(glue_job_orchestrator, 'MANIFEST_BUCKET', '')
+    return glue_job_orchestrator
@@ -0,0 +1,98 @@
+# tests/test_data_validation.py
+import gzip
+
+import pytest
+
+from data_validation import parse_event_objects, validate_object, validate_objects
+from local_s3 import LocalS3
+
+BUCKET = 'raw-bucket'
+SALES_HEADER = "sale_id,customer_id,product_id,product_name,amount,sale_date\n"
+SALES_ROWS = "".join(f"{index},{index % 50},p{index % 9},Product {index % 9},{index % 700 + 0.99},2024-06-01\n"
+                     for index in range(20000))
+
+
+class CountingS3(LocalS3):
+    """LocalS3 that counts the bytes get_object returns"""
+
+    bytes_read = 0
+
+    def get_object(self, Bucket, Key, Range=None):
+        response = super().get_object(Bucket, Key, Range)
+        self.bytes_read += response['ContentLength']
+        return response
+
+
+@pytest.fixture
+def s3(tmp_path):
+    return CountingS3(str(tmp_path))
+
+
+def put(s3, key, body):
+    s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+    return {'bucket': BUCKET, 'key': key}
+
+
+def test_valid_file(s3):
+    result = validate_object(s3, put(s3, "sales/a.csv", SALES_HEADER + SALES_ROWS))
+    assert result['valid'], result['errors']
+    assert result['header'] == SALES_HEADER.strip().split(',')
+
+
+def test_empty_file_is_rejected_with_or_without_event_size(s3):
+    obj = put(s3, "sales/empty.csv", b"")
+    assert validate_object(s3, dict(obj, size=0))['errors'] == ["empty file"]
+    assert s3.bytes_read == 0
+
+    # Without a size in the event, the empty read says the same
+    assert validate_object(s3, obj)['errors'] == ["empty file"]
+
+
+def test_oversized_file_is_rejected_from_the_event_size(s3):
+    obj = put(s3, "sales/big.csv", SALES_HEADER + SALES_ROWS)
+    result = validate_object(s3, dict(obj, size=10 * 1024 ** 3), max_file_bytes=5 * 1024 ** 3)
+    assert result['errors'] == [f"file of {10 * 1024 ** 3} bytes exceeds the {5 * 1024 ** 3} byte limit"]
+    assert s3.bytes_read == 0
+
+
+@pytest.mark.parametrize("header, error", [
+    ("sale_id,customer_id,product_id,product_name,amount\n", "missing columns: ['sale_date']"),
+    ("sale_id,customer_id,product_id,product_name,amount,sale_date,channel\n", "unexpected columns: ['channel']"),
+    ("customer_id,sale_id,product_id,product_name,amount,sale_date\n", "column order"),
+    ("\n", "empty header row")
+])
+def test_invalid_header_is_rejected(s3, header, error):
+    result = validate_object(s3, put(s3, "sales/a.csv", header + SALES_ROWS))
+    assert not result['valid']
+    assert any(message.startswith(error) for message in result['errors']), result['errors']
+
+
+def test_unknown_prefix_and_extension_are_rejected(s3):
+    assert validate_object(s3, put(s3, "logs/a.csv", SALES_HEADER))['errors'] == ["no schema for this prefix"]
+    assert validate_object(s3, put(s3, "sales/a.json", "{}"))['errors'] == [
+        "not one of ['.csv', '.csv.gz', '.csv.bz2']"
+    ]
+
+
+def test_compressed_file_reads_only_the_header(s3):
+    body = gzip.compress((SALES_HEADER + SALES_ROWS * 5).encode('utf-8'))
+    result = validate_object(s3, put(s3, "sales/a.csv.gz", body), header_bytes=8192)
+    assert result['valid'], result['errors']
+    assert result['format']['compression'] == 'gzip'
+    assert s3.bytes_read <= 2 * 8192 < len(body)
+
+
+def test_validate_objects_keeps_input_order(s3):
+    objects = [
+        put(s3, "sales/a.csv", SALES_HEADER + SALES_ROWS),
+        put(s3, "sales/empty.csv", b""),
+        put(s3, "customers/a.csv", SALES_HEADER)
+    ]
+    results = validate_objects(s3, objects, max_workers=3)
+    assert [result['key'] for result in results] == [obj['key'] for obj in objects]
+    assert [result['valid'] for result in results] == [True, False, False]
+
+
+def test_parse_event_objects_decodes_notification_keys():
+    event = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': "sales/june+2024.csv", 'size': 10}}}]}
+    assert parse_event_objects(event) == [{'bucket': BUCKET, 'key': "sales/june 2024.csv", 'size': 10}]
@@ -0,0 +1,73 @@
+# tests/test_event_coalescer.py
+import pytest
+
+from event_coalescer import EventCoalescer, LocalFileBatchStore
+
+
+class Clock:
+    """Settable time source, starting near zero like a fresh test clock"""
+
+    def __init__(self, now=1.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def coalescer(tmp_path, clock):
+    store = LocalFileBatchStore(str(tmp_path / "coalescer_state.json"), dedupe_ttl_seconds=600)
+    return EventCoalescer(store, window_seconds=60, max_keys=3, clock=clock)
+
+
+def test_batch_released_at_max_keys(coalescer):
+    assert coalescer.add("sales-etl", "raw", "sales/a.csv") is None
+    assert coalescer.add("sales-etl", "raw", "sales/b.csv") is None
+    assert coalescer.add("sales-etl", "raw", "sales/c.csv") == {
+        'bucket': "raw", 'keys': ["sales/a.csv", "sales/b.csv", "sales/c.csv"]
+    }
+    assert coalescer.flush_due(force=True) == {}
+
+
+def test_window_expiry_releases_batch(coalescer, clock):
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    clock.now += 59
+    assert coalescer.flush_due() == {}
+
+    clock.now += 1
+    assert coalescer.flush_due() == {"sales-etl": {'bucket': "raw", 'keys': ["sales/a.csv"]}}
+
+
+def test_duplicate_pending_key_is_ignored(coalescer):
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    assert coalescer.flush_due(force=True) == {"sales-etl": {'bucket': "raw", 'keys': ["sales/a.csv"]}}
+
+
+def test_dispatched_key_deduplicated_across_flushes(coalescer, clock):
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    assert coalescer.flush_due(force=True)["sales-etl"]['keys'] == ["sales/a.csv"]
+
+    # A redelivered event for a dispatched key does not start another batch within the TTL
+    clock.now += 300
+    assert coalescer.add("sales-etl", "raw", "sales/a.csv") is None
+    assert coalescer.flush_due(force=True) == {}
+
+    # Past the TTL the key is new again
+    clock.now += 301
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    assert coalescer.flush_due(force=True) == {"sales-etl": {'bucket': "raw", 'keys': ["sales/a.csv"]}}
+
+
+def test_jobs_are_batched_separately(coalescer):
+    coalescer.add("sales-etl", "raw", "sales/a.csv")
+    coalescer.add("customer-etl", "raw", "customers/a.csv")
+    assert coalescer.flush_due(force=True) == {
+        "sales-etl": {'bucket': "raw", 'keys': ["sales/a.csv"]},
+        "customer-etl": {'bucket': "raw", 'keys': ["customers/a.csv"]}
+    }
@@ -0,0 +1,64 @@
+# tests/test_glue_job_orchestrator.py
+import pytest
+
+from event_router import EventRouter
+from local_s3 import LocalS3
+
+BUCKET = 'raw-bucket'
+SALES_CSV = "sale_id,customer_id,product_id,product_name,amount,sale_date\n" + "1,2,3,Product 3,19.99,2024-06-01\n" * 100
+
+
+class CountingS3(LocalS3):
+    """LocalS3 that records the keys get_object reads"""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.reads = []
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.reads.append(Key)
+        return super().get_object(Bucket, Key, Range)
+
+
+@pytest.fixture
+def s3(orchestrator, monkeypatch, tmp_path):
+    client = CountingS3(str(tmp_path))
+    client.put_object(Bucket=BUCKET, Key="sales/a.csv", Body=SALES_CSV)
+    client.put_object(Bucket=BUCKET, Key="sales/b.csv", Body=SALES_CSV)
+    monkeypatch.setattr(orchestrator, 's3', client)
+    monkeypatch.setattr(orchestrator, 'INSPECT_SOURCE_FILES', True)
+    # Send every sales object to two jobs
+    monkeypatch.setitem(orchestrator.ROUTING, 'router', EventRouter.from_config({'rules': [
+        {'name': 'sales', 'prefix': 'sales/', 'jobs': ['sales-etl', 'sales-archive']}
+    ]}))
+    return client
+
+
+def object_created(key):
+    return {
+        'source': 'aws.s3',
+        'detail-type': 'Object Created',
+        'detail': {'bucket': {'name': BUCKET}, 'object': {'key': key}}
+    }
+
+
+def test_object_routed_to_several_jobs_is_inspected_once(orchestrator, glue_client, s3):
+    orchestrator.lambda_handler(object_created("sales/a.csv"), None)
+
+    assert s3.reads == ["sales/a.csv"]
+    for job_name in ('sales-etl', 'sales-archive'):
+        [run] = glue_client.started(job_name)
+        assert run['Arguments']['--source_delimiter'] == ','
+        assert run['Arguments']['--estimated_source_rows'] == '100'
+
+
+def test_queued_batch_inspects_each_object_once(orchestrator, glue_client, s3):
+    from sqs_ingest import LocalQueue
+
+    queue = LocalQueue()
+    queue.send(object_created("sales/a.csv"))
+    queue.send(object_created("sales/b.csv"))
+    assert orchestrator.lambda_handler(queue.receive(), None) == {'batchItemFailures': []}
+
+    assert sorted(s3.reads) == ["sales/a.csv", "sales/b.csv"]
+    assert len(glue_client.started('sales-etl')) == len(glue_client.started('sales-archive')) == 1
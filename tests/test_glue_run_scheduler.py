@@ -0,0 +1,78 @@
+# tests/test_glue_run_scheduler.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from glue_run_scheduler import GlueRunScheduler, JobRunQueue
+from job_state_tracker import InMemoryStateBackend
+
+JOB = 'sales-etl'
+
+
+@pytest.fixture
+def scheduler(glue_client):
+    glue_client.max_concurrent_runs[JOB] = 2
+    return GlueRunScheduler(glue_client, JobRunQueue(InMemoryStateBackend()), max_attempts=3,
+                            sleep=lambda seconds: None)
+
+
+def test_runs_beyond_the_limit_are_queued_and_drained_in_order(scheduler, glue_client):
+    results = [scheduler.submit(JOB, {'--batch': str(index)}) for index in range(4)]
+    assert [result['status'] for result in results] == ['STARTED', 'STARTED', 'QUEUED', 'QUEUED']
+    assert scheduler.queue.size(JOB) == 2
+
+    # Nothing finished: no slot to drain into
+    assert scheduler.drain(JOB) == []
+
+    glue_client.finish(JOB, results[0]['job_run_id'])
+    [started] = scheduler.drain(JOB)
+    assert started['request_id'] == results[2]['request_id']
+    assert glue_client.started(JOB)[-1]['Arguments'] == {'--batch': '2'}
+
+    glue_client.finish(JOB, results[1]['job_run_id'], 'FAILED')
+    glue_client.finish(JOB, started['job_run_id'])
+    assert [run['request_id'] for run in scheduler.drain_all([JOB, 'customer-etl'])] == [results[3]['request_id']]
+    assert scheduler.queue.size(JOB) == 0
+
+
+def test_new_requests_wait_behind_queued_ones(scheduler, glue_client):
+    first = [scheduler.submit(JOB, {}) for _ in range(3)][0]
+    glue_client.finish(JOB, first['job_run_id'])
+
+    # A slot is free, but the queued request takes it before the new one
+    newer = scheduler.submit(JOB, {'--batch': 'newer'})
+    assert newer['status'] == 'QUEUED'
+    assert glue_client.started(JOB)[-1]['Arguments'] == {}
+    assert scheduler.queue.size(JOB) == 1
+
+
+def test_throttled_start_is_retried_then_queued(scheduler, glue_client):
+    glue_client.fail(JOB, 'ThrottlingException')
+    assert scheduler.submit(JOB, {})['status'] == 'STARTED'
+
+    glue_client.fail(JOB, *['ThrottlingException'] * 3)
+    assert scheduler.submit(JOB, {})['status'] == 'QUEUED'
+
+
+def test_other_start_errors_are_raised(scheduler, glue_client):
+    glue_client.fail(JOB, 'EntityNotFoundException')
+    with pytest.raises(Exception, match='EntityNotFoundException'):
+        scheduler.submit(JOB, {})
+    assert scheduler.queue.size(JOB) == 0
+
+
+def test_active_runs_stop_paging_past_the_job_timeout(scheduler, glue_client):
+    # Twenty finished runs from last week, then one recent finished and one running run
+    last_week = datetime.now(timezone.utc) - timedelta(days=7)
+    glue_client.runs[JOB] = [
+        {'Id': f"jr_old_{index}", 'JobRunState': 'SUCCEEDED', 'StartedOn': last_week + timedelta(minutes=index)}
+        for index in range(20)
+    ]
+    scheduler.submit(JOB, {})
+    scheduler.submit(JOB, {})
+    glue_client.finish(JOB, glue_client.started(JOB)[-2]['Id'])
+
+    glue_client.calls.clear()
+    assert scheduler.active_runs(JOB) == 1
+    # The recent page and the first page wholly past the timeout window, not all eleven pages
+    assert glue_client.calls.count(('get_job_runs', JOB)) == 2
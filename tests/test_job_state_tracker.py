@@ -0,0 +1,69 @@
+# tests/test_job_state_tracker.py
+import threading
+
+import pytest
+
+from job_state_tracker import InMemoryStateBackend, JobStateTracker, SQLiteStateBackend
+
+DEPENDENCIES = {'quality-check': ['customer-etl', 'sales-etl']}
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def tracker(request, tmp_path):
+    if request.param == 'sqlite':
+        backend = SQLiteStateBackend(str(tmp_path / "job_state.db"))
+    else:
+        backend = InMemoryStateBackend()
+    return JobStateTracker(backend, DEPENDENCIES, max_attempts=100)
+
+
+def test_downstream_released_once_both_upstreams_complete(tracker):
+    assert tracker.record_success('customer-etl', 'jr_c1') == []
+    assert tracker.record_success('sales-etl', 'jr_s1') == [
+        ('quality-check', 1, {'customer-etl': 'jr_c1', 'sales-etl': 'jr_s1'})
+    ]
+
+    # The next cycle starts empty
+    assert tracker.record_success('sales-etl', 'jr_s2') == []
+    assert tracker.record_success('customer-etl', 'jr_c2') == [
+        ('quality-check', 2, {'customer-etl': 'jr_c2', 'sales-etl': 'jr_s2'})
+    ]
+
+
+def test_repeated_completion_events_are_ignored(tracker):
+    tracker.record_success('customer-etl', 'jr_c1')
+    assert tracker.record_success('customer-etl', 'jr_c1') == []
+    assert len(tracker.record_success('sales-etl', 'jr_s1')) == 1
+
+    # Redelivered after the cycle closed: neither event reopens or closes a cycle
+    assert tracker.record_success('sales-etl', 'jr_s1') == []
+    assert tracker.record_success('customer-etl', 'jr_c1') == []
+
+
+def test_unrelated_jobs_are_not_tracked(tracker):
+    assert tracker.record_success('partition-compaction', 'jr_p1') == []
+
+
+def test_racing_completions_release_each_cycle_once(tracker):
+    cycles = 10
+    releases = []
+    lock = threading.Lock()
+
+    def deliver(job_name, job_run_id, barrier):
+        barrier.wait()
+        ready = tracker.record_success(job_name, job_run_id)
+        with lock:
+            releases.extend(ready)
+
+    for cycle in range(1, cycles + 1):
+        # Both upstream completions arrive together, each delivered twice
+        deliveries = [('customer-etl', f"jr_c{cycle}"), ('sales-etl', f"jr_s{cycle}")] * 2
+        barrier = threading.Barrier(len(deliveries))
+        threads = [threading.Thread(target=deliver, args=delivery + (barrier,)) for delivery in deliveries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert sorted(cycle for _, cycle, _ in releases) == list(range(1, cycles + 1))
+    assert all(runs == {'customer-etl': f"jr_c{cycle}", 'sales-etl': f"jr_s{cycle}"} for _, cycle, runs in releases)
@@ -0,0 +1,53 @@
+# tests/test_plan_inspection.py
+from datetime import date
+
+import pytest
+
+
+@pytest.fixture
+def sales_df(spark):
+    from schema_registry import SALES_RAW_SCHEMA
+    from sales_data_etl import transform_sales
+
+    rows = [
+        (str(sale_id), str(sale_id % 7), "101", "Product 101", float(20 + sale_id * 13 % 900),
+         date(2023, 1 + sale_id % 12, 1 + sale_id % 28))
+        for sale_id in range(1, 200)
+    ]
+    return transform_sales(spark.createDataFrame(rows, SALES_RAW_SCHEMA), "test-job")
+
+
+def test_business_metrics_shuffle_once(sales_df):
+    from plan_inspection import count_exchange_nodes
+    from sales_data_etl import calculate_business_metrics
+
+    # One shuffle by customer_id serves every window specification
+    assert count_exchange_nodes(calculate_business_metrics(sales_df)) == 1
+
+
+def test_segments_and_join_reuse_the_metrics_layout(sales_df):
+    from join_strategy import skew_aware_join
+    from materialization import MaterializationPlanner
+    from plan_inspection import count_exchange_nodes
+    from sales_data_etl import calculate_business_metrics, calculate_customer_segments
+
+    materialization = MaterializationPlanner()
+    try:
+        metrics_df = materialization.materialize("metrics", calculate_business_metrics(sales_df))
+
+        # groupBy on the partitioning key of the cached metrics needs no exchange
+        segments_df = calculate_customer_segments(metrics_df)
+        assert count_exchange_nodes(segments_df) == 0
+
+        # Small segments are broadcast: the broadcast is the join's only exchange
+        segments_df = materialization.materialize("segments", segments_df)
+        joined_df = skew_aware_join(
+            metrics_df,
+            segments_df.select("customer_id", "customer_segment"),
+            "customer_id",
+            left_row_count=materialization.row_count("metrics")
+        )
+        assert count_exchange_nodes(joined_df) == 1
+        assert joined_df.count() == materialization.row_count("metrics")
+    finally:
+        materialization.release_all()
@@ -0,0 +1,83 @@
+# tests/test_sqs_ingest.py
+import json
+
+import pytest
+
+from sqs_ingest import LocalQueue, group_records, is_sqs_batch
+
+
+@pytest.fixture
+def queue():
+    return LocalQueue(max_receive_count=2)
+
+
+def object_created(key, bucket="raw-bucket"):
+    return {
+        'source': 'aws.s3',
+        'detail-type': 'Object Created',
+        'detail': {'bucket': {'name': bucket}, 'object': {'key': key}}
+    }
+
+
+def route(object_key):
+    return ['sales-etl'] if object_key.startswith('sales/') else []
+
+
+def test_group_records_by_job_and_bucket():
+    queue = LocalQueue()
+    first = queue.send(object_created("sales/a.csv"))
+    repeat = queue.send(object_created("sales/a.csv"))
+    other_bucket = queue.send(object_created("sales/b.csv", bucket="other-bucket"))
+    unrouted = queue.send(object_created("logs/x.csv"))
+    broken = queue.send("not json")
+
+    event = queue.receive()
+    assert is_sqs_batch(event)
+    groups, malformed = group_records(event['Records'], route)
+
+    assert malformed == [broken]
+    assert groups[('sales-etl', 'raw-bucket')] == {
+        'bucket': 'raw-bucket', 'keys': ["sales/a.csv"], 'message_ids': [first, repeat]
+    }
+    assert groups[('sales-etl', 'other-bucket')]['message_ids'] == [other_bucket]
+    assert unrouted not in [message_id for group in groups.values() for message_id in group['message_ids']]
+
+
+def test_partial_batch_failure_returns_only_failed_messages(orchestrator, glue_client, queue):
+    sales_job = orchestrator.ROUTING['jobs']['sales-data-etl']
+    customer_job = orchestrator.ROUTING['jobs']['customer-data-etl']
+    glue_client.fail(customer_job, 'EntityNotFoundException')
+
+    sales_messages = [queue.send(object_created("sales/a.csv")), queue.send(object_created("sales/b.csv"))]
+    customer_message = queue.send(object_created("customers/a.csv"))
+    queue.send("not json")
+
+    response = orchestrator.lambda_handler(queue.receive(), None)
+    assert response == {'batchItemFailures': [{'itemIdentifier': customer_message}]}
+
+    # One run for both sales keys; the malformed message is dropped, not retried
+    [sales_run] = glue_client.started(sales_job)
+    assert json.loads(sales_run['Arguments']['--source_keys']) == ["sales/a.csv", "sales/b.csv"]
+    queue.complete(response)
+    assert len(queue) == 1
+    assert sales_messages[0] not in queue.messages
+
+    # The redelivered message succeeds once the job can start
+    response = orchestrator.lambda_handler(queue.receive(), None)
+    assert response == {'batchItemFailures': []}
+    queue.complete(response)
+    assert len(queue) == 0
+    assert len(glue_client.started(customer_job)) == 1
+
+
+def test_message_failing_every_delivery_moves_to_dead_letters(orchestrator, glue_client, queue):
+    sales_job = orchestrator.ROUTING['jobs']['sales-data-etl']
+    glue_client.fail(sales_job, 'EntityNotFoundException', 'EntityNotFoundException')
+    queue.send(object_created("sales/a.csv"))
+
+    for _ in range(2):
+        queue.complete(orchestrator.lambda_handler(queue.receive(), None))
+
+    assert len(queue) == 0
+    assert len(queue.dead_letters) == 1
+    assert glue_client.started(sales_job) == []